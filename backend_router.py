@@ -0,0 +1,139 @@
+"""Routes completion calls between the configured API backends.
+
+Each backend keeps a rolling window of call outcomes (success and latency). Calls are
+routed by type: short calls such as question generation prefer the faster, cheaper
+model, and long feedback calls prefer the stronger one. A backend that has become much
+slower than the alternative, or whose recent error rate is too high, is moved to the back
+of the order, and the caller fails over to the next backend when a call fails.
+
+Latency is kept separately for streamed calls (time to first token) and plain calls
+(full response time), and a backend is only compared with others by the same measure.
+
+A demoted backend would otherwise only see new calls when everything else fails, so
+outcomes expire after a while and the preferred backend gets a single probe call every
+PROBE_INTERVAL seconds; if it has recovered it wins its place back.
+"""
+import threading
+import time
+from collections import deque
+
+HEALTH_WINDOW = 20  # Recent outcomes kept per backend
+MIN_SAMPLES = 3  # Outcomes needed before a backend can be considered degraded
+MAX_ERROR_RATE = 0.5
+SLOW_FACTOR = 3.0  # A preferred backend this many times slower than another loses its place
+OUTCOME_TTL = 300.0  # Seconds before an outcome no longer counts
+PROBE_INTERVAL = 30.0  # Seconds between probe calls to a demoted preferred backend
+
+# Backends in order of preference for each type of call
+CALL_PREFERENCES = {
+    "question": ["local", "mini4o", "openai"],  # Short prompts: fast and cheap is good enough
+    "question_list": ["local", "mini4o", "openai"],
+    "feedback": ["openai", "mini4o", "local"],  # Long answers: use the stronger model
+}
+
+class BackendHealth:
+    """Rolling outcome window for one backend"""
+
+    def __init__(self, window=HEALTH_WINDOW):
+        self.outcomes = deque(maxlen=window)  # (time, succeeded, latency in seconds or None, streaming)
+        self.last_attempt = 0.0
+
+    def record(self, succeeded, latency=None, streaming=False):
+        self.outcomes.append((time.time(), succeeded, latency, streaming))
+        self.last_attempt = time.time()
+
+    def expire(self):
+        cutoff = time.time() - OUTCOME_TTL
+        while self.outcomes and self.outcomes[0][0] < cutoff:
+            self.outcomes.popleft()
+
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for _, succeeded, _, _ in self.outcomes if not succeeded) / len(self.outcomes)
+
+    def average_latency(self, streaming=False):
+        """Mean time to first token of streamed calls, or mean duration of plain calls"""
+        latencies = [latency for _, succeeded, latency, streamed in self.outcomes
+                     if succeeded and latency is not None and streamed == streaming]
+        return sum(latencies) / len(latencies) if latencies else None
+
+    def is_degraded(self):
+        return len(self.outcomes) >= MIN_SAMPLES and self.error_rate() > MAX_ERROR_RATE
+
+class BackendRouter:
+    """Orders the available backends for each call from their preference and recent health"""
+
+    def __init__(self, preferences=None):
+        self.preferences = preferences or CALL_PREFERENCES
+        self.health = {}
+        self.lock = threading.Lock()
+        self.stats = {"routed": 0, "failovers": 0, "reordered": 0, "probes": 0}
+
+    def get_health(self, backend):
+        if backend not in self.health:
+            self.health[backend] = BackendHealth()
+        return self.health[backend]
+
+    def record(self, backend, succeeded, latency=None, streaming=False):
+        """Record the outcome of one call to a backend; latency is the time to first token if streaming"""
+        with self.lock:
+            self.get_health(backend).record(succeeded, latency, streaming)
+
+    def record_failover(self, from_backend, to_backend):
+        print(f"Backend '{from_backend}' failed, failing over to '{to_backend}'")
+        with self.lock:
+            self.stats["failovers"] += 1
+
+    def route(self, call_type, available, streaming=False):
+        """Return the available backends in the order they should be tried"""
+        preference = self.preferences.get(call_type, [])
+
+        def rank(backend):
+            return preference.index(backend) if backend in preference else len(preference)
+
+        with self.lock:
+            self.stats["routed"] += 1
+            ordered = sorted(available, key=rank)
+            for backend in ordered:
+                self.get_health(backend).expire()
+            healthy = [backend for backend in ordered if not self.get_health(backend).is_degraded()]
+            degraded = sorted(
+                (backend for backend in ordered if backend not in healthy),
+                key=lambda backend: self.get_health(backend).error_rate()
+            )
+
+            # Let a much faster healthy backend go first
+            latencies = {backend: self.get_health(backend).average_latency(streaming) for backend in healthy}
+            known = [backend for backend in healthy if latencies[backend] is not None]
+            if healthy and known and latencies[healthy[0]] is not None:
+                fastest = min(known, key=lambda backend: latencies[backend])
+                if latencies[healthy[0]] > SLOW_FACTOR * latencies[fastest]:
+                    healthy.remove(fastest)
+                    healthy.insert(0, fastest)
+
+            routed = healthy + degraded
+            if routed and routed[0] != ordered[0]:
+                preferred = self.get_health(ordered[0])
+                if time.time() - preferred.last_attempt >= PROBE_INTERVAL:
+                    # Half-open probe: give the demoted preferred backend this one call
+                    preferred.last_attempt = time.time()
+                    routed.remove(ordered[0])
+                    routed.insert(0, ordered[0])
+                    self.stats["probes"] += 1
+                else:
+                    self.stats["reordered"] += 1
+            return routed
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            for backend, health in self.health.items():
+                stats[backend] = {
+                    "calls": len(health.outcomes),
+                    "error_rate": round(health.error_rate(), 2),
+                    "avg_latency": health.average_latency(),
+                    "avg_ttft": health.average_latency(streaming=True),
+                    "degraded": health.is_degraded(),
+                }
+        return stats
@@ -0,0 +1,262 @@
+"""Score recorded practice answers in bulk from the command line.
+
+Reads JSONL records with "career", "question" and "answer" (plus an optional "id"),
+runs the same evaluation as the app's Send button through the headless engine and
+appends one JSONL result per record to the output file as soon as it finishes.
+
+    python batch_evaluate.py answers.jsonl results.jsonl --concurrency 4 --rpm 60
+
+Results already in the output file are skipped, so an interrupted run continues where
+it stopped when started again with the same arguments. Records that hit rate limits
+slow the whole batch down and are retried; other failures are written with an "error"
+field and retried on the next run.
+
+With --provider-batch the records are instead sent through the provider's Batch API
+(cheaper, finishes within 24 hours): the command submits the batch, waits for it and
+writes the results. --batch-id resumes waiting for a batch submitted earlier.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import interview_engine
+import settings_cache
+from generation_profiles import get_generation_profile
+from interview_session import InterviewSession, build_feedback_prompt
+from structured_feedback import FEEDBACK_SCHEMA, parse_feedback, response_format_for_model
+
+DEFAULT_CONCURRENCY = 4
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_COOLDOWN = 20.0  # Seconds the whole batch pauses after a rate-limited record
+BATCH_POLL_INTERVAL = 30.0
+
+def record_id(record):
+    """Stable id for resuming: the record's own id, or a hash of its content"""
+    if record.get("id") is not None:
+        return str(record["id"])
+    content = json.dumps([record.get("career"), record.get("question"), record.get("answer")], ensure_ascii=False)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+
+def read_records(path):
+    """Valid input records in file order; malformed lines are reported and skipped"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                print(f"Line {line_number}: not valid JSON, skipped")
+                continue
+            if not isinstance(record, dict) or not all(str(record.get(field, "")).strip()
+                                                       for field in ("career", "question", "answer")):
+                print(f"Line {line_number}: an object with career, question and answer is required, skipped")
+                continue
+            yield record
+
+def read_finished_ids(path):
+    """Ids of records that already have a successful result in the output file"""
+    finished = set()
+    if not os.path.exists(path):
+        return finished
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by an interruption
+            if isinstance(result, dict) and not result.get("error"):
+                finished.add(result.get("id"))
+    return finished
+
+def is_rate_limited(text):
+    return "429" in text or "rate limit" in text.lower()
+
+class RateLimiter:
+    """Spaces requests to a maximum rate and pauses everyone after a rate-limit error"""
+
+    def __init__(self, requests_per_minute=None):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self.next_slot = 0.0
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.time()
+            slot = max(now, self.next_slot, self.paused_until)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def cool_down(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.time() + seconds)
+
+class ResultWriter:
+    """Appends result lines from many threads, flushing each so a crash loses nothing"""
+
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+        self.lock = threading.Lock()
+        self.counts = {"ok": 0, "failed": 0}
+
+    def write(self, result):
+        with self.lock:
+            self.file.write(json.dumps(result, ensure_ascii=False) + "\n")
+            self.file.flush()
+            self.counts["failed" if result.get("error") else "ok"] += 1
+
+    def close(self):
+        self.file.close()
+
+def evaluate_record(record, limiter):
+    """Run the app's evaluation on one record, retrying rate-limited attempts"""
+    started = time.perf_counter()
+    session = InterviewSession(record["career"], history=False, fan_out=False)
+    session.use_question(record["question"])
+    feedback = {}
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        limiter.acquire()
+        feedback = session.evaluate(record["answer"])
+        error = feedback.get("error")
+        if not error or not is_rate_limited(error) or attempt == RATE_LIMIT_RETRIES:
+            break
+        cooldown = RATE_LIMIT_COOLDOWN * (attempt + 1)
+        print(f"{record_id(record)}: rate limited, pausing the batch for {cooldown:.0f}s")
+        limiter.cool_down(cooldown)
+        # Evaluate the same answer again from a clean round
+        session.use_question(record["question"])
+
+    return {
+        "id": record_id(record),
+        "career": record["career"],
+        "question": record["question"],
+        "answer": record["answer"],
+        "feedback": {name: value for name, value in feedback.items() if name != "error"},
+        "error": feedback.get("error"),
+        "latency": round(time.perf_counter() - started, 2),
+    }
+
+def run_concurrent(records, writer, concurrency, limiter):
+    """Evaluate records with at most concurrency requests in flight, writing results as they finish"""
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as executor:
+        in_flight = set()
+        for record in records:
+            if len(in_flight) >= concurrency:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    report(writer, future.result())
+            in_flight.add(executor.submit(evaluate_record, record, limiter))
+        for future in in_flight:
+            report(writer, future.result())
+
+def report(writer, result):
+    writer.write(result)
+    status = f"error: {result['error'][:80]}" if result["error"] else f"rating {result['feedback'].get('rating')}"
+    print(f"[{writer.counts['ok'] + writer.counts['failed']}] {result['id']}: {status} ({result['latency']}s)")
+
+# Provider Batch API
+
+def get_batch_backend():
+    api_type = settings_cache.get_api_type()
+    api_key = interview_engine.get_backend_api_key(api_type)
+    if not api_key:
+        raise RuntimeError(interview_engine.get_missing_key_message(api_type))
+    client = interview_engine.get_api_client(api_type, api_key, interview_engine.get_base_url(api_type))
+    return client, interview_engine.get_model_name(api_type)
+
+def submit_provider_batch(records, client, model):
+    """Upload the requests as a Batch API input file and start the batch"""
+    lines = []
+    response_format = response_format_for_model(model, FEEDBACK_SCHEMA)
+    params = get_generation_profile("feedback").request_params(model)
+    for record in records:
+        body = dict(params, model=model, messages=[{"role": "system", "content": build_feedback_prompt(
+            record["career"], record["question"], record["answer"])}])
+        if response_format:
+            body["response_format"] = response_format
+        lines.append(json.dumps({"custom_id": record_id(record), "method": "POST",
+                                 "url": "/v1/chat/completions", "body": body}))
+    if not lines:
+        return None
+    batch_file = client.files.create(file=("batch_input.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch")
+    batch = client.batches.create(input_file_id=batch_file.id, endpoint="/v1/chat/completions",
+                                  completion_window="24h")
+    print(f"Submitted batch {batch.id} with {len(lines)} requests (resume with --batch-id {batch.id})")
+    return batch.id
+
+def collect_provider_batch(batch_id, records_by_id, writer, client, finished=()):
+    """Wait for a submitted batch to finish and write its results, skipping ids in finished"""
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        print(f"Batch {batch_id}: {batch.status} ({counts.completed if counts else 0} completed)")
+        if batch.status in ("completed", "failed", "expired", "cancelled"):
+            break
+        time.sleep(BATCH_POLL_INTERVAL)
+
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        for line in client.files.content(file_id).text.splitlines():
+            item = json.loads(line)
+            if item.get("custom_id") in finished:
+                continue  # Already written by an earlier collection of this batch
+            record = records_by_id.get(item.get("custom_id"), {})
+            response = item.get("response") or {}
+            error = item.get("error")
+            feedback = {}
+            if response.get("status_code") == 200:
+                feedback = parse_feedback(response["body"]["choices"][0]["message"]["content"])
+            elif not error:
+                error = f"Request failed with status code {response.get('status_code')}"
+            writer.write({
+                "id": item.get("custom_id"),
+                "career": record.get("career"),
+                "question": record.get("question"),
+                "answer": record.get("answer"),
+                "feedback": feedback,
+                "error": str(error) if error else None,
+                "batch_id": batch_id,
+            })
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate interview answers from a JSONL file in bulk")
+    parser.add_argument("input", help="JSONL file with career, question and answer per line")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="requests in flight at once")
+    parser.add_argument("--rpm", type=float, default=None, help="maximum requests per minute")
+    parser.add_argument("--provider-batch", action="store_true", help="use the provider's Batch API")
+    parser.add_argument("--batch-id", help="collect the results of a batch submitted earlier")
+    args = parser.parse_args()
+
+    finished = read_finished_ids(args.output)
+    records = [record for record in read_records(args.input) if record_id(record) not in finished]
+    print(f"{len(records)} records to evaluate ({len(finished)} already done)")
+
+    writer = ResultWriter(args.output)
+    try:
+        if args.provider_batch or args.batch_id:
+            client, model = get_batch_backend()
+            batch_id = args.batch_id or submit_provider_batch(records, client, model)
+            if batch_id:
+                collect_provider_batch(batch_id, {record_id(record): record for record in records}, writer, client,
+                                       finished)
+        else:
+            run_concurrent(records, writer, max(1, args.concurrency), RateLimiter(args.rpm))
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to continue")
+    finally:
+        writer.close()
+        print(f"Done: {writer.counts['ok']} evaluated, {writer.counts['failed']} failed")
+        interview_engine.close()
+    return 1 if writer.counts["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Per-call instrumentation for completions: tokens, cost, queue wait, TTFT and latency.
+
+interview_engine records one entry per backend attempt: the call type, backend, model,
+prompt and completion tokens, how long the request waited for a worker, time to first
+token, total latency and the outcome. CallMetrics keeps rolling histograms and totals
+in memory. The calls can also be appended to a JSONL log, and everything can be
+exported in the Prometheus text format.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+
+from generation_profiles import count_message_tokens, count_tokens
+
+RECENT_CALLS = 200
+HISTOGRAM_WINDOW = 500  # Samples kept per histogram for rolling percentiles
+MAX_TRACKED_SESSIONS = 1000
+
+# Call fields with a histogram; times are in seconds
+HISTOGRAM_BUCKETS = {
+    "latency": (0.5, 1, 2, 4, 8, 16, 32, 64),
+    "ttft": (0.1, 0.25, 0.5, 1, 2, 4, 8),
+    "queue_wait": (0.01, 0.05, 0.1, 0.5, 1, 5),
+    "prompt_tokens": (100, 250, 500, 1000, 2000, 4000, 8000),
+    "completion_tokens": (25, 50, 100, 250, 500, 1000, 2048),
+}
+
+# Approximate list prices in USD per million (prompt, cached prompt, completion) tokens;
+# the longest matching prefix wins. Models not listed (e.g. local servers) cost nothing.
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4-turbo": (10.00, 10.00, 30.00),
+    "gpt-4": (30.00, 30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 0.50, 1.50),
+}
+
+def estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens=0):
+    """Approximate cost of a call in USD; cached_tokens is the part of the prompt served from the prompt cache"""
+    matches = [prefix for prefix in MODEL_PRICES if model and model.startswith(prefix)]
+    if not matches:
+        return 0.0
+    prompt_price, cached_price, completion_price = MODEL_PRICES[max(matches, key=len)]
+    uncached_tokens = prompt_tokens - cached_tokens
+    return (uncached_tokens * prompt_price + cached_tokens * cached_price
+            + completion_tokens * completion_price) / 1_000_000
+
+def read_usage(usage):
+    """Token counts from an API usage object or dict (empty if the server sent none)"""
+    if not usage:
+        return {}
+    if isinstance(usage, dict):
+        get = usage.get
+    else:
+        get = lambda name: getattr(usage, name, None)
+    # Prompt tokens the provider served from its prefix cache
+    details = get("prompt_tokens_details") or {}
+    if isinstance(details, dict):
+        cached_tokens = details.get("cached_tokens")
+    else:
+        cached_tokens = getattr(details, "cached_tokens", None)
+    return {"prompt_tokens": get("prompt_tokens") or 0, "completion_tokens": get("completion_tokens") or 0,
+            "cached_tokens": cached_tokens or 0}
+
+def count_usage(messages, text, usage, model=""):
+    """Reported token usage, or a local count of the text when the server did not report it"""
+    counts = read_usage(usage)
+    if counts:
+        counts["tokens_estimated"] = False
+        return counts
+    return {
+        "prompt_tokens": count_message_tokens(messages, model),
+        "completion_tokens": count_tokens(text, model) if text else 0,
+        "cached_tokens": 0,
+        "tokens_estimated": True,
+    }
+
+class Histogram:
+    """Cumulative bucket counts (for export) plus a rolling window (for percentiles)"""
+
+    def __init__(self, buckets, window=HISTOGRAM_WINDOW):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+        self.samples.append(value)
+
+class CallMetrics:
+    """Thread-safe store of completion call records, histograms and token/cost totals"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.recent = deque(maxlen=RECENT_CALLS)
+        self.histograms = {}  # (metric, call_type, backend) -> Histogram
+        self.totals = {}  # (call_type, backend, model, outcome) -> counters
+        self.sessions = OrderedDict()  # session_id -> counters, most recently used last
+
+    def record(self, call):
+        """Add one call; call is a dict with the fields described in the module docstring"""
+        call.setdefault("timestamp", time.time())
+        call["cost"] = estimate_cost(call.get("model"), call.get("prompt_tokens", 0), call.get("completion_tokens", 0),
+                                     call.get("cached_tokens", 0))
+        with self.lock:
+            self.recent.append(call)
+            for metric, buckets in HISTOGRAM_BUCKETS.items():
+                value = call.get(metric)
+                # Cache hits, and token counts of failed calls, would skew the distributions
+                if value is None or call["outcome"] == "cached" or (metric.endswith("tokens") and call["outcome"] != "ok"):
+                    continue
+                key = (metric, call["call_type"], call["backend"])
+                if key not in self.histograms:
+                    self.histograms[key] = Histogram(buckets)
+                self.histograms[key].observe(value)
+
+            totals = self.totals.setdefault(
+                (call["call_type"], call["backend"], call.get("model") or "", call["outcome"]),
+                {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cost": 0.0}
+            )
+            self.add_usage(totals, call)
+
+            session_id = call.get("session_id")
+            if session_id:
+                session = self.sessions.pop(session_id, None) or {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                                                                  "cached_tokens": 0, "cost": 0.0}
+                self.add_usage(session, call)
+                self.sessions[session_id] = session
+                while len(self.sessions) > MAX_TRACKED_SESSIONS:
+                    self.sessions.popitem(last=False)
+
+    def add_usage(self, counters, call):
+        counters["calls"] += 1
+        counters["prompt_tokens"] += call.get("prompt_tokens", 0)
+        counters["completion_tokens"] += call.get("completion_tokens", 0)
+        counters["cached_tokens"] += call.get("cached_tokens", 0)
+        counters["cost"] += call["cost"]
+
+    def get_session_usage(self, session_id):
+        """Calls, tokens and cost so far for one interview session"""
+        with self.lock:
+            return dict(self.sessions.get(session_id) or {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                                                          "cached_tokens": 0, "cost": 0.0})
+
+    def get_summary(self):
+        """Totals and rolling p50/p95 latency and TTFT per call type"""
+        with self.lock:
+            summary = {"calls": 0, "failed": 0, "cached": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                       "cached_tokens": 0, "cost": 0.0, "by_call_type": {}}
+            for (call_type, backend, model, outcome), totals in self.totals.items():
+                summary["calls"] += totals["calls"]
+                summary["prompt_tokens"] += totals["prompt_tokens"]
+                summary["completion_tokens"] += totals["completion_tokens"]
+                summary["cached_tokens"] += totals["cached_tokens"]
+                summary["cost"] += totals["cost"]
+                if outcome == "error":
+                    summary["failed"] += totals["calls"]
+                elif outcome == "cached":
+                    summary["cached"] += totals["calls"]
+
+            for (metric, call_type, backend), histogram in self.histograms.items():
+                if metric not in ("latency", "ttft"):
+                    continue
+                by_type = summary["by_call_type"].setdefault(call_type, {})
+                samples = by_type.setdefault(metric, [])
+                samples.extend(histogram.samples)
+
+        summary["cached_share"] = summary["cached_tokens"] / summary["prompt_tokens"] if summary["prompt_tokens"] else 0.0
+        for by_type in summary["by_call_type"].values():
+            for metric, samples in list(by_type.items()):
+                ordered = sorted(samples)
+                by_type[metric] = {
+                    "p50": ordered[len(ordered) // 2],
+                    "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+                    "samples": len(ordered),
+                }
+        return summary
+
+    def get_recent(self, limit=20):
+        with self.lock:
+            return list(self.recent)[-limit:]
+
+    def append_log(self, call, path):
+        """Append one call to a JSONL file"""
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(call, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"Error writing call metrics log: {str(e)}")
+
+    def format_prometheus(self):
+        """All histograms and totals in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            totals = sorted(self.totals.items())
+
+            for metric in HISTOGRAM_BUCKETS:
+                unit = "" if metric.endswith("tokens") else "_seconds"
+                name = f"interview_completion_{metric}{unit}"
+                lines.append(f"# TYPE {name} histogram")
+                for (hist_metric, call_type, backend), histogram in histograms:
+                    if hist_metric != metric:
+                        continue
+                    labels = f'call_type="{call_type}",backend="{backend}"'
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.total}')
+                    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{labels}}} {histogram.total}")
+
+            for field, name in (("calls", "interview_completion_calls_total"),
+                                ("prompt_tokens", "interview_completion_prompt_tokens_total"),
+                                ("completion_tokens", "interview_completion_completion_tokens_total"),
+                                ("cached_tokens", "interview_completion_cached_prompt_tokens_total"),
+                                ("cost", "interview_completion_cost_usd_total")):
+                lines.append(f"# TYPE {name} counter")
+                for (call_type, backend, model, outcome), counters in totals:
+                    labels = f'call_type="{call_type}",backend="{backend}",model="{model}",outcome="{outcome}"'
+                    lines.append(f"{name}{{{labels}}} {counters[field]}")
+        return "\n".join(lines) + "\n"
+
+    def export_prometheus(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.format_prometheus())
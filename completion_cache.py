@@ -0,0 +1,122 @@
+"""Content-addressed cache of completions.
+
+Entries are keyed by a SHA-256 hash of the model, the messages and the request
+parameters, so retrying the same answer to the same question returns the stored
+feedback instead of calling the API again. Recent entries are kept in an in-memory LRU
+and every entry is also stored in SQLite so the cache survives restarts. Entries expire
+after a TTL and the least recently used ones are evicted once the store is full.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "completion_cache.db")
+MEMORY_ENTRIES = 128
+MAX_STORED_ENTRIES = 2000
+ENTRY_TTL = 7 * 24 * 3600  # Seconds before a stored completion expires
+
+def make_cache_key(model, messages, params=None):
+    """Stable hash of everything that determines a completion"""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params or {}},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class CompletionCache:
+    """Two-tier (memory LRU + SQLite) completion cache with hit and bytes-saved counters"""
+
+    def __init__(self, path=DB_FILE, memory_entries=MEMORY_ENTRIES):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()  # key -> text, most recently used last
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                text TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+        """)
+        self.connection.commit()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "bytes_saved": 0}
+
+    def _remember(self, key, text):
+        self.memory[key] = text
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached completion for a key, or None on a miss"""
+        with self.lock:
+            text = self.memory.get(key)
+            if text is not None:
+                self.memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                self.stats["bytes_saved"] += len(text.encode("utf-8"))
+                return text
+
+            row = self.connection.execute(
+                "SELECT text FROM completions WHERE key = ? AND created > ?", (key, time.time() - ENTRY_TTL)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            text = row[0]
+            self.connection.execute("UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.connection.commit()
+            self._remember(key, text)
+            self.stats["disk_hits"] += 1
+            self.stats["bytes_saved"] += len(text.encode("utf-8"))
+            return text
+
+    def put(self, key, model, text):
+        """Store a completion in both tiers"""
+        now = time.time()
+        with self.lock:
+            self._remember(key, text)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO completions (key, model, text, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, model, text, now, now),
+            )
+            self._evict()
+            self.connection.commit()
+            self.stats["stores"] += 1
+
+    def _evict(self):
+        self.connection.execute("DELETE FROM completions WHERE created <= ?", (time.time() - ENTRY_TTL,))
+        self.connection.execute(
+            "DELETE FROM completions WHERE key IN (SELECT key FROM completions "
+            "ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (MAX_STORED_ENTRIES,),
+        )
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            self.connection.execute("DELETE FROM completions")
+            self.connection.commit()
+
+    def get_stats(self):
+        """Hit counters, hit rate, bytes saved and size of both tiers"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self.memory)
+            stats["stored_entries"] = self.connection.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
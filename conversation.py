@@ -0,0 +1,82 @@
+"""Interview session transcript kept within a token budget.
+
+The transcript holds the interviewer's questions, the candidate's answers and the
+feedback as compact (role, content) tuples. When the estimated size of the messages
+goes over the budget, the oldest turns are folded into a short running summary that
+is sent along with the system prompt, so long mock interviews keep their context
+without the prompt growing without bound.
+"""
+
+DEFAULT_TOKEN_BUDGET = 3000
+MIN_RECENT_TURNS = 2  # Never summarize away the latest question and answer
+SUMMARY_LINE_CHARS = 160
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+def estimate_tokens(text):
+    """Rough token estimate for English text (about four characters per token)"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def summarize_turn(role, content):
+    """Reduce a turn to a single short line for the running summary"""
+    label = {"assistant": "Interviewer", "user": "Candidate"}.get(role, role)
+    text = " ".join(content.split())
+    # Keep the first sentence, capped to a fixed width
+    for end in (". ", "? ", "! "):
+        index = text.find(end)
+        if 0 < index < SUMMARY_LINE_CHARS:
+            text = text[:index + 1]
+            break
+    if len(text) > SUMMARY_LINE_CHARS:
+        text = text[:SUMMARY_LINE_CHARS - 3] + "..."
+    return f"- {label}: {text}"
+
+class Conversation:
+    """Chat transcript for one interview session, trimmed to a token budget"""
+
+    def __init__(self, system_prompt, token_budget=DEFAULT_TOKEN_BUDGET):
+        self.system_prompt = system_prompt
+        self.token_budget = token_budget
+        self.turns = []
+        self.summary_lines = []
+
+    def add_question(self, question):
+        self.add_turn("assistant", question)
+
+    def add_answer(self, answer):
+        self.add_turn("user", answer)
+
+    def add_feedback(self, feedback):
+        self.add_turn("assistant", feedback)
+
+    def add_turn(self, role, content):
+        if content:
+            self.turns.append((role, content))
+            self.trim()
+
+    def system_content(self):
+        if not self.summary_lines:
+            return self.system_prompt
+        return self.system_prompt + "\n\nEarlier in this interview (summarized):\n" + "\n".join(self.summary_lines)
+
+    def estimated_tokens(self):
+        total = estimate_tokens(self.system_content()) + MESSAGE_OVERHEAD_TOKENS
+        for _, content in self.turns:
+            total += estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        return total
+
+    def trim(self):
+        """Fold the oldest turns into the summary until the transcript fits the budget"""
+        while self.estimated_tokens() > self.token_budget and len(self.turns) > MIN_RECENT_TURNS:
+            role, content = self.turns.pop(0)
+            self.summary_lines.append(summarize_turn(role, content))
+
+        # The summary itself may not take more than a quarter of the budget
+        while self.summary_lines and estimate_tokens("\n".join(self.summary_lines)) > self.token_budget // 4:
+            self.summary_lines.pop(0)
+
+    def messages(self):
+        """Return the transcript as chat messages for the completion API"""
+        messages = [{"role": "system", "content": self.system_content()}]
+        messages.extend({"role": role, "content": content} for role, content in self.turns)
+        return messages
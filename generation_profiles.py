@@ -0,0 +1,108 @@
+"""Generation settings per call type, and prompt size checks before a request is sent.
+
+Every call type gets its own token cap and stop sequences instead of one fixed
+max_tokens for everything. A question is one sentence, so its call is capped tightly
+and stops at the first blank line, which keeps it short and fast. The feedback cap fits
+the JSON evaluation with some room to spare.
+
+Prompt sizes are counted with tiktoken when it is installed, otherwise estimated from
+the text length. check_prompt_size() makes sure the prompt plus the reply fits the
+model's context window before anything is sent.
+"""
+from conversation import estimate_tokens
+
+REASONING_MODEL_PREFIXES = ("o1", "o3", "o4", "gpt-5")
+
+def token_limit_param(model):
+    """Name of the reply token cap parameter; reasoning models reject max_tokens"""
+    return "max_completion_tokens" if model.startswith(REASONING_MODEL_PREFIXES) else "max_tokens"
+
+class GenerationProfile:
+    """Request parameters for one call type"""
+
+    def __init__(self, max_tokens, stop=None, temperature=None):
+        self.max_tokens = max_tokens
+        self.stop = list(stop or [])
+        self.temperature = temperature
+
+    def request_params(self, model, max_tokens=None):
+        """Parameters to send with a request to this model"""
+        params = {token_limit_param(model): max_tokens or self.max_tokens}
+        # Reasoning models reject stop sequences and sampling settings
+        if not model.startswith(REASONING_MODEL_PREFIXES):
+            if self.stop:
+                params["stop"] = self.stop
+            if self.temperature is not None:
+                params["temperature"] = self.temperature
+        return params
+
+GENERATION_PROFILES = {
+    "question": GenerationProfile(max_tokens=120, stop=["\n\n"]),
+    "question_list": GenerationProfile(max_tokens=800),
+    "feedback": GenerationProfile(max_tokens=1000),
+}
+
+# Token caps for the smaller fan-out feedback requests
+FEEDBACK_PART_MAX_TOKENS = {"follow_up": 150, "summary": 500, "improvements": 600}
+
+def get_generation_profile(call_type):
+    return GENERATION_PROFILES.get(call_type, GENERATION_PROFILES["feedback"])
+
+# Context windows in tokens; the longest matching prefix wins
+CONTEXT_WINDOWS = {
+    "gpt-4o": 128000,
+    "gpt-4.1": 1047576,
+    "gpt-4-turbo": 128000,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+    "gpt-5": 400000,
+    "o1": 200000,
+    "o3": 200000,
+    "o4": 200000,
+}
+DEFAULT_CONTEXT_WINDOW = 8192  # Local and unknown models
+MESSAGE_OVERHEAD_TOKENS = 4  # Role and separators around each chat message
+
+def get_context_window(model):
+    matches = [prefix for prefix in CONTEXT_WINDOWS if model and model.startswith(prefix)]
+    return CONTEXT_WINDOWS[max(matches, key=len)] if matches else DEFAULT_CONTEXT_WINDOW
+
+encodings = {}  # model -> tiktoken encoding, or None if tiktoken is unavailable
+
+def get_encoding(model):
+    """tiktoken encoding for a model, or None to fall back to the length estimate"""
+    if model not in encodings:
+        try:
+            import tiktoken
+            try:
+                encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encodings[model] = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            # Not installed, or the encoding files cannot be downloaded
+            print(f"tiktoken unavailable ({str(e)}), estimating prompt sizes instead")
+            encodings[model] = None
+    return encodings[model]
+
+def count_tokens(text, model):
+    encoding = get_encoding(model)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+def count_message_tokens(messages, model):
+    """Tokens in a list of chat messages, including per-message overhead"""
+    return sum(count_tokens(str(message.get("content", "")), model) + MESSAGE_OVERHEAD_TOKENS
+               for message in messages)
+
+def check_prompt_size(messages, model, max_tokens):
+    """Fit a request into the model's context window
+
+    Returns (prompt_tokens, max_tokens) with max_tokens lowered if the reply would not fit,
+    or raises ValueError when there is not even room for a short reply."""
+    prompt_tokens = count_message_tokens(messages, model)
+    available = get_context_window(model) - prompt_tokens
+    if available < min(max_tokens, 64):
+        raise ValueError(f"The prompt is {prompt_tokens} tokens, too long for {model or 'this model'}'s "
+                         f"{get_context_window(model)} token context window")
+    return prompt_tokens, min(max_tokens, available)
@@ -0,0 +1,603 @@
+"""UI-independent completion plumbing shared by the Tk app, the server and the tools.
+
+Everything needed to turn a prompt into a completion lives here: pooled API clients and
+HTTP sessions, backend routing and failover, retry/timeout guards, the completion cache
+and the question bank. Nothing in this module touches Tk, so it can be used from any
+thread and by any number of interview sessions at once.
+"""
+import json
+import os
+import threading
+import time
+import traceback
+
+import model_profiles
+import settings_cache
+from backend_router import BackendRouter
+from call_metrics import CallMetrics, count_usage
+from completion_cache import CompletionCache, make_cache_key
+from generation_profiles import check_prompt_size, get_generation_profile, token_limit_param
+from question_bank import QuestionBank
+from resilience import (BackendGuard, CircuitOpenError, ResiliencePolicy, RetryableError,
+                        RETRY_STATUSES, parse_retry_after)
+from structured_feedback import response_format_for_model
+
+API_TYPES = ["openai", "mini4o", "local"]
+MAX_TOKENS = 2048  # Only for calls made without a generation profile
+METRICS_LOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "call_metrics.jsonl")
+
+client = None  # Client for the selected API service, built at startup
+api_clients = {}
+api_clients_lock = threading.Lock()
+http_session = None
+connection_stats = {"clients_created": 0, "client_reuses": 0, "sessions_created": 0}
+# Retry / timeout / circuit breaker state per API backend
+backend_guards = {}
+# Picks the backend for each call from the call type and recent backend health
+backend_router = BackendRouter()
+# Stored questions by job title (opened lazily)
+question_bank = None
+# Stored completions for repeated identical requests (opened lazily)
+completion_cache = None
+# Tokens, cost and timings of every completion call
+call_metrics = CallMetrics()
+
+def clean_api_key(api_key):
+    """Clean the API key to ensure it only contains valid ASCII characters"""
+    if not api_key:
+        return ""
+    
+    # Strip whitespace and control characters
+    cleaned_key = api_key.strip()
+    
+    # Remove any non-ASCII characters
+    cleaned_key = ''.join(char for char in cleaned_key if ord(char) < 128)
+    
+    return cleaned_key
+
+def get_api_client(api_type, api_key, base_url=None):
+    """Return the long-lived OpenAI client for these credentials, creating it only once
+    
+    The client keeps its HTTP connection pool alive between requests, so repeated questions
+    and feedback rounds reuse the same TLS connection instead of handshaking every time."""
+    with api_clients_lock:
+        cached_client = api_clients.get((api_type, api_key, base_url))
+        if cached_client is not None:
+            connection_stats["client_reuses"] += 1
+            return cached_client
+        
+        # Credentials or server changed: retire clients built for an older key of this API type.
+        # They are not closed here, since another worker may still be mid-request or mid-stream
+        # with one; each is closed by garbage collection once the last request lets go of it.
+        for key in [key for key in api_clients if key[0] == api_type]:
+            api_clients.pop(key)
+        
+        # Imported here so that loading the OpenAI SDK does not delay the first window paint
+        from openai import OpenAI
+        
+        # Retries are handled by the backend guard, so the SDK's own retries are turned off
+        new_client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        api_clients[(api_type, api_key, base_url)] = new_client
+        connection_stats["clients_created"] += 1
+        return new_client
+
+def get_http_session():
+    """Return the shared requests session used by the direct request fallback"""
+    global http_session
+    
+    with api_clients_lock:
+        if http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            
+            http_session = requests.Session()
+            http_session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=8))
+            connection_stats["sessions_created"] += 1
+        return http_session
+
+def get_connection_stats():
+    """Return counters showing how often clients and HTTP connections were reused"""
+    with api_clients_lock:
+        stats = dict(connection_stats)
+        stats["live_clients"] = len(api_clients)
+        session = http_session
+    
+    if session is not None:
+        # urllib3 keeps per-host counters of opened connections and requests sent
+        pools = session.get_adapter("https://").poolmanager.pools
+        stats["http_connections_opened"] = 0
+        stats["http_requests"] = 0
+        for pool_key in list(pools.keys()):
+            pool = pools.get(pool_key)
+            if pool is not None:
+                stats["http_connections_opened"] += pool.num_connections
+                stats["http_requests"] += pool.num_requests
+        stats["http_connection_reuses"] = stats["http_requests"] - stats["http_connections_opened"]
+    
+    return stats
+
+def initialize_openai_client():
+    """Initialize the OpenAI client for the current settings, reusing it if the credentials are unchanged"""
+    global client
+    
+    api_type = settings_cache.get_api_type()
+    if api_type == "openai":
+        api_key = settings_cache.get_api_key()
+        api_key = clean_api_key(api_key)
+        if not api_key:
+            print("Warning: OpenAI API key is not set")
+            return None
+        print(f"Using OpenAI API with key ending in: {api_key[-4:] if len(api_key) > 4 else '****'}")
+    elif api_type == "local":
+        api_key = get_backend_api_key(api_type)
+        if not api_key:
+            print("Warning: No local model profile is active")
+            return None
+        print(f"Using local model server at {get_base_url(api_type)}")
+    else:  # mini4o
+        api_key = settings_cache.get_mini4o_api_key()
+        api_key = clean_api_key(api_key)
+        if not api_key:
+            print("Warning: Mini4o API key is not set")
+            return None
+        print(f"Using Mini4o API with key ending in: {api_key[-4:] if len(api_key) > 4 else '****'}")
+    
+    client = get_api_client(api_type, api_key, get_base_url(api_type))
+    return client
+
+def build_messages(prompt, user_input=None):
+    """Turn a system prompt into chat messages; a prompt that is already a message list is used as is"""
+    if isinstance(prompt, list):
+        return prompt
+    
+    messages = [{"role": "system", "content": prompt}]
+    if user_input:
+        messages.append({"role": "user", "content": user_input})
+    return messages
+
+def get_model_name(api_type=None):
+    """Model used for requests to the given (or currently selected) API service"""
+    if api_type is None:
+        api_type = settings_cache.get_api_type()
+    if api_type == "local":
+        profile = model_profiles.get_active_profile()
+        return profile.model if profile else ""
+    return "gpt-4o-mini" if api_type == "mini4o" else settings_cache.get_model()
+
+def get_base_url(api_type):
+    """Base URL of the OpenAI-compatible server behind an API type"""
+    if api_type == "local":
+        profile = model_profiles.get_active_profile()
+        if profile:
+            return profile.base_url
+    return model_profiles.DEFAULT_BASE_URL
+
+def is_error_response(text):
+    """Whether a completion result is one of our error messages rather than model output"""
+    return not text or text.startswith(("Error:", "Sorry, there was an error"))
+
+def get_resilience_policy():
+    """Build the retry/timeout policy from the settings"""
+    return ResiliencePolicy(
+        connect_timeout=float(settings_cache.get_setting("request_connect_timeout", 5.0)),
+        read_timeout=float(settings_cache.get_setting("request_read_timeout", 60.0)),
+        max_attempts=int(settings_cache.get_setting("request_max_attempts", 3)),
+        hedging=bool(settings_cache.get_setting("request_hedging", True)),
+        hedge_percentile=float(settings_cache.get_setting("request_hedge_percentile", 0.95))
+    )
+
+def get_backend_guard(api_type):
+    """Return the guard (retries, circuit breaker, hedging) for an API backend
+    
+    The policy is read from the settings on every call, so changed timeouts, attempts
+    and hedging take effect without a restart."""
+    policy = get_resilience_policy()
+    with api_clients_lock:
+        guard = backend_guards.get(api_type)
+        if guard is None:
+            guard = BackendGuard(api_type, policy)
+            backend_guards[api_type] = guard
+        else:
+            guard.update_policy(policy)
+        return guard
+
+class CompletionCancelled(Exception):
+    """Raised from a stream callback to abandon a request whose result is no longer wanted"""
+
+def get_backend_api_key(api_type):
+    """Cleaned API key for a backend, or "" if none is configured"""
+    if api_type == "local":
+        # A local server counts as configured once a profile is active; its key is optional
+        profile = model_profiles.get_active_profile()
+        return clean_api_key(profile.effective_api_key()) if profile else ""
+    if api_type == "mini4o":
+        api_key = settings_cache.get_mini4o_api_key()
+        if not api_key:
+            return ""
+        
+        # Clean the API key
+        api_key = clean_api_key(api_key)
+        
+        # Update the stored API key with the cleaned version (skipped by the cache if unchanged)
+        settings_cache.update_mini4o_api_key(api_key)
+    else:  # openai
+        api_key = settings_cache.get_api_key()
+        if not api_key:
+            return ""
+        
+        # Clean the API key
+        api_key = clean_api_key(api_key)
+        
+        # Update the stored API key with the cleaned version (skipped by the cache if unchanged)
+        settings_cache.update_api_key(api_key)
+    return api_key
+
+def get_missing_key_message(api_type):
+    if api_type == "local":
+        return "Error: No local model profile is active. Please go to Settings and add or select a profile."
+    if api_type == "mini4o":
+        return "Error: Mini4o API key is not set. Please go to Settings and configure your API key."
+    return "Error: OpenAI API key is not set. Please go to Settings and configure your API key."
+
+def is_auto_routing():
+    """Whether calls are routed between all configured backends instead of only the selected one
+    
+    Off by default: the backend picked in Settings is then the only one used."""
+    return bool(settings_cache.get_setting("auto_backend_routing", False))
+
+def get_question_bank():
+    """Return the on-disk question bank, opening it on first use (None if it is unavailable)"""
+    global question_bank
+    
+    if question_bank is None:
+        try:
+            question_bank = QuestionBank()
+        except Exception as e:
+            print(f"Question bank unavailable: {str(e)}")
+    return question_bank
+
+def get_completion_cache():
+    """Return the completion cache, opening it on first use (None if it is unavailable)"""
+    global completion_cache
+    
+    if completion_cache is None:
+        try:
+            completion_cache = CompletionCache()
+        except Exception as e:
+            print(f"Completion cache unavailable: {str(e)}")
+    return completion_cache
+
+def is_cache_enabled():
+    """Whether identical requests may be answered from the completion cache"""
+    return bool(settings_cache.get_setting("completion_cache", True))
+
+def is_metrics_logging():
+    """Whether every completion call is also appended to the JSONL metrics log"""
+    return bool(settings_cache.get_setting("call_metrics_log", False))
+
+def record_call(call):
+    """Add one completion call to the metrics (and the log, if enabled)"""
+    call_metrics.record(call)
+    if is_metrics_logging():
+        call_metrics.append_log(call, METRICS_LOG_FILE)
+    ttft = f", first token after {call['ttft']:.2f}s" if call.get("ttft") is not None else ""
+    cached = f" ({call['cached_tokens']} cached)" if call.get("cached_tokens") else ""
+    print(f"{call['call_type'].capitalize()} call via {call['backend']}: {call['outcome']}, "
+          f"{call.get('prompt_tokens', 0)}{cached}+{call.get('completion_tokens', 0)} tokens "
+          f"in {call['latency']:.2f}s{ttft}")
+
+def get_completion(prompt, user_input=None, on_delta=None, call_type="feedback", use_cache=None, json_schema=None,
+                   session_id=None, queued_at=None, max_tokens=None):
+    """Get a completion, routing the call to the best backend and failing over on errors
+    
+    call_type is "question" for short question generation calls, "question_list" for
+    question bank fills and "feedback" for long answers; it selects the generation profile
+    (token cap, stop sequences). max_tokens overrides the profile's cap. When on_delta is
+    given the response is streamed and on_delta is called with each text delta as it
+    arrives; the full text is still returned at the end. json_schema asks for structured
+    output on models that support it.
+    
+    Feedback calls are served from the completion cache when the identical request was
+    answered before; question calls are not, since they should vary.
+    
+    Every attempt is recorded in call_metrics. session_id attributes its tokens and cost
+    to an interview session; queued_at (a time.perf_counter() value) is when the request
+    was handed to a worker pool, to measure how long it waited."""
+    queue_wait = time.perf_counter() - queued_at if queued_at is not None else None
+    messages = build_messages(prompt, user_input)
+    profile = get_generation_profile(call_type)
+    if use_cache is None:
+        use_cache = call_type == "feedback"
+    cache = get_completion_cache() if use_cache and is_cache_enabled() else None
+    
+    backends = []
+    if is_auto_routing():
+        configured = [api_type for api_type in API_TYPES if get_backend_api_key(api_type)]
+        backends = backend_router.route(call_type, configured, streaming=on_delta is not None)
+    if not backends:
+        # Manual routing, or no keys at all (the selected backend reports the missing key)
+        backends = [settings_cache.get_api_type()]
+    
+    text = ""
+    for index, api_type in enumerate(backends):
+        model_name = get_model_name(api_type)
+        call = {"call_type": call_type, "backend": api_type, "model": model_name,
+                "session_id": session_id, "queue_wait": queue_wait if index == 0 else None}
+        params = profile.request_params(model_name, max_tokens)
+        try:
+            # Count the prompt before sending; the reply's cap shrinks if it would not fit
+            limit = token_limit_param(model_name)
+            _, params[limit] = check_prompt_size(messages, model_name, params[limit])
+        except ValueError as e:
+            print(f"Request not sent: {str(e)}")
+            text = f"Error: {str(e)}"
+            if index + 1 >= len(backends):
+                return text
+            backend_router.record_failover(api_type, backends[index + 1])
+            continue
+        
+        cache_key = None
+        if cache is not None:
+            cache_key = make_cache_key(
+                model_name, messages, dict(params, base_url=get_base_url(api_type), json_schema=json_schema)
+            )
+            lookup_started = time.perf_counter()
+            cached_text = cache.get(cache_key)
+            if cached_text is not None:
+                print(f"Completion served from cache ({api_type})")
+                if on_delta is not None:
+                    try:
+                        on_delta(cached_text)
+                    except CompletionCancelled:
+                        print("Completion stream abandoned")
+                        record_call(dict(call, outcome="cancelled", latency=time.perf_counter() - lookup_started))
+                        return ""
+                record_call(dict(call, outcome="cached", latency=time.perf_counter() - lookup_started))
+                return cached_text
+        
+        started = time.perf_counter()
+        first_delta = []
+        
+        def forward_delta(delta):
+            if not first_delta:
+                first_delta.append(time.perf_counter() - started)
+            on_delta(delta)
+        
+        def record_discarded(result, call=call, model_name=model_name):
+            # The slower of two hedged requests was still answered, and billed
+            discarded_text, usage = result
+            record_call(dict(call, outcome="hedge_lost", queue_wait=None,
+                             **count_usage(messages, discarded_text, usage, model_name)))
+        
+        call_info = {"call_type": call_type, "on_discard": record_discarded}
+        try:
+            text = get_backend_completion(
+                api_type, messages, forward_delta if on_delta is not None else None, json_schema, call_info, params
+            )
+        except CompletionCancelled:
+            print("Completion stream abandoned")
+            record_call(dict(call, outcome="cancelled", latency=time.perf_counter() - started,
+                             ttft=first_delta[0] if first_delta else None))
+            return ""
+        
+        failed = is_error_response(text)
+        call.update(count_usage(messages, "" if failed else text, call_info.get("usage"), model_name))
+        if failed and not call_info.get("usage"):
+            call["prompt_tokens"] = 0  # Nothing was billed for a request that never got an answer
+        record_call(dict(call, outcome="error" if failed else "ok", latency=time.perf_counter() - started,
+                         ttft=first_delta[0] if first_delta else None))
+        
+        if not failed:
+            # Streamed calls are judged by time to first token, not by answer length; the
+            # router keeps the two kinds of latency apart
+            latency = first_delta[0] if first_delta else time.perf_counter() - started
+            backend_router.record(api_type, True, latency, streaming=on_delta is not None)
+            if cache_key is not None:
+                cache.put(cache_key, model_name, text)
+            return text
+        
+        backend_router.record(api_type, False)
+        # Text already shown cannot be replaced by another backend's answer
+        if first_delta or index + 1 >= len(backends):
+            return text
+        backend_router.record_failover(api_type, backends[index + 1])
+    return text
+
+def get_backend_completion(api_type, messages, on_delta=None, json_schema=None, call_info=None, params=None):
+    """Get completion from one API backend with improved error handling and encoding fixes
+    
+    params are the generation parameters (max_tokens, stop, ...) from the call's profile.
+    call_info may name the "call_type" (for the hedging latency window) and an "on_discard"
+    callback for the (text, usage) of a losing hedged request; the token usage reported
+    by the server is stored in call_info["usage"]."""
+    try:
+        # Use the appropriate model and API key based on API type
+        model_name = get_model_name(api_type)
+        api_key = get_backend_api_key(api_type)
+        if not api_key:
+            return get_missing_key_message(api_type)
+        
+        # Try using requests library directly instead of OpenAI client if there are encoding issues
+        try:
+            # Reuse the pooled client for these credentials. Kept in a local variable:
+            # concurrent calls may use other backends' clients
+            api_client = get_api_client(api_type, api_key, get_base_url(api_type))
+            print(f"Making API request using {api_type} API with model: {model_name}")
+            
+            # Structured output where the model supports it; otherwise the prompt asks for JSON
+            extra_args = dict(params or {"max_tokens": MAX_TOKENS})
+            response_format = response_format_for_model(model_name, json_schema) if json_schema else None
+            if response_format:
+                extra_args["response_format"] = response_format
+            if on_delta is not None and api_type != "local":
+                # Ask for a final usage chunk (local servers may reject the option)
+                extra_args["stream_options"] = {"include_usage": True}
+            info = call_info if call_info is not None else {}
+            
+            def send(timeout):
+                import httpx
+                
+                # Make the API call with the OpenAI client
+                chunks = []
+                try:
+                    response = api_client.chat.completions.create(
+                        model=model_name,
+                        messages=messages,
+                        stream=on_delta is not None,
+                        timeout=httpx.Timeout(timeout[1], connect=timeout[0]),
+                        **extra_args
+                    )
+                    if on_delta is None:
+                        return response.choices[0].message.content, response.usage
+                    
+                    # Streaming mode: forward each delta as soon as it arrives
+                    usage = None
+                    for chunk in response:
+                        if getattr(chunk, "usage", None):
+                            usage = chunk.usage
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            chunks.append(delta)
+                            on_delta(delta)
+                    return "".join(chunks), usage
+                except Exception as e:
+                    # Tokens already shown cannot be taken back, so this attempt must not be retried
+                    e.partial_output = bool(chunks)
+                    raise
+            
+            # Each attempt returns its own usage, since two hedged attempts can run at once
+            text, info["usage"] = get_backend_guard(api_type).call(
+                send, streaming=on_delta is not None, call_type=info.get("call_type"), on_discard=info.get("on_discard")
+            )
+            return text
+        except UnicodeEncodeError as e:
+            # Fall back to direct requests approach if there's an encoding error
+            print(f"Unicode encoding error with OpenAI client: {e}. Trying direct requests approach.")
+            return get_completion_via_requests(api_type, messages, on_delta, json_schema, call_info, params)
+    except CompletionCancelled:
+        raise
+    except CircuitOpenError as e:
+        print(f"Request not sent: {str(e)}")
+        return f"Sorry, there was an error communicating with the {api_type} API service. It failed several times in a row, so requests are paused for a short while. Please try again in a moment."
+    except Exception as e:
+        # Return a user-friendly error message
+        error_msg = f"Error: {str(e)}\n\n{traceback.format_exc()}"
+        print(error_msg)  # Print to console for debugging
+        return f"Sorry, there was an error communicating with the {api_type} API service. Please check your API key and internet connection.\n\nError details: {str(e)}"
+
+def get_completion_via_requests(api_type, messages, on_delta=None, json_schema=None, call_info=None, params=None):
+    """Alternative implementation using direct requests instead of the OpenAI client"""
+    try:
+        # Use the appropriate model and API key based on API type
+        model_name = get_model_name(api_type)
+        api_key = get_backend_api_key(api_type)
+        if not api_key:
+            return get_missing_key_message(api_type)
+        
+        # Prepare the request
+        url = model_profiles.chat_completions_url(get_base_url(api_type))
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        }
+        
+        data = {
+            "model": model_name,
+            "messages": messages
+        }
+        data.update(params or {"max_tokens": MAX_TOKENS})
+        if on_delta is not None:
+            data["stream"] = True
+            if api_type != "local":
+                data["stream_options"] = {"include_usage": True}
+        response_format = response_format_for_model(model_name, json_schema) if json_schema else None
+        if response_format:
+            data["response_format"] = response_format
+        
+        print(f"Making API request using {api_type} API with model: {model_name} (direct request method)")
+        info = call_info if call_info is not None else {}
+        
+        def send(timeout):
+            # Make the request over the pooled keep-alive session
+            response = get_http_session().post(
+                url, json=data, headers=headers, stream=on_delta is not None, timeout=timeout
+            )
+            
+            # Check response status
+            if response.status_code in RETRY_STATUSES:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                response.close()
+                raise RetryableError(
+                    f"API request failed with status code {response.status_code}",
+                    response.status_code, retry_after
+                )
+            if response.status_code != 200:
+                return f"Error: API request failed with status code {response.status_code}. Response: {response.text}", None
+            
+            if on_delta is None:
+                response_json = response.json()
+                return response_json["choices"][0]["message"]["content"], response_json.get("usage")
+            
+            # Streaming mode: parse the server-sent events line by line
+            response.encoding = "utf-8"
+            chunks = []
+            usage = None
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    payload = line[len("data:"):].strip()
+                    if payload == "[DONE]":
+                        break
+                    event = json.loads(payload)
+                    if event.get("usage"):
+                        usage = event["usage"]
+                    choices = event.get("choices") or []
+                    delta = choices[0].get("delta", {}).get("content") if choices else None
+                    if delta:
+                        chunks.append(delta)
+                        on_delta(delta)
+            except Exception as e:
+                # Tokens already shown cannot be taken back, so this attempt must not be retried
+                e.partial_output = bool(chunks)
+                raise
+            finally:
+                response.close()
+            return "".join(chunks), usage
+        
+        text, info["usage"] = get_backend_guard(api_type).call(
+            send, streaming=on_delta is not None, call_type=info.get("call_type"), on_discard=info.get("on_discard")
+        )
+        return text
+            
+    except CompletionCancelled:
+        raise
+    except CircuitOpenError as e:
+        print(f"Request not sent: {str(e)}")
+        return f"Sorry, there was an error communicating with the {api_type} API service. It failed several times in a row, so requests are paused for a short while. Please try again in a moment."
+    except Exception as e:
+        # Return a user-friendly error message
+        error_msg = f"Error: {str(e)}\n\n{traceback.format_exc()}"
+        print(error_msg)  # Print to console for debugging
+        return f"Sorry, there was an error communicating with the {api_type} API service. Please check your API key and internet connection.\n\nError details: {str(e)}"
+
+
+def get_engine_stats():
+    """Counters from the routing, retry, cache and connection layers"""
+    stats = {"routing": backend_router.get_stats(), "connections": get_connection_stats(),
+             "calls": call_metrics.get_summary()}
+    stats["backends"] = {name: guard.get_stats() for name, guard in list(backend_guards.items())}
+    if completion_cache is not None:
+        stats["completion_cache"] = completion_cache.get_stats()
+    if question_bank is not None:
+        stats["question_bank"] = question_bank.stats()
+    return stats
+
+def close():
+    """Close the on-disk stores; called once when the process exits"""
+    if question_bank is not None:
+        question_bank.close()
+    if completion_cache is not None:
+        completion_cache.close()
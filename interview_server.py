@@ -0,0 +1,360 @@
+"""Multi-session interview server on asyncio (HTTP + WebSocket, standard library only).
+
+Each client gets its own InterviewSession with isolated state; the sessions share the
+engine's pooled clients, caches and question bank. Blocking engine calls run on a
+thread pool so the event loop keeps serving other sessions.
+
+    python interview_server.py [--host 127.0.0.1] [--port 8080]
+
+HTTP endpoints (JSON bodies):
+    POST   /sessions                 {"career": ..., "history": bool, "fan_out": bool}
+    GET    /sessions                 list of session states
+    GET    /sessions/<id>            session state
+    POST   /sessions/<id>/answer     {"answer": ...} -> feedback and next question
+    POST   /sessions/<id>/skip       -> a different question
+    DELETE /sessions/<id>
+    GET    /stats                    server and engine counters
+    GET    /metrics                  completion call metrics in the Prometheus text format
+
+WebSocket: GET /sessions/<id>/ws, then send {"type": "answer", "answer": ...} or
+{"type": "skip"}. Feedback fields are pushed as {"type": "field", ...} messages as soon
+as they are parsed, followed by {"type": "feedback", ...}.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import interview_engine
+import prompt_templates
+import interview_session
+from interview_session import InterviewSession
+
+MAX_SESSIONS = 500
+SESSION_IDLE_TIMEOUT = 30 * 60  # Seconds before an idle session is dropped
+SWEEP_INTERVAL = 60
+MAX_BODY_BYTES = 64 * 1024
+ENGINE_WORKERS = 32
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 429: "Too Many Requests", 500: "Internal Server Error",
+               502: "Bad Gateway"}
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class InterviewServer:
+    """Hosts many concurrent interview sessions over HTTP and WebSocket"""
+
+    def __init__(self, max_sessions=MAX_SESSIONS, idle_timeout=SESSION_IDLE_TIMEOUT):
+        self.sessions = {}
+        self.pending_sessions = 0  # Slots reserved by sessions still waiting for their first question
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.executor = ThreadPoolExecutor(max_workers=ENGINE_WORKERS, thread_name_prefix="session")
+        # Every engine worker may be running a fan-out evaluation
+        interview_session.set_concurrent_evaluations(ENGINE_WORKERS)
+        self.stats = {"requests": 0, "errors": 0, "sessions_created": 0, "sessions_expired": 0,
+                      "websocket_connections": 0}
+
+    async def run_blocking(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def get_session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HttpError(404, "Unknown session")
+        return session
+
+    async def sweep_sessions(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            cutoff = time.time() - self.idle_timeout
+            for session_id, session in list(self.sessions.items()):
+                if session.last_active < cutoff and not session.lock.locked():
+                    del self.sessions[session_id]
+                    self.stats["sessions_expired"] += 1
+
+    # Engine operations shared by HTTP and WebSocket clients
+
+    async def create_session(self, body):
+        career = str(body.get("career", "")).strip()
+        if not career:
+            raise HttpError(400, "career is required")
+        # Reserve the slot before waiting, so concurrent requests cannot all pass the cap
+        if len(self.sessions) + self.pending_sessions >= self.max_sessions:
+            raise HttpError(429, "Too many active sessions")
+        self.pending_sessions += 1
+        try:
+            session = InterviewSession(career, history=body.get("history"), fan_out=body.get("fan_out"))
+            question = await self.run_blocking(session.next_question)
+            if interview_engine.is_error_response(question):
+                raise HttpError(502, question)
+            self.sessions[session.session_id] = session
+        finally:
+            self.pending_sessions -= 1
+        self.stats["sessions_created"] += 1
+        return {"session": session.state(), "question": question}
+
+    async def answer(self, session, answer, on_field=None):
+        answer = str(answer or "").strip()
+        if not answer:
+            raise HttpError(400, "answer is required")
+        feedback = await self.run_blocking(session.evaluate, answer, on_field)
+        return {"feedback": feedback, "next_question": session.current_question, "session": session.state()}
+
+    async def skip(self, session):
+        question = await self.run_blocking(session.next_question)
+        if interview_engine.is_error_response(question):
+            raise HttpError(502, question)
+        return {"question": question, "session": session.state()}
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["active_sessions"] = len(self.sessions)
+        stats["engine"] = interview_engine.get_engine_stats()
+        return stats
+
+    # HTTP
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except HttpError as e:
+                    # The unread body leaves the connection unusable, so answer and close it
+                    self.stats["errors"] += 1
+                    await self.write_response(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                self.stats["requests"] += 1
+
+                parts = [part for part in path.split("?")[0].split("/") if part]
+                if (method == "GET" and len(parts) == 3 and parts[0] == "sessions" and parts[2] == "ws"
+                        and headers.get("upgrade", "").lower() == "websocket"):
+                    await self.handle_websocket(parts[1], headers, reader, writer)
+                    break
+
+                try:
+                    status, payload = await self.route(method, parts, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    print(f"Error handling {method} {path}: {repr(e)}")
+                    status, payload = 500, {"error": str(e)}
+                if status >= 400:
+                    self.stats["errors"] += 1
+                await self.write_response(writer, status, payload, keep_alive=headers.get("connection") != "close")
+                if headers.get("connection") == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return None
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HttpError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, f"Request body is larger than {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path, headers, body
+
+    async def write_response(self, writer, status, payload, keep_alive=True):
+        if isinstance(payload, str):
+            body = payload.encode("utf-8")
+            content_type = "text/plain; version=0.0.4"
+        else:
+            body = json.dumps(payload).encode("utf-8")
+            content_type = "application/json"
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    def parse_body(self, body):
+        if not body:
+            return {}
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise HttpError(400, "Body must be JSON")
+        if not isinstance(data, dict):
+            raise HttpError(400, "Body must be a JSON object")
+        return data
+
+    async def route(self, method, parts, body):
+        if parts == ["stats"] and method == "GET":
+            return 200, self.get_stats()
+        if parts == ["metrics"] and method == "GET":
+            return 200, interview_engine.call_metrics.format_prometheus()
+        if parts == ["sessions"]:
+            if method == "POST":
+                return 201, await self.create_session(self.parse_body(body))
+            if method == "GET":
+                return 200, {"sessions": [session.state() for session in self.sessions.values()]}
+        if len(parts) >= 2 and parts[0] == "sessions":
+            session = self.get_session(parts[1])
+            if len(parts) == 2 and method == "GET":
+                return 200, session.state()
+            if len(parts) == 2 and method == "DELETE":
+                del self.sessions[session.session_id]
+                return 200, {"deleted": session.session_id}
+            if parts[2:] == ["answer"] and method == "POST":
+                return 200, await self.answer(session, self.parse_body(body).get("answer"))
+            if parts[2:] == ["skip"] and method == "POST":
+                return 200, await self.skip(session)
+        raise HttpError(404, "Not found")
+
+    # WebSocket
+
+    async def handle_websocket(self, session_id, headers, reader, writer):
+        session = self.sessions.get(session_id)
+        key = headers.get("sec-websocket-key")
+        if session is None or not key:
+            await self.write_response(writer, 404 if session is None else 400, {"error": "Cannot open WebSocket"},
+                                      keep_alive=False)
+            return
+
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+        self.stats["websocket_connections"] += 1
+        loop = asyncio.get_running_loop()
+        send_lock = asyncio.Lock()
+
+        async def send(message):
+            # Fields pushed from engine threads and replies must not interleave their writes
+            async with send_lock:
+                await self.write_frame(writer, 0x1, json.dumps(message).encode("utf-8"))
+
+        def on_field(name, value):
+            # Called on an engine thread; hand the field to the event loop
+            asyncio.run_coroutine_threadsafe(send({"type": "field", "name": name, "value": value}), loop)
+
+        await send({"type": "session", "session": session.state()})
+        while True:
+            frame = await self.read_frame(reader)
+            if frame is None:
+                break
+            opcode, payload = frame
+            if opcode == 0x8:  # Close
+                async with send_lock:
+                    await self.write_frame(writer, 0x8, payload[:2])
+                break
+            if opcode == 0x9:  # Ping
+                async with send_lock:
+                    await self.write_frame(writer, 0xA, payload)
+                continue
+            if opcode != 0x1:
+                continue
+
+            try:
+                message = json.loads(payload.decode("utf-8"))
+                if not isinstance(message, dict):
+                    raise HttpError(400, "Messages must be JSON objects")
+                if message.get("type") == "answer":
+                    reply = await self.answer(session, message.get("answer"), on_field)
+                    await send({"type": "feedback", **reply})
+                elif message.get("type") == "skip":
+                    await send({"type": "question", **(await self.skip(session))})
+                else:
+                    await send({"type": "error", "error": "Unknown message type"})
+            except HttpError as e:
+                await send({"type": "error", "error": str(e)})
+            except ValueError:
+                await send({"type": "error", "error": "Messages must be JSON"})
+
+    async def read_frame(self, reader):
+        try:
+            first, second = await reader.readexactly(2)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", await reader.readexactly(8))[0]
+        if length > MAX_BODY_BYTES:
+            return None
+        mask = await reader.readexactly(4) if second & 0x80 else None
+        payload = await reader.readexactly(length)
+        if mask:
+            payload = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+        return opcode, payload
+
+    async def write_frame(self, writer, opcode, payload):
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        elif len(payload) < 65536:
+            header += bytes([126]) + struct.pack("!H", len(payload))
+        else:
+            header += bytes([127]) + struct.pack("!Q", len(payload))
+        writer.write(header + payload)
+        await writer.drain()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Interview server listening on http://{host}:{port}")
+        asyncio.get_running_loop().create_task(self.sweep_sessions())
+        async with server:
+            await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve many concurrent mock interviews over HTTP/WebSocket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    args = parser.parse_args()
+
+    server = InterviewServer(max_sessions=args.max_sessions)
+    prompt_templates.get_registry()
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Server stats: {server.get_stats()}")
+        interview_engine.close()
+
+if __name__ == "__main__":
+    main()
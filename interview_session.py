@@ -0,0 +1,262 @@
+"""UI-independent interview engine: one InterviewSession per candidate.
+
+A session owns everything about one mock interview: the job title, the questions asked
+so far, the conversation sent as context in history mode and the feedback for every
+round. It builds the question and feedback prompts and, through interview_engine, runs
+the completions. Sessions share nothing but the engine's pooled clients, caches and
+question bank, so any number of them can run side by side (the Tk app drives one, the
+server hosts many).
+
+The blocking methods (next_question, evaluate) are meant to run on worker threads; their
+callbacks are called on those threads too, so a UI has to hand them to its own thread.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import settings_cache
+from conversation import Conversation, DEFAULT_TOKEN_BUDGET
+from interview_engine import call_metrics, get_completion, get_model_name, get_question_bank, is_error_response
+from generation_profiles import FEEDBACK_PART_MAX_TOKENS
+from prompt_templates import render_prompt
+from structured_feedback import (FEEDBACK_FORMAT_INSTRUCTIONS, FEEDBACK_PARTS, FEEDBACK_SCHEMA, FIELD_ORDER,
+                                 FeedbackStreamParser, build_part_schema, format_feedback, format_field,
+                                 format_instructions, get_follow_up, parse_feedback_part, parse_streamed_feedback)
+
+# Shared by every session for fan-out feedback requests. The follow-up part unblocks the
+# next round, so it has a pool of its own and never queues behind other sessions' longer parts.
+DEFAULT_CONCURRENT_EVALUATIONS = 4
+part_executors = {}  # "follow_up" / "other" -> ThreadPoolExecutor
+part_executors_lock = threading.Lock()
+concurrent_evaluations = DEFAULT_CONCURRENT_EVALUATIONS
+
+def set_concurrent_evaluations(count):
+    """Size the fan-out pools for this many evaluations at once (call before the first one)"""
+    global concurrent_evaluations
+    concurrent_evaluations = max(1, int(count))
+
+def get_part_executor(part):
+    """Return the pool for a fan-out part, creating it on first use"""
+    pool = "follow_up" if part == "follow_up" else "other"
+    with part_executors_lock:
+        if pool not in part_executors:
+            # Every evaluation sends one follow-up part and the rest to the other pool
+            workers = concurrent_evaluations * (1 if pool == "follow_up" else len(FEEDBACK_PARTS) - 1)
+            part_executors[pool] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"feedback-{pool}")
+        return part_executors[pool]
+
+def is_history_mode():
+    """Whether interview rounds are sent as a running conversation instead of one-off prompts"""
+    return bool(settings_cache.get_setting("conversation_history", True))
+
+def is_feedback_fan_out():
+    """Whether feedback is requested as several smaller concurrent requests instead of one"""
+    return bool(settings_cache.get_setting("feedback_fan_out", False))
+
+def get_token_budget():
+    try:
+        return int(settings_cache.get_setting("context_token_budget", DEFAULT_TOKEN_BUDGET))
+    except (TypeError, ValueError):
+        return DEFAULT_TOKEN_BUDGET
+
+def build_question_prompt(career, avoid_questions=None):
+    """Build the prompt that asks for one interview question for this job title"""
+    avoid = ""
+    if avoid_questions:
+        avoid = "\nAsk a different question from these, which have already been asked:\n"
+        avoid += "\n".join(f"- {question}" for question in avoid_questions[-10:])
+    return render_prompt("question", career=career, avoid=avoid)
+
+def build_interview_system_prompt(career):
+    """Instructions for conversation-history mode, sent once at the top of the transcript"""
+    return render_prompt("interview_system", career=career)
+
+def build_feedback_prompt(career, question, answer, format_text=FEEDBACK_FORMAT_INSTRUCTIONS):
+    """One-off prompt asking for an evaluation of a single answer"""
+    return render_prompt("feedback", format_instructions=format_text, career=career, question=question, answer=answer)
+
+class InterviewSession:
+    """State and logic of one mock interview, independent of any UI"""
+
+    def __init__(self, career, history=None, fan_out=None, token_budget=None, session_id=None):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.career = career.strip()
+        self.history = is_history_mode() if history is None else history
+        self.fan_out = is_feedback_fan_out() if fan_out is None else fan_out
+        self.token_budget = token_budget or get_token_budget()
+        self.conversation = None  # Only kept in history mode
+        self.current_question = None
+        self.current_answer = None
+        self.asked_questions = []
+        self.rounds = []  # One dict per answered question
+        self.created = time.time()
+        self.last_active = self.created
+        self.lock = threading.Lock()  # One question or evaluation at a time
+
+    def touch(self):
+        self.last_active = time.time()
+
+    # Questions
+
+    def question_prompt(self):
+        return build_question_prompt(self.career, self.asked_questions)
+
+    def use_question(self, question, record_turn=True):
+        """Make question the one the candidate answers next
+
+        The first question starts the conversation in history mode. A follow-up question is
+        already part of the feedback turn, so it is not recorded again (record_turn=False)."""
+        self.touch()
+        self.current_question = question
+        self.current_answer = None
+        self.asked_questions.append(question)
+        if not self.history:
+            return
+        if self.conversation is None:
+            self.conversation = Conversation(build_interview_system_prompt(self.career), self.token_budget)
+        if record_turn:
+            self.conversation.add_question(question)
+
+    def draw_banked_question(self, exclude=()):
+        """A stored question for this job title that was not asked in this session (or excluded), or None"""
+        bank = get_question_bank()
+        if bank is None:
+            return None
+        model = get_model_name()
+        for _ in range(3):
+            question = bank.draw(self.career, model)
+            if question is None:
+                return None
+            if question not in self.asked_questions and question not in exclude:
+                return question
+        return None
+
+    def next_question(self, on_delta=None, queued_at=None, use_bank=True):
+        """Get a new question (banked if possible) and make it current; returns the question or an error
+
+        Pass use_bank=False when the caller has already tried the bank, so a miss is only counted once."""
+        with self.lock:
+            question = self.draw_banked_question() if use_bank else None
+            if question is None:
+                question = get_completion(self.question_prompt(), on_delta=on_delta, call_type="question",
+                                          session_id=self.session_id, queued_at=queued_at).strip()
+                if not question or is_error_response(question):
+                    # Failed, or cancelled mid-stream
+                    return question
+            self.use_question(question)
+            return question
+
+    # Feedback
+
+    def begin_answer(self, answer):
+        """Record the candidate's answer to the current question"""
+        self.touch()
+        self.current_answer = answer
+        if self.conversation is not None:
+            self.conversation.add_answer(answer)
+
+    def feedback_prompt(self, fields=FIELD_ORDER):
+        """Prompt (text or chat messages) asking for the given feedback fields on the current answer"""
+        if self.conversation is None:
+            return build_feedback_prompt(self.career, self.current_question, self.current_answer,
+                                         format_instructions(fields))
+        messages = self.conversation.messages()
+        if list(fields) != FIELD_ORDER:
+            # The system prompt asks for every field; narrow it down for this request
+            messages = messages + [{"role": "system", "content": "For this reply only. " + format_instructions(fields)}]
+        return messages
+
+    def finish_feedback(self, feedback, feedback_text=None):
+        """Store the feedback for the current answer and move on to its follow-up question
+
+        feedback_text is what goes into the conversation (None after a failed request)."""
+        follow_up = get_follow_up(feedback)
+        if self.conversation is not None:
+            if not feedback_text:
+                # Keep the turns alternating, and the follow-up asked next in the context
+                feedback_text = "(No feedback: the evaluation request failed.)\n" + format_field("follow_up", follow_up)
+            self.conversation.add_feedback(feedback_text)
+        self.rounds.append({"question": self.current_question, "answer": self.current_answer, "feedback": feedback})
+        self.use_question(follow_up, record_turn=False)
+        return follow_up
+
+    def evaluate(self, answer, on_field=None, on_delta=None, queued_at=None):
+        """Evaluate an answer to the current question, calling on_field(name, value) as fields arrive
+
+        on_delta receives the raw streamed text (not in fan-out mode), for showing replies
+        from models that answer in plain text instead of JSON. Returns the feedback dict;
+        its "error" key is set if a request failed. The session then moves on to the
+        follow-up question, unless another question was put in place while it ran."""
+        on_field = on_field or (lambda name, value: None)
+        with self.lock:
+            question = self.current_question
+            self.begin_answer(answer)
+            if self.fan_out:
+                feedback, failed = self.evaluate_in_parts(on_field, queued_at)
+            else:
+                feedback, failed = self.evaluate_at_once(on_field, on_delta, queued_at)
+            if self.current_question is not question:
+                # The question was skipped while its answer was being evaluated
+                return feedback
+            self.finish_feedback(feedback, None if failed else format_feedback(feedback))
+            return feedback
+
+    def evaluate_at_once(self, on_field, on_delta=None, queued_at=None):
+        # A single streamed request, parsed field by field as it arrives
+        parser = FeedbackStreamParser(on_field)
+
+        def feed(delta):
+            if on_delta is not None:
+                on_delta(delta)
+            parser.feed(delta)
+
+        text = get_completion(self.feedback_prompt(), on_delta=feed, json_schema=FEEDBACK_SCHEMA,
+                              session_id=self.session_id, queued_at=queued_at)
+        if is_error_response(text):
+            return {"error": text}, True
+        feedback = parse_streamed_feedback(text, parser.fields)
+        for name, value in feedback.items():
+            if name not in parser.fields:
+                on_field(name, value)
+        return feedback, False
+
+    def evaluate_in_parts(self, on_field, queued_at=None):
+        # Concurrent smaller requests, each reported as soon as it returns
+        def request_part(part, queued_at):
+            text = get_completion(self.feedback_prompt(FEEDBACK_PARTS[part]), json_schema=build_part_schema(part),
+                                  session_id=self.session_id, queued_at=queued_at,
+                                  max_tokens=FEEDBACK_PART_MAX_TOKENS[part])
+            if is_error_response(text):
+                return part, None, text
+            fields = parse_feedback_part(part, text)
+            for name, value in fields.items():
+                on_field(name, value)
+            return part, fields, None
+
+        feedback = {}
+        errors = []
+        futures = [get_part_executor(part).submit(request_part, part, time.perf_counter()) for part in FEEDBACK_PARTS]
+        for future in futures:
+            part, fields, error = future.result()
+            if error:
+                errors.append(error)
+            else:
+                feedback.update(fields)
+        if errors:
+            feedback["error"] = errors[0]
+        return feedback, bool(errors)
+
+    def state(self):
+        """Summary of the session for clients"""
+        return {
+            "session_id": self.session_id,
+            "career": self.career,
+            "current_question": self.current_question,
+            "rounds": len(self.rounds),
+            "history": self.history,
+            "fan_out": self.fan_out,
+            "estimated_tokens": self.conversation.estimated_tokens() if self.conversation else 0,
+            "usage": call_metrics.get_session_usage(self.session_id),
+            "last_active": self.last_active,
+        }
@@ -1,33 +1,63 @@
+import time
+startup_started = time.perf_counter()  # Reference point for the startup trace
+
 import os
 import sys
 import string
-from openai import OpenAI
 import customtkinter as ctk
-import time
-import tkinter.font as tkFont
-from tkinter import *
-import speech_recognition as sr
-import app_settings
+import settings_cache
+from conversation import DEFAULT_TOKEN_BUDGET
+from question_bank import build_question_list_prompt, normalize_job_title, parse_question_list
+from transcript import TranscriptView
+from ui_bus import UIBus
+import model_profiles
+import interview_engine
+import prompt_templates
+from interview_engine import (API_TYPES, CompletionCancelled, clean_api_key, get_completion,
+                              get_completion_cache, get_http_session, get_model_name, get_question_bank,
+                              initialize_openai_client, is_auto_routing, is_cache_enabled, is_error_response)
+from interview_session import InterviewSession, build_question_prompt, is_feedback_fan_out, is_history_mode
+from structured_feedback import format_field, get_follow_up
+import functools
 import json
 import traceback
 import threading
-import re
-import time
-import app_settings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 # Add the directory containing app_settings.py to the Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
+STARTUP_TRACE_FILE = os.path.join(current_dir, "startup_trace.jsonl")
+startup_marks = {}
+
+def mark_startup(phase):
+    """Record how long after process start a startup phase completed"""
+    elapsed_ms = round((time.perf_counter() - startup_started) * 1000, 1)
+    startup_marks[phase] = elapsed_ms
+    print(f"[startup] {phase}: {elapsed_ms} ms")
+    
+    # Append one line per launch once both the window and the API client are ready
+    if "first_paint" in startup_marks and "client_init" in startup_marks:
+        try:
+            with open(STARTUP_TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"time": datetime.now().isoformat(timespec="seconds"), **startup_marks}) + "\n")
+        except Exception as e:
+            print(f"Error writing startup trace: {str(e)}")
+
+mark_startup("imports")
+
 # Initialize global variables
-client = None
 result = None
+transcript_view = None  # Transcript model that owns the contents of the result textbox
 careerDropdown = None
 api_type_var = None
 api_type_status_label = None
 openai_frame = None 
 mini4o_frame = None
+local_frame = None
 api_key_entry = None
 api_status_label = None
 mini4o_api_key_entry = None
@@ -37,262 +67,291 @@ is_recording = False
 recognizer = None
 mic_button = None
 user_response_entry = None
-recording_indicator_id = None  # For the blinking recording indicator
-is_blinking = False  # Blinking state
+recording_status = None  # Recording indicator and level meter next to the mic button
+# Background completion dispatcher state
+completion_executor = None
+priority_executor = None  # Kept free of background work for requests the user is waiting on
+completion_generation = 0  # Bumped on Reset so stale answers are dropped
+pending_completions = set()
+# Updates from worker threads are queued here and applied by the main loop ~30 times a second
+ui_bus = UIBus(tick_ms=33)
+# The interview shown in the window (questions, answers and context for the API)
+interview_session = None
+# Speculatively generated questions for the current job title
+PREFETCH_QUEUE_SIZE = 2
+prefetch_career = None
+prefetch_epoch = 0  # Bumped when the job title changes so late results are dropped
+prefetch_in_flight = 0
+prefetched_questions = []
+# On-disk question bank, filled in bulk per job title
+BANK_FILL_SIZE = 10
+BANK_LOW_WATER = 3  # Refill when fewer unserved questions than this remain
+bank_fills_in_progress = set()
+speech_backend_chain = None  # Configured speech backends, rebuilt when the settings change
+recording_engine = None
+recording_entry = None  # Response entry the current recording writes into
+recording_base_text = ""  # Text that was in the entry before the recording started
 
-def clean_api_key(api_key):
-    """Clean the API key to ensure it only contains valid ASCII characters"""
-    if not api_key:
-        return ""
+def initialize_client_in_background():
+    """Build the API client and compile the prompt templates off the main thread once the window is up"""
+    def worker():
+        try:
+            initialize_openai_client()
+        except Exception as e:
+            print(f"Error initializing API client: {str(e)}")
+        try:
+            prompt_templates.get_registry()
+        except Exception as e:
+            print(f"Error loading prompt templates: {str(e)}")
+        run_on_ui(lambda: mark_startup("client_init"))
+    
+    threading.Thread(target=worker, name="client-init", daemon=True).start()
+
+def run_on_ui(callback):
+    """Run callback on the Tk main thread at the next UI bus tick"""
+    ui_bus.post("call", callback)
+
+def register_ui_handlers():
+    """Tell the UI bus how to apply and coalesce each kind of update from worker threads"""
+    def set_entry_text(payload):
+        entry, text = payload
+        # Skip if the entry was replaced by the next question's UI in the meantime
+        if entry and entry.winfo_exists():
+            entry.delete(0, "end")
+            entry.insert(0, text)
+    
+    def append_to_transcript(text):
+        if transcript_view:
+            transcript_view.append(text)
+            result.see("end")
     
-    # Strip whitespace and control characters
-    cleaned_key = api_key.strip()
+    def set_level(payload):
+        status, level = payload
+        if status and status.winfo_exists():
+            status.set_level(level)
     
-    # Remove any non-ASCII characters
-    cleaned_key = ''.join(char for char in cleaned_key if ord(char) < 128)
+    def deliver_stream(payload):
+        callback, text = payload
+        callback(text)
     
-    return cleaned_key
+    ui_bus.register("call", lambda callback: callback())
+    ui_bus.register("stream", deliver_stream, merge=lambda old, new: (old[0], old[1] + new[1]))
+    ui_bus.register("entry_text", set_entry_text, merge=lambda old, new: new)
+    ui_bus.register("append", append_to_transcript, merge=lambda old, new: old + new)
+    ui_bus.register("level", set_level, merge=lambda old, new: new)
 
-def initialize_openai_client():
-    """Initialize or reinitialize the OpenAI client with current settings"""
-    global client
+def get_completion_executor(priority=False):
+    """Return the shared worker pool used for API requests, creating it on first use
+    
+    The priority pool never runs prefetches or question bank fills, so its requests do not
+    queue behind background work."""
+    global completion_executor, priority_executor
+    
+    if priority:
+        if priority_executor is None:
+            priority_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="priority")
+        return priority_executor
+    if completion_executor is None:
+        completion_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="completion")
+    return completion_executor
+
+def submit_session_call(method, on_result, on_delta=None, on_field=None, priority=True):
+    """Run a blocking InterviewSession method on a worker thread and hand its result to on_result on the Tk main thread.
+    
+    method is called with queued_at, plus on_delta and on_field when they are given; both
+    callbacks then run on the main thread (deltas batched once per UI bus tick). Results of
+    calls issued before the last cancel_pending_completions() call are dropped, so a Reset
+    never lets a stale answer land in the result textbox."""
+    generation = completion_generation
+    queued_at = time.perf_counter()
     
-    api_type = app_settings.get_api_type()
-    if api_type == "openai":
-        api_key = app_settings.get_api_key()
-        api_key = clean_api_key(api_key)
-        if not api_key:
-            print("Warning: OpenAI API key is not set")
+    def deliver_delta(text):
+        if generation == completion_generation:
+            on_delta(text)
+    
+    def post_delta(delta):
+        # Runs on the worker thread; abort the stream once it has gone stale
+        if generation != completion_generation:
+            raise CompletionCancelled()
+        ui_bus.post("stream", (deliver_delta, delta), key=deliver_delta)
+    
+    def post_field(name, value):
+        if generation == completion_generation:
+            run_on_ui(lambda: deliver(lambda: on_field(name, value)))
+    
+    def deliver(callback):
+        if generation != completion_generation:
+            print("Dropping stale completion result")
+            return
+        callback()
+    
+    def worker():
+        # Skip the call entirely if it was cancelled while still queued
+        if generation != completion_generation:
             return None
-        print(f"Using OpenAI API with key ending in: {api_key[-4:] if len(api_key) > 4 else '****'}")
-        client = OpenAI(api_key=api_key)
-    else:  # mini4o
-        api_key = app_settings.get_mini4o_api_key()
-        api_key = clean_api_key(api_key)
-        if not api_key:
-            print("Warning: Mini4o API key is not set")
+        callbacks = {}
+        if on_delta is not None:
+            callbacks["on_delta"] = post_delta
+        if on_field is not None:
+            callbacks["on_field"] = post_field
+        try:
+            value = method(queued_at=queued_at, **callbacks)
+        except CompletionCancelled:
             return None
-        print(f"Using Mini4o API with key ending in: {api_key[-4:] if len(api_key) > 4 else '****'}")
-        client = OpenAI(api_key=api_key)
+        # Queued behind the stream events, so all deltas are shown before the result
+        run_on_ui(lambda: deliver(lambda: on_result(value)))
+        return value
     
-    return client
+    future = get_completion_executor(priority).submit(worker)
+    pending_completions.add(future)
+    future.add_done_callback(pending_completions.discard)
+    return future
 
-# Initialize the client
-client = initialize_openai_client()
+def cancel_pending_completions():
+    """Cancel queued completion requests and make in-flight ones discard their results"""
+    global completion_generation
+    
+    completion_generation += 1
+    for future in list(pending_completions):
+        future.cancel()
 
-def get_completion(prompt, user_input=None):
-    """Get completion from the selected API with improved error handling and encoding fixes"""
-    global client
+class RecordingStatus(ctk.CTkFrame):
+    """Recording indicator with a live input level meter
     
-    try:
-        # Get the current API type
-        api_type = app_settings.get_api_type()
-        
-        messages = [{"role": "system", "content": prompt}]
-        if user_input:
-            messages.append({"role": "user", "content": user_input})
-        
-        # Use the appropriate model based on API type
-        if api_type == "mini4o":
-            model_name = "gpt-4o-mini"
-            api_key = app_settings.get_mini4o_api_key()
-            if not api_key:
-                return "Error: Mini4o API key is not set. Please go to Settings and configure your API key."
-            
-            # Clean the API key
-            api_key = clean_api_key(api_key)
-            
-            # Update the stored API key with the cleaned version
-            app_settings.update_mini4o_api_key(api_key)
-        else:  # openai
-            model_name = app_settings.get_model()
-            api_key = app_settings.get_api_key()
-            if not api_key:
-                return "Error: OpenAI API key is not set. Please go to Settings and configure your API key."
-            
-            # Clean the API key
-            api_key = clean_api_key(api_key)
-            
-            # Update the stored API key with the cleaned version
-            app_settings.update_api_key(api_key)
-        
-        # Try using requests library directly instead of OpenAI client if there are encoding issues
-        try:
-            # Reinitialize client to ensure we're using the correct, cleaned API key
-            client = OpenAI(api_key=api_key)
-            print(f"Making API request using {api_type} API with model: {model_name}")
-            
-            # Make the API call with the OpenAI client
-            response = client.chat.completions.create(
-                model=model_name,
-                messages=messages,
-                max_tokens=2048
-            )
-            return response.choices[0].message.content
-        except UnicodeEncodeError as e:
-            # Fall back to direct requests approach if there's an encoding error
-            print(f"Unicode encoding error with OpenAI client: {e}. Trying direct requests approach.")
-            return get_completion_via_requests(prompt, user_input)
-    except Exception as e:
-        # Return a user-friendly error message
-        error_msg = f"Error: {str(e)}\n\n{traceback.format_exc()}"
-        print(error_msg)  # Print to console for debugging
-        return f"Sorry, there was an error communicating with the {api_type} API service. Please check your API key and internet connection.\n\nError details: {str(e)}"
+    Lives next to the microphone button so that blinking and level updates never touch
+    the transcript textbox."""
+    BLINK_INTERVAL_MS = 500
+    
+    def __init__(self, master):
+        super().__init__(master, fg_color="transparent")
+        self.label = ctk.CTkLabel(self, text="", width=40, text_color="#E53935")
+        self.label.pack(side="left")
+        self.meter = ctk.CTkProgressBar(self, width=60, height=8, progress_color="#E53935")
+        self.meter.set(0)
+        self.meter.pack(side="left", padx=(5, 0))
+        self.blink_id = None
+        self.lit = False
+    
+    def start(self):
+        self.label.configure(text="REC")
+        self.blink()
+    
+    def blink(self):
+        # Only the label colour changes, so nothing around it is re-laid out
+        self.lit = not self.lit
+        self.label.configure(text_color="#E53935" if self.lit else "gray50")
+        self.blink_id = self.after(self.BLINK_INTERVAL_MS, self.blink)
+    
+    def set_level(self, level):
+        self.meter.set(level)
+    
+    def stop(self):
+        if self.blink_id:
+            self.after_cancel(self.blink_id)
+            self.blink_id = None
+        self.label.configure(text="")
+        self.meter.set(0)
 
-def get_completion_via_requests(prompt, user_input=None):
-    """Alternative implementation using direct requests instead of the OpenAI client"""
-    try:
-        import requests
-        
-        # Get the current API type
-        api_type = app_settings.get_api_type()
-        
-        messages = [{"role": "system", "content": prompt}]
-        if user_input:
-            messages.append({"role": "user", "content": user_input})
-        
-        # Use the appropriate model and API key based on API type
-        if api_type == "mini4o":
-            model_name = "gpt-4o-mini"
-            api_key = app_settings.get_mini4o_api_key()
-            if not api_key:
-                return "Error: Mini4o API key is not set. Please go to Settings and configure your API key."
-        else:  # openai
-            model_name = app_settings.get_model()
-            api_key = app_settings.get_api_key()
-            if not api_key:
-                return "Error: OpenAI API key is not set. Please go to Settings and configure your API key."
-        
-        # Clean the API key to ensure no ASCII issues
-        api_key = clean_api_key(api_key)
-        
-        # Prepare the request
-        url = "https://api.openai.com/v1/chat/completions"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
-        
-        data = {
-            "model": model_name,
-            "messages": messages,
-            "max_tokens": 2048
-        }
-        
-        print(f"Making API request using {api_type} API with model: {model_name} (direct request method)")
-        
-        # Make the request
-        response = requests.post(url, json=data, headers=headers)
-        
-        # Check response status
-        if response.status_code == 200:
-            response_json = response.json()
-            return response_json["choices"][0]["message"]["content"]
-        else:
-            return f"Error: API request failed with status code {response.status_code}. Response: {response.text}"
-            
-    except Exception as e:
-        # Return a user-friendly error message
-        error_msg = f"Error: {str(e)}\n\n{traceback.format_exc()}"
-        print(error_msg)  # Print to console for debugging
-        return f"Sorry, there was an error communicating with the {api_type} API service. Please check your API key and internet connection.\n\nError details: {str(e)}"
+def get_recording_engine():
+    """Return the shared recording engine, creating it on first use"""
+    global recording_engine
+    
+    if recording_engine is None:
+        from recording_engine import RecordingEngine
+        
+        recording_engine = RecordingEngine(
+            get_speech_backends,
+            on_text=show_recorded_text,
+            on_status=show_recording_status,
+            on_finished=recording_finished,
+            on_level=show_recording_level
+        )
+    return recording_engine
+
+def show_recorded_text(text):
+    """Put the transcript so far into the response entry (called from the recording threads)"""
+    entry = recording_entry
+    ui_bus.post("entry_text", (entry, (recording_base_text + " " + text).strip()), key=entry)
+
+def show_recording_status(message):
+    """Show a recording status message in the result textbox (called from the recording threads)"""
+    ui_bus.post("append", f"\n{message}\n")
+
+def show_recording_level(level):
+    """Feed the input level meter (called from the capture thread)"""
+    status = recording_status
+    ui_bus.post("level", (status, level), key=status)
 
-# Replace the current blink_recording_indicator function with this simplified version
-def blink_recording_indicator():
-    """Create a reliable blinking 'Recording...' indicator in the result textbox"""
-    global is_recording, recording_indicator_id, result, root, is_blinking
+def stop_recording_status():
+    """Stop the blinking indicator and reset the level meter"""
+    if recording_status and recording_status.winfo_exists():
+        recording_status.stop()
+
+def recording_finished(text):
+    """Reset the recording state once the engine has transcribed everything"""
+    global is_recording
     
-    # Early exit if we're not recording or result box isn't available
-    if not is_recording or not result:
-        return
+    is_recording = False
     
-    try:
-        # Toggle blinking state
-        is_blinking = not is_blinking
-        
-        # Remove any previous indicator
-        try:
-            result.delete("recording_start", "recording_end")
-        except:
-            pass
-            
-        # Simple fixed indicator - no emoji that might cause issues
-        indicator_text = "RECORDING..." if is_blinking else "recording..."
-        
-        # Find the end of text
-        end_pos = result.index("end-1c")
-        
-        # Insert indicator at a fixed position instead of at the end
-        result.insert("end", "\n" + indicator_text)
-        result.mark_set("recording_start", "end-" + str(len(indicator_text) + 1) + "c")
-        result.mark_set("recording_end", "end")
-        
-        # Force update but don't scroll - this prevents UI jumping
-        root.update_idletasks()
-        
-        # Only schedule next blink if still recording
-        if is_recording:
-            recording_indicator_id = root.after(500, blink_recording_indicator)
-            
-    except Exception as e:
-        print(f"Error in blinking indicator: {str(e)}")
-        # Don't reschedule if there was an error
+    def update_ui():
+        if mic_button and mic_button.winfo_exists():
+            mic_button.configure(fg_color="#2B7DE9")
+        stop_recording_status()
+    
+    run_on_ui(update_ui)
 
 def toggle_recording():
     """Toggle speech recording on/off with improved error handling"""
-    global is_recording, recognizer, mic_button, user_response_entry, result, recording_thread
+    global is_recording, mic_button, user_response_entry, result, recording_entry, recording_base_text
     
     try:
         # First, check if we're already recording and need to stop
         if is_recording:
             # Set flag to stop recording
             is_recording = False
+            get_recording_engine().stop()
             
             # Change button color back to blue
             if mic_button:
                 mic_button.configure(fg_color="#2B7DE9")
             
-            # Clear any recording indicators
-            try:
-                result.delete("recording_start", "recording_end")
-            except:
-                pass
+            # Clear the recording indicator
+            stop_recording_status()
                 
             # Add status message
-            result.insert("end", "\nStopped recording. Processing audio...\n")
+            transcript_view.append("\nStopped recording. Processing audio...\n")
             result.see("end")
             
-            # Force UI update to show stopped state immediately
-            root.update_idletasks()
-            
             # No need to join thread here - we'll let it finish processing naturally
             return
             
         # If we get here, we're starting a new recording
+        engine = get_recording_engine()
+        if engine.is_running():
+            transcript_view.append("\nStill processing the previous recording...\n")
+            result.see("end")
+            return
+        
         is_recording = True
+        recording_entry = user_response_entry
+        recording_base_text = user_response_entry.get().strip() if user_response_entry else ""
         
         # Change button color to red to indicate recording
         if mic_button:
             mic_button.configure(fg_color="#E53935")
         
-        # Initialize recognizer if not already done
-        if not recognizer:
-            recognizer = sr.Recognizer()
-        
         # Insert recording start message - simplified to avoid issues
-        result.insert("end", "\n🔴 Recording... (click mic again to stop)\n")
+        transcript_view.append("\n🔴 Recording... (click mic again to stop)\n")
         result.see("end")
         
-        # Force UI update before starting thread
-        root.update_idletasks()
-        
-        # Start recording in a separate thread
-        recording_thread = threading.Thread(target=improved_recording, daemon=True)
-        recording_thread.start()
+        # Start recording in the engine's background thread
+        engine.start(settings_cache.get_setting("recording_mode", "chunked"))
+        if recording_status:
+            recording_status.start()
         
     except Exception as e:
         print(f"Toggle recording error details: {repr(e)}")
-        result.insert("end", f"\nError toggling recording: {repr(e)}\n")
+        transcript_view.append(f"\nError toggling recording: {repr(e)}\n")
         result.see("end")
         
         # Reset recording state and button
@@ -300,459 +359,197 @@ def toggle_recording():
         if mic_button:
             mic_button.configure(fg_color="#2B7DE9")
 
-def improved_recording():
-    """Improved recording method with better error handling"""
-    global is_recording, recognizer, user_response_entry, result
+def get_speech_backends():
+    """Return the speech backend fallback chain for the current settings"""
+    global speech_backend_chain, recognizer
     
+    if speech_backend_chain is None:
+        # speech_recognition is only loaded once the microphone is first used
+        import speech_recognition as sr
+        from speech_backends import build_backend_chain
+        
+        if not recognizer:
+            recognizer = sr.Recognizer()
+        speech_backend_chain = build_backend_chain(
+            recognizer,
+            settings_cache.get_setting("speech_backend", "google"),
+            settings_cache.get_setting("vosk_model_path") or None
+        )
+    return speech_backend_chain
+
+def change_api_type():
+    global api_type_var, api_type_status_label, openai_frame, mini4o_frame, local_frame
     try:
-        # Use the microphone as source
-        with sr.Microphone() as source:
-            print("Microphone initialized")
-            
-            # Adjust for ambient noise
-            recognizer.adjust_for_ambient_noise(source, duration=0.3)
-            print("Ambient noise adjusted")
-            
-            # Build up the full text as we go
-            full_text = ""
-            
-            # Configure recognizer for better performance
-            recognizer.pause_threshold = 0.8
-            recognizer.dynamic_energy_threshold = True
-            recognizer.energy_threshold = 150
-            
-            # Record until stopped or timeout (max 3 minutes)
-            start_time = time.time()
-            
-            while is_recording and (time.time() - start_time) < 180:
-                try:
-                    # Process audio in smaller chunks
-                    print("Listening...")
-                    audio = recognizer.listen(source, timeout=5, phrase_time_limit=10)
-                    
-                    # Try to recognize speech in this chunk
-                    try:
-                        text = recognizer.recognize_google(audio, language="en-US")
-                        if text and text.strip():
-                            print(f"Recognized: {text}")
-                            
-                            # Append to our full text
-                            if full_text:
-                                full_text += " " + text
-                            else:
-                                full_text = text
-                            
-                            # Update the UI with progress
-                            def update_ui():
-                                if user_response_entry:
-                                    # Set the text in the entry
-                                    user_response_entry.delete(0, "end")
-                                    user_response_entry.insert(0, full_text)
-                            
-                            # Call UI update on main thread
-                            if root:
-                                root.after(0, update_ui)
-                    
-                    except sr.UnknownValueError:
-                        # No recognizable speech in this chunk
-                        print("No speech detected in segment")
-                        pass
-                    except Exception as e:
-                        print(f"Recognition error: {repr(e)}")
-                
-                except sr.WaitTimeoutError:
-                    # No audio detected, continue loop
-                    print("No audio detected, continuing")
-                    pass
-                except Exception as e:
-                    print(f"Listening error: {repr(e)}")
-                    break
-                
-                # Check if recording has been stopped
-                if not is_recording:
-                    print("Recording flag set to stop")
-                    break
-                
-                # Periodically update UI to stay responsive
-                if root:
-                    root.after(0, root.update_idletasks)
-            
-            # Recording complete
-            print("Recording complete, final text:", full_text)
-            
-            # Final update to the UI with the complete text
-            if full_text:
-                def final_update():
-                    if user_response_entry:
-                        user_response_entry.delete(0, "end")
-                        user_response_entry.insert(0, full_text)
-                        
-                        # Update result area
-                        result.insert("end", "\nRecording complete.\n")
-                        result.see("end")
-                
-                if root:
-                    root.after(0, final_update)
+        api_type = api_type_var.get()
+        if api_type != settings_cache.get_api_type():
+            settings_cache.update_api_type(api_type)
+            # Switch to (or build) the client for the newly selected service
+            initialize_openai_client()
+        
+        # Update status label
+        api_type_status_label.configure(
+            text=f"API Service set to: {api_type}",
+            text_color="green"
+        )
+        
+        # Update UI based on selected API type
+        for frame_api_type, frame in (("openai", openai_frame), ("mini4o", mini4o_frame), ("local", local_frame)):
+            if frame_api_type == api_type:
+                frame.pack(fill="x", pady=(10, 0))
             else:
-                if root and result:
-                    root.after(0, lambda: result.insert("end", "\nNo speech was recognized.\n"))
-                    root.after(0, lambda: result.see("end"))
-            
+                frame.pack_forget()
     except Exception as e:
-        print(f"Recording error details: {repr(e)}")
-        if root and result:
-            root.after(0, lambda: result.insert("end", f"\nRecording error: {repr(e)}\n"))
-            root.after(0, lambda: result.see("end"))
-    
-    # Always make sure the recording state is reset
-    is_recording = False
-    if root and mic_button:
-        root.after(0, lambda: mic_button.configure(fg_color="#2B7DE9"))
+        print(f"Error changing API type: {str(e)}")
+        if api_type_status_label:
+            api_type_status_label.configure(
+                text=f"Error: {str(e)}",
+                text_color="red"
+            )
+
+def start_conversation(career, question=None):
+    """Begin a new interview session, optionally with its first question, and return it"""
+    global interview_session
     
-    print("Recording thread completed")
+    interview_session = InterviewSession(career)
+    if question:
+        interview_session.use_question(question)
+    return interview_session
 
-def long_form_recording():
-    """Record audio continuously for up to 3 minutes or until stopped with improved handling"""
-    global is_recording, recognizer, user_response_entry, result
+def fill_question_bank(career):
+    """Generate a batch of questions for this job title in the background when the bank runs low"""
+    bank = get_question_bank()
+    model = get_model_name()
+    fill_key = (normalize_job_title(career), model)
+    if bank is None or fill_key in bank_fills_in_progress:
+        return
+    if bank.unserved_count(career, model) >= BANK_LOW_WATER:
+        return
     
-    try:
-        # Use the microphone as source
-        with sr.Microphone() as source:
-            print("Microphone initialized for long-form recording")
-            
-            # Adjust for ambient noise
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            print("Ambient noise adjusted")
-            
-            # Collect audio chunks
-            audio_chunks = []
-            
-            # Configure recognizer for long-form recording
-            recognizer.pause_threshold = 0.8  # Increased to allow for natural pauses
-            recognizer.dynamic_energy_threshold = True
-            recognizer.energy_threshold = 100
-            
-            # Start blinking recording indicator
-            if root and result:
-                root.after(0, blink_recording_indicator)
-            
-            # Record until stopped (max 3 minutes)
-            start_time = time.time()
-            while is_recording and (time.time() - start_time) < 180:  # 3 minutes (changed from 60 seconds)
-                try:
-                    # Listen for audio with a more reasonable timeout
-                    # Break audio into smaller chunks with shorter phrase_time_limit
-                    audio = recognizer.listen(source, timeout=5, phrase_time_limit=10)
-                    audio_chunks.append(audio)
-                    
-                    # Process each chunk immediately to avoid UI freezing
-                    try:
-                        # Try to recognize this chunk
-                        partial_text = recognizer.recognize_google(audio, language="en-US")
-                        
-                        # Update UI with partial recognition for feedback
-                        def update_partial():
-                            if user_response_entry and partial_text:
-                                current_text = user_response_entry.get()
-                                if current_text:
-                                    # Append the new text with a space
-                                    user_response_entry.delete(0, "end")
-                                    user_response_entry.insert(0, current_text + " " + partial_text)
-                                else:
-                                    # Set the new text
-                                    user_response_entry.delete(0, "end")
-                                    user_response_entry.insert(0, partial_text)
-                                
-                                # Add recognized text message but with less UI clutter
-                                # result.insert("end", f"\nPartial: {partial_text}")
-                                # result.see("end")
-                        
-                        # Update UI on main thread
-                        root.after(0, update_partial)
-                    except sr.UnknownValueError:
-                        # No speech detected in this chunk, just continue
-                        pass
-                    except Exception as e:
-                        # Log errors but continue recording
-                        print(f"Partial recognition error: {repr(e)}")
-                    
-                except sr.WaitTimeoutError:
-                    # Continue if no audio detected
-                    continue
-                except Exception as e:
-                    print(f"Recording error: {repr(e)}")
-                    break
-                
-                # Force UI update to keep app responsive
-                if root:
-                    root.after(0, root.update_idletasks)
-            
-            # Stop recording
-            is_recording = False
-            
-            # Combine and process the full recording only when complete
-            if audio_chunks:
-                # Update UI
-                root.after(0, lambda: result.insert("end", "\nProcessing full recording...\n"))
-                root.after(0, lambda: result.see("end"))
-                root.after(0, root.update_idletasks)
-                
-                # Build complete text from all recognized chunks
-                full_text = ""
-                
-                # Process each chunk individually rather than combining audio data
-                for i, chunk in enumerate(audio_chunks):
-                    try:
-                        # Process in smaller batches to avoid UI freezes
-                        if i % 3 == 0 and root:
-                            root.update_idletasks()
-                            
-                        chunk_text = recognizer.recognize_google(chunk, language="en-US")
-                        if chunk_text:
-                            full_text += " " + chunk_text
-                    except sr.UnknownValueError:
-                        # Skip chunks with no recognizable speech
-                        pass
-                    except Exception as e:
-                        print(f"Error processing chunk {i}: {repr(e)}")
-                
-                # Update on main thread with the full text
-                if full_text:
-                    def update_ui():
-                        if user_response_entry:
-                            # Set the text in the entry
-                            user_response_entry.delete(0, "end")
-                            user_response_entry.insert(0, full_text.strip())
-                            
-                            # Add recognized text message
-                            result.insert("end", "\nFull Recording Processed:\n")
-                            result.insert("end", full_text.strip() + "\n")
-                            result.see("end")
-                        
-                        # Reset mic button color
-                        mic_button.configure(fg_color="#2B7DE9")
-                    
-                    # Call UI update on main thread
-                    root.after(0, update_ui)
-                else:
-                    root.after(0, lambda: result.insert("end", "\nNo speech was recognized in the recording.\n"))
-            else:
-                # No audio chunks recorded
-                root.after(0, lambda: result.insert("end", "\nNo audio recorded.\n"))
+    def worker():
+        try:
+            text = get_completion(build_question_list_prompt(career, BANK_FILL_SIZE), call_type="question_list")
+            if is_error_response(text):
+                return
+            added = bank.add_questions(career, model, parse_question_list(text))
+            print(f"Question bank: added {added} questions for '{career}' ({bank.stats()})")
+        except Exception as e:
+            print(f"Error filling question bank: {str(e)}")
+        finally:
+            bank_fills_in_progress.discard(fill_key)
     
-    except Exception as e:
-        error_msg = f"Recording error details: {repr(e)}"
-        print(error_msg)
-        if root and result:
-            root.after(0, lambda: result.insert("end", f"\n{error_msg}\n"))
-            root.after(0, lambda: result.see("end"))
+    bank_fills_in_progress.add(fill_key)
+    get_completion_executor().submit(worker)
+
+def prefetch_questions(session):
+    """Fill the prefetch queue for the session's job title in the background while the user answers
     
-    # Ensure mic button is reset
-    if root and mic_button:
-        root.after(0, lambda: mic_button.configure(fg_color="#2B7DE9"))
+    Prefetched questions are asked to differ from the ones the session has already asked."""
+    global prefetch_career, prefetch_epoch, prefetch_in_flight, prefetched_questions
     
-    print("Long-form recording thread ending")
-
-def simplified_recording():
-    """Simplified speech recognition function with better error handling"""
-    global is_recording, recognizer, user_response_entry, result
+    career = session.career
+    if career != prefetch_career:
+        # A new job title makes everything queued or in flight useless
+        prefetch_career = career
+        prefetch_epoch += 1
+        prefetch_in_flight = 0
+        prefetched_questions = []
     
-    print("Starting simplified recording...")
+    epoch = prefetch_epoch
     
-    try:
-        # Use the microphone as source
-        with sr.Microphone() as source:
-            print("Microphone initialized")
-            
-            # Shorter ambient noise adjustment
-            recognizer.adjust_for_ambient_noise(source, duration=0.3)
-            print("Ambient noise adjusted")
-            
-            # Continue recording until is_recording is set to False
-            while is_recording:
-                print("Listening for speech...")
-                try:
-                    # Listen for audio
-                    audio = recognizer.listen(source, timeout=5)
-                    print("Audio captured, recognizing...")
-                    
-                    # Use Google's speech recognition
-                    text = recognizer.recognize_google(audio, language="en-US")
-                    print(f"Recognized text: {text}")
-                    
-                    if text and text.strip():
-                        def update_text():
-                            if user_response_entry:
-                                current_text = user_response_entry.get()
-                                if current_text:
-                                    # Append the new text with a space
-                                    user_response_entry.delete(0, "end")
-                                    user_response_entry.insert(0, current_text + " " + text)
-                                else:
-                                    # Set the new text
-                                    user_response_entry.delete(0, "end")
-                                    user_response_entry.insert(0, text)
-                                
-                                result.insert("end", f"\nRecognized: {text}\n")
-                                result.see("end")
-                        
-                        # Call in main thread
-                        root.after(0, update_text)
-                
-                except sr.WaitTimeoutError:
-                    print("Timeout while waiting for speech")
-                    pass
-                except sr.UnknownValueError:
-                    print("Speech not recognized")
-                    pass
-                except sr.RequestError as e:
-                    error_msg = f"Speech service error: {repr(e)}"
-                    print(error_msg)
-                    root.after(0, lambda: result.insert("end", f"\n{error_msg}\n"))
-                    root.after(0, lambda: result.see("end"))
-                    break
-                except Exception as e:
-                    error_msg = f"Recognition error details: {repr(e)}"
-                    print(error_msg)
-                    root.after(0, lambda: result.insert("end", f"\n{error_msg}\n"))
-                    root.after(0, lambda: result.see("end"))
-                    break
-                
-                # Check if recording has been stopped
-                if not is_recording:
-                    print("Recording stopped")
-                    break
-                    
-    except Exception as e:
-        error_msg = f"Recording error details: {repr(e)}"
-        print(error_msg)
-        root.after(0, lambda: result.insert("end", f"\n{error_msg}\n"))
-        root.after(0, lambda: result.see("end"))
+    def store(question):
+        global prefetch_in_flight
+        
+        if epoch != prefetch_epoch:
+            print("Dropping prefetched question for a previous job title")
+            return
+        prefetch_in_flight = max(0, prefetch_in_flight - 1)
+        if is_error_response(question) or question in prefetched_questions:
+            return
+        prefetched_questions.append(question)
+        print(f"Prefetched question ready ({len(prefetched_questions)} queued)")
     
-    print("Recording thread ending")
+    def worker(prompt):
+        question = get_completion(prompt, call_type="question").strip()
+        run_on_ui(lambda: store(question))
     
-    # Reset recording state and button
-    is_recording = False
-    if root and mic_button:
-        root.after(0, lambda: mic_button.configure(fg_color="#2B7DE9"))
+    needed = PREFETCH_QUEUE_SIZE - len(prefetched_questions) - prefetch_in_flight
+    for _ in range(max(0, needed)):
+        # The question bank is much cheaper than an API call
+        banked_question = session.draw_banked_question(exclude=prefetched_questions)
+        if banked_question:
+            prefetched_questions.append(banked_question)
+            continue
+        
+        prefetch_in_flight += 1
+        prompt = build_question_prompt(career, session.asked_questions + prefetched_questions)
+        get_completion_executor().submit(worker, prompt)
 
-def threading_start_recording():
-    """Start recording in a separate thread"""
-    recording_thread = threading.Thread(target=continuous_recording, daemon=True)
-    recording_thread.start()
+def take_prefetched_question(career):
+    """Pop a ready question for this job title, or return None if there is none yet"""
+    if career != prefetch_career or not prefetched_questions:
+        return None
+    return prefetched_questions.pop(0)
 
-def continuous_recording():
-    """Record continuously with real-time transcription until stopped"""
-    global is_recording, recognizer, user_response_entry, result
+def skip_question():
+    """Replace the current question with a new one, served from the prefetch queue when possible"""
+    cancel_pending_completions()
     
     try:
-        # Use the microphone as source
-        with sr.Microphone() as source:
-            # Shorter ambient noise adjustment for quicker start
-            recognizer.adjust_for_ambient_noise(source, duration=0.3)
-            
-            # Configure recognizer for more responsive real-time transcription
-            recognizer.pause_threshold = 0.3
-            recognizer.dynamic_energy_threshold = True
-            recognizer.energy_threshold = 300
+        career = careerDropdown.get().strip()
+        session = interview_session
+        if session is None or session.career != career:
+            # A different job title is a new interview
+            generate_questions()
+            return
+        
+        question = take_prefetched_question(career)
+        if question:
+            transcript_view.append(f"\n> {question}\n")
+            result.see("end")
+            session.use_question(question)
             
-            # Continue recording until is_recording is set to False
-            while is_recording:
-                try:
-                    # Process audio in smaller chunks for more real-time display
-                    audio = recognizer.listen(source, timeout=3, phrase_time_limit=3)
-                    
-                    # Use Google's speech recognition
-                    text = recognizer.recognize_google(audio, language="en-US")
-                    
-                    # Only update if we got meaningful text
-                    if text and text.strip():
-                        # Update the UI with the recognized text segment
-                        def update_ui():
-                            if user_response_entry:
-                                current_text = user_response_entry.get()
-                                if current_text:
-                                    # Append the new text with a space
-                                    user_response_entry.delete(0, "end")
-                                    user_response_entry.insert(0, current_text + " " + text)
-                                else:
-                                    # Set the new text
-                                    user_response_entry.delete(0, "end")
-                                    user_response_entry.insert(0, text)
-                                
-                                # Add recognized text message
-                                result.insert("end", f"\nRecognized: {text}")
-                                result.see("end")
-                        
-                        # Call UI update on main thread
-                        root.after(0, update_ui)
-                    
-                except sr.WaitTimeoutError:
-                    # Just continue if timeout (will loop again if still recording)
-                    pass
-                except sr.UnknownValueError:
-                    # Silent periods or unrecognized speech, just continue
-                    pass
-                except sr.RequestError as e:
-                    print(f"Speech recognition service error: {str(e)}")
-                    root.after(0, lambda: result.insert("end", f"\nSpeech recognition service error\n"))
-                    root.after(0, lambda: result.see("end"))
-                    break
-                except Exception as e:
-                    print(f"Recognition error: {str(e)}")
-                    root.after(0, lambda: result.insert("end", f"\nRecognition error: {str(e)}\n"))
-                    root.after(0, lambda: result.see("end"))
-                    break
-                
-                # Check if recording has been stopped
-                if not is_recording:
-                    break
-                    
-    except Exception as e:
-        error_msg = f"Error in recording: {str(e)}"
-        print(error_msg)
-        if root and result:
-            root.after(0, lambda: result.insert("end", f"\n{error_msg}\n"))
-            root.after(0, lambda: result.see("end"))
-    
-    # Reset recording state
-    is_recording = False
-    if root and mic_button:
-        root.after(0, lambda: mic_button.configure(fg_color="#2B7DE9"))
-    
-    # Cancel blinking indicator
-    if root and recording_indicator_id:
-        try:
-            root.after(0, lambda: root.after_cancel(recording_indicator_id))
-        except:
-            pass
-
-def change_api_type():
-    global api_type_var, api_type_status_label, openai_frame, mini4o_frame
-    try:
-        api_type = api_type_var.get()
-        app_settings.update_api_type(api_type)
+            create_user_response_ui(question, career)
+            prefetch_questions(session)
+            return
         
-        # Update status label
-        api_type_status_label.configure(
-            text=f"API Service set to: {api_type}",
-            text_color="green"
-        )
+        # Nothing prefetched yet: ask the session for a fresh question, keeping the transcript
+        remove_response_ui()
+        transcript_view.append("\n> ")
+        result.see("end")
+        streamed = []
         
-        # Update UI based on selected API type
-        if api_type == "openai":
-            openai_frame.pack(fill="x", pady=(10, 0))
-            mini4o_frame.pack_forget()
-        else:
-            openai_frame.pack_forget()
-            mini4o_frame.pack(fill="x", pady=(10, 0))
+        def show_question_delta(text):
+            streamed.append(text)
+            transcript_view.append(text)
+            result.see("end")
+        
+        def show_question(new_question):
+            try:
+                if is_error_response(new_question):
+                    # Keep the current question so it can still be answered or skipped again
+                    transcript_view.append(("\n" if streamed else "") + new_question + "\n")
+                    result.see("end")
+                    create_user_response_ui(session.current_question, career)
+                    return
+                if not streamed:
+                    transcript_view.append(new_question)
+                elif new_question != "".join(streamed).strip():
+                    transcript_view.append("\n" + new_question)
+                transcript_view.append("\n")
+                result.see("end")
+                
+                create_user_response_ui(new_question, career)
+                prefetch_questions(session)
+            except Exception as e:
+                error_msg = f"Error skipping question: {str(e)}\n\n{traceback.format_exc()}"
+                print(error_msg)
+                transcript_view.append(f"Error skipping question: {str(e)}")
+        
+        submit_session_call(session.next_question, show_question, on_delta=show_question_delta)
     except Exception as e:
-        print(f"Error changing API type: {str(e)}")
-        if api_type_status_label:
-            api_type_status_label.configure(
-                text=f"Error: {str(e)}",
-                text_color="red"
-            )
+        error_msg = f"Error skipping question: {str(e)}\n\n{traceback.format_exc()}"
+        print(error_msg)
+        transcript_view.append(f"Error skipping question: {str(e)}")
 
 def generate_questions():
     """Generate interview questions with improved error handling"""
@@ -762,45 +559,97 @@ def generate_questions():
         print("Error: UI components not initialized")
         return
     
+    # Any answer still in flight belongs to the previous question
+    cancel_pending_completions()
+    
     # Clear the result textbox
-    result.delete("0.0", "end")
+    transcript_view.clear()
     
     try:
         # Get the job title from the dropdown
         career = careerDropdown.get().strip()
         if not career:
-            result.insert("end", "Please enter a job title before generating questions.")
+            transcript_view.append("Please enter a job title before generating questions.")
             return
-            
-        prompt = "You are job preparation gpt. You are designed to ask me 1 interview question based on my job title. Wait for an input or response to the question from the user, then analyze and provide feedback based on that response. be very critical and help elaborate where the user can do better. "
-        prompt += f"The job I am interviewing for is a {career} position."
         
-        # Get the completion using the selected API
-        question = get_completion(prompt)
+        # Start a fresh interview; the session asks the questions and keeps the transcript
+        session = start_conversation(career)
         
-        if question.startswith("Error:"):
-            result.insert("end", question)
+        transcript_view.append("Generating question...\n")
+        streamed = []
+        
+        def show_question_delta(text):
+            if not streamed:
+                # Replace the placeholder with the first tokens of the question
+                transcript_view.clear()
+                transcript_view.append("> ")
+            streamed.append(text)
+            transcript_view.append(text)
+        
+        def show_question(question):
+            try:
+                if streamed:
+                    # The question text is already on screen; only report a failed stream
+                    if question != "".join(streamed).strip():
+                        transcript_view.append("\n" + question)
+                        return
+                    transcript_view.append("\n")
+                    result.see("0.0")
+                else:
+                    transcript_view.clear()
+                    
+                    if question.startswith("Error:"):
+                        transcript_view.append(question)
+                        return
+                        
+                    transcript_view.append(f"> {question}\n")
+                    result.see("0.0")
+                
+                # Create UI for user response
+                create_user_response_ui(question, career)
+                
+                # Get the next questions ready while the user is answering
+                prefetch_questions(session)
+            except Exception as e:
+                error_msg = f"An error occurred: {str(e)}\n\n{traceback.format_exc()}"
+                print(error_msg)
+                transcript_view.append(f"An error occurred: {str(e)}")
+        
+        # Keep the on-disk bank stocked for this job title
+        fill_question_bank(career)
+        
+        # Serve a prefetched or banked question instantly if one is ready
+        ready_question = take_prefetched_question(career) or session.draw_banked_question(exclude=prefetched_questions)
+        if ready_question:
+            session.use_question(ready_question)
+            show_question(ready_question)
             return
-            
-        result.insert("end", f"> {question}\n")
-        result.see("0.0")
         
-        # Create UI for user response
-        create_user_response_ui(question, career)
+        # Stream the question from the selected API without blocking the UI; the bank was already tried
+        submit_session_call(functools.partial(session.next_question, use_bank=False), show_question,
+                            on_delta=show_question_delta)
     except Exception as e:
         error_msg = f"An error occurred: {str(e)}\n\n{traceback.format_exc()}"
         print(error_msg)
-        result.insert("end", f"An error occurred: {str(e)}")
+        transcript_view.append(f"An error occurred: {str(e)}")
 
-def create_user_response_ui(question, career):
-    """Create a frame for user response with improved feedback structure"""
-    global root, result, user_response_entry, mic_button
+def remove_response_ui():
+    """Remove the answer entry and buttons of the current question"""
+    for widget in root.winfo_children():
+        if isinstance(widget, ctk.CTkFrame) and getattr(widget, "is_response_frame", False):
+            widget.destroy()
+
+def create_user_response_ui(question, career, feedback_pending=False):
+    """Create a frame for user response with improved feedback structure
+    
+    With feedback_pending the Send button starts disabled, because the follow-up question
+    is shown while the rest of the previous feedback is still streaming. Returns the Send
+    button so the caller can enable it."""
+    global root, result, user_response_entry, mic_button, recording_status
     
     try:
         # Clean up any existing response frames
-        for widget in root.winfo_children():
-            if isinstance(widget, ctk.CTkFrame) and getattr(widget, "is_response_frame", False):
-                widget.destroy()
+        remove_response_ui()
         
         # Create new response frame
         user_response_frame = ctk.CTkFrame(root, width=500, height=120)
@@ -826,35 +675,29 @@ def create_user_response_ui(question, career):
         )
         mic_button.pack(side="right", padx=(5, 0))
         
+        # Recording indicator and input level meter
+        recording_status = RecordingStatus(response_input_frame)
+        recording_status.pack(side="right", padx=(5, 0))
+        
         # Create send button
         send_button_var = ctk.BooleanVar()
         
         def send_response():
             try:
                 # Stop recording if active
-                global is_recording, recording_indicator_id
+                global is_recording
                 if is_recording:
                     is_recording = False
+                    get_recording_engine().stop()
                     mic_button.configure(fg_color="#2B7DE9")
                     
-                    # Cancel blinking indicator if active
-                    if recording_indicator_id:
-                        try:
-                            root.after_cancel(recording_indicator_id)
-                            recording_indicator_id = None
-                        except:
-                            pass
-                        
-                    # Remove recording indicator tag
-                    try:
-                        result.delete("recording_start", "recording_end")
-                    except:
-                        pass  # Ignore if tags don't exist
+                    # Clear the recording indicator
+                    stop_recording_status()
                 
                 # Get the response text
                 user_response_text = user_response_entry.get().strip()
                 if not user_response_text:
-                    result.insert("end", "\nPlease enter a response before sending.\n")
+                    transcript_view.append("\nPlease enter a response before sending.\n")
                     result.see("end")
                     return
                     
@@ -864,73 +707,129 @@ def create_user_response_ui(question, career):
                 
                 print("User Response: ", user_response_text)
                 
+                # Each answer and its feedback form a new round of the transcript
+                transcript_view.start_round()
+                
                 # Display the user response
-                result.insert("end", "\n" + "Your Response: " + user_response_text + "\n")
+                transcript_view.append("\n" + "Your Response: " + user_response_text + "\n")
                 result.see("end")
                 
-                # Prepare a comprehensive prompt for detailed feedback
-                comprehensive_prompt = f"""You are an expert interviewer providing a comprehensive evaluation of an interview response. 
-                Analyze the following response to the interview question: "{question}"
-
-                For the job position of {career}, provide a detailed assessment with three key sections:
-
-                1. Overall Rating and Feedback:
-                - Evaluate the response on a scale of 1-10
-                - Provide a quick summary of the response's strengths and weaknesses
-                - Assess how well the response addresses the original question
-
-                2. Detailed Analysis and Improvement Tips:
-                - Break down specific areas of improvement
-                - Suggest how to enhance the response
-                - Provide concrete examples of what could make the answer stronger
-                - Highlight any missing key elements or perspectives
-
-                3. Follow-up Question:
-                - Generate a targeted follow-up question that probes deeper into the topic
-                - The question should challenge the candidate to provide more insight or demonstrate deeper understanding
-
-                Response to evaluate: "{user_response_text}"
-                """
-                
-                # Get comprehensive feedback using the selected API
-                comprehensive_feedback = get_completion(comprehensive_prompt)
-                print("Comprehensive Feedback: ", comprehensive_feedback)
+                # The session builds the feedback prompt (the whole conversation in history mode)
+                session = interview_session
+                if session is None:
+                    session = start_conversation(career, question)
+                if session.conversation is not None:
+                    print(f"Sending conversation with {len(session.conversation.turns)} turns (~{session.conversation.estimated_tokens()} tokens)")
                 
-                # Display the comprehensive feedback
-                result.insert("end", comprehensive_feedback + "\n\n")
+                # Prevent double submission while the feedback is being generated
+                send_button.configure(state="disabled")
+                mic_button.configure(state="disabled")
+                transcript_view.append("\nEvaluating your response...\n")
                 result.see("end")
+                streamed = []
+                shown_fields = set()
+                next_send_button = []  # Set once the follow-up question UI has been built
+                
+                def is_plain_text():
+                    # Models without JSON support answer in the old numbered text format
+                    text = "".join(streamed).lstrip()
+                    return bool(text) and not text.startswith(("{", "```"))
                 
-                # Extract the follow-up question for the next round
-                # This is a simple extraction - in a real-world scenario, you might want a more robust method
-                new_question_match = re.search(r'3\. Follow-up Question:(.*?)(?=\n\n|\n[1-4]\.|\Z)', comprehensive_feedback, re.DOTALL)
-                new_question = new_question_match.group(1).strip() if new_question_match else "Tell me more about your previous response."
+                def show_next_question(new_question):
+                    # Clean up the response UI
+                    user_response_frame.destroy()
+                    
+                    # Create UI for next response with the follow-up question
+                    next_send_button.append(create_user_response_ui(new_question, career, feedback_pending=True))
                 
-                # Clean up the response UI
-                user_response_frame.destroy()
+                def show_feedback_field(name, value):
+                    if name == "follow_up":
+                        # The next round can start being prepared while the evaluation goes on
+                        if not next_send_button:
+                            show_next_question(get_follow_up({"follow_up": value}))
+                        return
+                    if is_plain_text():
+                        # Already on screen as it streamed
+                        return
+                    shown_fields.add(name)
+                    transcript_view.append(format_field(name, value))
+                    result.see("end")
                 
-                # Create UI for next response with the follow-up question
-                create_user_response_ui(new_question, career)
+                def show_feedback_delta(text):
+                    streamed.append(text)
+                    if is_plain_text():
+                        transcript_view.append(text)
+                        result.see("end")
+                
+                def show_feedback(feedback):
+                    try:
+                        print("Feedback: ", feedback)
+                        
+                        if is_plain_text():
+                            transcript_view.append("\n\n")
+                        else:
+                            # Show any fields that did not arrive on their own, then the follow-up question last
+                            for name, value in feedback.items():
+                                if name not in ("follow_up", "error") and name not in shown_fields:
+                                    transcript_view.append(format_field(name, value))
+                            if feedback.get("error"):
+                                transcript_view.append(f"\n{feedback['error']}\n")
+                            if "follow_up" in feedback or not feedback.get("error"):
+                                transcript_view.append(format_field("follow_up", get_follow_up(feedback)) + "\n")
+                        result.see("end")
+                        
+                        if not next_send_button:
+                            show_next_question(get_follow_up(feedback))
+                        
+                        # The follow-up UI may have been built early; answers can be sent now
+                        try:
+                            next_send_button[0].configure(state="normal")
+                        except Exception:
+                            pass
+                    except Exception as e:
+                        error_msg = f"Error processing response: {str(e)}\n\n{traceback.format_exc()}"
+                        print(error_msg)
+                        transcript_view.append(f"Error processing response: {str(e)}")
+                
+                # The session evaluates the answer (in one streamed request or several smaller
+                # ones) and moves on to the follow-up question; fields are shown as they arrive
+                submit_session_call(
+                    functools.partial(session.evaluate, user_response_text), show_feedback,
+                    on_delta=show_feedback_delta, on_field=show_feedback_field
+                )
             
             except Exception as e:
                 error_msg = f"Error processing response: {str(e)}\n\n{traceback.format_exc()}"
                 print(error_msg)
-                result.insert("end", f"Error processing response: {str(e)}")
+                transcript_view.append(f"Error processing response: {str(e)}")
+        
+        button_row = ctk.CTkFrame(user_response_frame, fg_color="transparent")
+        button_row.pack(pady=10)
         
-        send_button = ctk.CTkButton(user_response_frame, text="Send", command=send_response)
-        send_button.pack(pady=10, padx=100)
+        send_button = ctk.CTkButton(
+            button_row, text="Send", command=send_response, state="disabled" if feedback_pending else "normal"
+        )
+        send_button.pack(side="left", padx=(0, 5))
+        
+        skip_button = ctk.CTkButton(button_row, text="Skip", width=80, command=skip_question)
+        skip_button.pack(side="left", padx=(5, 0))
+        return send_button
         
     except Exception as e:
         error_msg = f"Error creating user response UI: {str(e)}\n\n{traceback.format_exc()}"
         print(error_msg)
-        result.insert("end", f"Error creating user response UI: {str(e)}")
+        transcript_view.append(f"Error creating user response UI: {str(e)}")
 
 def generate_new_question():
     """Reset and generate a new question"""
     global result
     
+    # Drop any question or feedback request that is still running
+    cancel_pending_completions()
+    
     if result:
         # Clear the result textbox
-        result.delete("0.0", "end")
+        transcript_view.clear()
         
     # Generate a new question
     generate_questions()
@@ -942,10 +841,12 @@ def save_api_key():
         if new_key:
             # Clean key before saving
             new_key = clean_api_key(new_key)
-            app_settings.update_api_key(new_key)
+            if new_key != clean_api_key(settings_cache.get_api_key()):
+                settings_cache.update_api_key(new_key)
+                # Rebuild the client only when the credentials actually changed
+                if settings_cache.get_api_type() == "openai":
+                    initialize_openai_client()
             api_status_label.configure(text="OpenAI API key saved successfully!", text_color="green")
-            # Update client with new key
-            initialize_openai_client()
         else:
             api_status_label.configure(text="Please enter an API key", text_color="red")
     except Exception as e:
@@ -958,11 +859,12 @@ def save_mini4o_api_key():
         if new_key:
             # Clean key before saving
             new_key = clean_api_key(new_key)
-            app_settings.update_mini4o_api_key(new_key)
+            if new_key != clean_api_key(settings_cache.get_mini4o_api_key()):
+                settings_cache.update_mini4o_api_key(new_key)
+                # Rebuild the client only when the credentials actually changed
+                if settings_cache.get_api_type() == "mini4o":
+                    initialize_openai_client()
             mini4o_status_label.configure(text="Mini4o API key saved successfully!", text_color="green")
-            # Update client if using mini4o
-            if app_settings.get_api_type() == "mini4o":
-                initialize_openai_client()
         else:
             mini4o_status_label.configure(text="Please enter an API key", text_color="red")
     except Exception as e:
@@ -971,7 +873,7 @@ def save_mini4o_api_key():
 def open_settings():
     """Open settings window with error handling"""
     try:
-        global api_type_var, api_type_status_label, openai_frame, mini4o_frame
+        global api_type_var, api_type_status_label, openai_frame, mini4o_frame, local_frame
         global api_key_entry, api_status_label, mini4o_api_key_entry, mini4o_status_label
         
         settings_window = ctk.CTkToplevel(root)
@@ -983,16 +885,17 @@ def open_settings():
         settings_window.grab_set()
         settings_window.focus_set()
         
-        settings_frame = ctk.CTkFrame(settings_window)
+        # Scrollable so the window can hold more sections than fit on screen
+        settings_frame = ctk.CTkScrollableFrame(settings_window)
         settings_frame.pack(padx=20, pady=20, fill="both", expand=True)
         
         # API Type selection
         api_type_label = ctk.CTkLabel(settings_frame, text="API Service:", font=ctk.CTkFont(weight="bold"))
         api_type_label.pack(anchor="w", pady=(10, 0))
         
-        current_api_type = app_settings.get_api_type()
+        current_api_type = settings_cache.get_api_type()
         api_type_var = ctk.StringVar(value=current_api_type)
-        api_types = ["openai", "mini4o"]
+        api_types = API_TYPES
         
         api_type_status_label = ctk.CTkLabel(
             settings_frame, 
@@ -1008,6 +911,18 @@ def open_settings():
             )
             api_radio.pack(anchor="w", pady=(5, 0))
         
+        # Automatic routing between every backend that has an API key
+        routing_var = ctk.BooleanVar(value=is_auto_routing())
+        
+        def change_routing():
+            settings_cache.update_setting("auto_backend_routing", routing_var.get())
+        
+        routing_checkbox = ctk.CTkCheckBox(
+            settings_frame, text="Route calls automatically between configured backends",
+            variable=routing_var, command=change_routing
+        )
+        routing_checkbox.pack(anchor="w", pady=(10, 0))
+        
         # OpenAI settings frame
         openai_frame = ctk.CTkFrame(settings_frame)
         if current_api_type == "openai":
@@ -1017,7 +932,7 @@ def open_settings():
         api_key_label = ctk.CTkLabel(openai_frame, text="OpenAI API Key:", font=ctk.CTkFont(weight="bold"))
         api_key_label.pack(anchor="w", pady=(10, 0))
         
-        current_key = app_settings.get_api_key()
+        current_key = settings_cache.get_api_key()
         masked_key = "•" * len(current_key) if current_key else ""
         
         api_key_entry = ctk.CTkEntry(openai_frame, width=300)
@@ -1034,7 +949,7 @@ def open_settings():
         model_label = ctk.CTkLabel(openai_frame, text="OpenAI Model:", font=ctk.CTkFont(weight="bold"))
         model_label.pack(anchor="w", pady=(10, 0))
         
-        model_var = ctk.StringVar(value=app_settings.get_model())
+        model_var = ctk.StringVar(value=settings_cache.get_model())
         models = ["gpt-3.5-turbo", "gpt-4", "gpt-4-turbo"]
         
         for model in models:
@@ -1043,7 +958,7 @@ def open_settings():
         
         def save_model():
             try:
-                app_settings.update_model(model_var.get())
+                settings_cache.update_model(model_var.get())
                 model_status_label.configure(text="Model saved successfully!", text_color="green")
             except Exception as e:
                 model_status_label.configure(text=f"Error saving model: {str(e)}", text_color="red")
@@ -1063,7 +978,7 @@ def open_settings():
         mini4o_key_label = ctk.CTkLabel(mini4o_frame, text="ChatGPT Mini 4o API Key:", font=ctk.CTkFont(weight="bold"))
         mini4o_key_label.pack(anchor="w", pady=(10, 0))
         
-        current_mini4o_key = app_settings.get_mini4o_api_key()
+        current_mini4o_key = settings_cache.get_mini4o_api_key()
         masked_mini4o_key = "•" * len(current_mini4o_key) if current_mini4o_key else ""
         
         mini4o_api_key_entry = ctk.CTkEntry(mini4o_frame, width=300)
@@ -1076,17 +991,311 @@ def open_settings():
         save_mini4o_button = ctk.CTkButton(mini4o_frame, text="Save Mini4o API Key", command=save_mini4o_api_key)
         save_mini4o_button.pack(pady=(0, 20))
         
+        # Local OpenAI-compatible server settings frame
+        local_frame = ctk.CTkFrame(settings_frame)
+        if current_api_type == "local":
+            local_frame.pack(fill="x", pady=(10, 0))
+        
+        local_label = ctk.CTkLabel(local_frame, text="Local Model Server:", font=ctk.CTkFont(weight="bold"))
+        local_label.pack(anchor="w", pady=(10, 0))
+        
+        new_profile_label = "New profile..."
+        active_profile = model_profiles.get_active_profile()
+        probed_profiles = {}  # Profiles probed in this window, with their model lists
+        
+        def profile_names():
+            return list(model_profiles.load_profiles()) + [new_profile_label]
+        
+        def show_profile(name):
+            profile = model_profiles.load_profiles().get(name)
+            for entry in (profile_name_entry, base_url_entry, profile_key_entry):
+                entry.delete(0, "end")
+            if profile is None:
+                profile_model_box.configure(values=[""])
+                profile_model_box.set("")
+                capabilities_label.configure(text="Enter a base URL, then probe the server", text_color="gray")
+                return
+            profile_name_entry.insert(0, profile.name)
+            base_url_entry.insert(0, profile.base_url)
+            profile_key_entry.insert(0, profile.api_key)
+            profile_model_box.configure(values=profile.models or [profile.model])
+            profile_model_box.set(profile.model)
+            capabilities_label.configure(text=model_profiles.describe_capabilities(profile.capabilities), text_color="gray")
+        
+        profile_var = ctk.StringVar(value=active_profile.name if active_profile else new_profile_label)
+        profile_menu = ctk.CTkOptionMenu(local_frame, variable=profile_var, values=profile_names(), command=show_profile)
+        profile_menu.pack(anchor="w", pady=(5, 0))
+        
+        profile_name_entry = ctk.CTkEntry(local_frame, width=300, placeholder_text="Profile name")
+        profile_name_entry.pack(pady=(5, 0), fill="x")
+        base_url_entry = ctk.CTkEntry(local_frame, width=300, placeholder_text="http://127.0.0.1:8080/v1")
+        base_url_entry.pack(pady=(5, 0), fill="x")
+        profile_key_entry = ctk.CTkEntry(local_frame, width=300, placeholder_text="API key (optional)", show="•")
+        profile_key_entry.pack(pady=(5, 0), fill="x")
+        profile_model_box = ctk.CTkComboBox(local_frame, width=300, values=[""])
+        profile_model_box.pack(pady=(5, 0), fill="x")
+        
+        capabilities_label = ctk.CTkLabel(local_frame, text="", text_color="gray", wraplength=420)
+        capabilities_label.pack(pady=(5, 0))
+        
+        def read_profile_form():
+            name = profile_name_entry.get().strip()
+            base_url = base_url_entry.get().strip()
+            if not name or not base_url.startswith(("http://", "https://")):
+                capabilities_label.configure(text="Enter a profile name and an http(s) base URL", text_color="red")
+                return None
+            profile = model_profiles.ModelProfile(
+                name, base_url, profile_key_entry.get().strip(), profile_model_box.get().strip()
+            )
+            # Keep the model list from the last probe of the same server
+            known = probed_profiles.get(name) or model_profiles.load_profiles().get(name)
+            if known and known.base_url == profile.base_url:
+                profile.models = known.models
+                profile.capabilities = known.capabilities
+            return profile
+        
+        def probe_profile():
+            profile = read_profile_form()
+            if profile is None:
+                return
+            capabilities_label.configure(text=f"Probing {profile.base_url}...", text_color="gray")
+            
+            def worker():
+                capabilities = model_profiles.probe_profile(profile, get_http_session())
+                
+                def show_probe_result():
+                    probed_profiles[profile.name] = profile
+                    profile_model_box.configure(values=profile.models or [profile.model])
+                    profile_model_box.set(profile.model)
+                    capabilities_label.configure(
+                        text=model_profiles.describe_capabilities(capabilities),
+                        text_color="green" if capabilities.get("chat") else "red"
+                    )
+                run_on_ui(show_probe_result)
+            
+            threading.Thread(target=worker, name="profile-probe", daemon=True).start()
+        
+        def save_local_profile():
+            try:
+                profile = read_profile_form()
+                if profile is None:
+                    return
+                if not profile.model:
+                    capabilities_label.configure(text="Choose a model (probe the server to list them)", text_color="red")
+                    return
+                model_profiles.save_profile(profile)
+                model_profiles.set_active_profile(profile.name)
+                profile_menu.configure(values=profile_names())
+                profile_var.set(profile.name)
+                capabilities_label.configure(text=f"Profile '{profile.name}' saved and in use", text_color="green")
+                if settings_cache.get_api_type() == "local":
+                    initialize_openai_client()
+            except Exception as e:
+                capabilities_label.configure(text=f"Error saving profile: {str(e)}", text_color="red")
+        
+        def delete_local_profile():
+            name = profile_var.get()
+            if name == new_profile_label:
+                return
+            model_profiles.delete_profile(name)
+            profile_menu.configure(values=profile_names())
+            profile_var.set(new_profile_label)
+            show_profile(new_profile_label)
+        
+        profile_button_row = ctk.CTkFrame(local_frame, fg_color="transparent")
+        profile_button_row.pack(pady=(5, 10))
+        ctk.CTkButton(profile_button_row, text="Probe", width=90, command=probe_profile).pack(side="left", padx=5)
+        ctk.CTkButton(profile_button_row, text="Save & Use", width=90, command=save_local_profile).pack(side="left", padx=5)
+        ctk.CTkButton(profile_button_row, text="Delete", width=90, command=delete_local_profile).pack(side="left", padx=5)
+        
+        show_profile(profile_var.get())
+        
+        # Speech recognition backend
+        from speech_backends import BACKEND_NAMES
+        from recording_engine import RECORDING_MODES
+        
+        speech_label = ctk.CTkLabel(settings_frame, text="Speech Recognition:", font=ctk.CTkFont(weight="bold"))
+        speech_label.pack(anchor="w", pady=(10, 0))
+        
+        speech_backend_var = ctk.StringVar(value=settings_cache.get_setting("speech_backend", "google"))
+        speech_backend_menu = ctk.CTkOptionMenu(settings_frame, values=BACKEND_NAMES, variable=speech_backend_var)
+        speech_backend_menu.pack(anchor="w", pady=(5, 0))
+        
+        recording_mode_var = ctk.StringVar(value=settings_cache.get_setting("recording_mode", "chunked"))
+        recording_mode_menu = ctk.CTkOptionMenu(settings_frame, values=list(RECORDING_MODES), variable=recording_mode_var)
+        recording_mode_menu.pack(anchor="w", pady=(5, 0))
+        
+        vosk_model_entry = ctk.CTkEntry(settings_frame, width=300, placeholder_text="Vosk model folder (for offline recognition)")
+        vosk_model_entry.pack(anchor="w", pady=(5, 0), fill="x")
+        vosk_model_entry.insert(0, settings_cache.get_setting("vosk_model_path", "") or "")
+        
+        speech_status_label = ctk.CTkLabel(settings_frame, text="", text_color="green")
+        speech_status_label.pack(pady=(5, 0))
+        
+        def save_speech_settings():
+            global speech_backend_chain
+            try:
+                settings_cache.update_setting("speech_backend", speech_backend_var.get())
+                settings_cache.update_setting("recording_mode", recording_mode_var.get())
+                settings_cache.update_setting("vosk_model_path", vosk_model_entry.get().strip())
+                # Rebuild the backend chain on the next recording
+                speech_backend_chain = None
+                
+                available = [backend.name for backend in get_speech_backends().active_backends()]
+                speech_status_label.configure(
+                    text=f"Saved. Available backends: {', '.join(available) or 'none'}",
+                    text_color="green" if speech_backend_var.get() in available else "orange"
+                )
+            except Exception as e:
+                speech_status_label.configure(text=f"Error saving speech settings: {str(e)}", text_color="red")
+        
+        save_speech_button = ctk.CTkButton(settings_frame, text="Save Speech Settings", command=save_speech_settings)
+        save_speech_button.pack(pady=(5, 10))
+        
+        # Conversation history settings
+        history_label = ctk.CTkLabel(settings_frame, text="Conversation History:", font=ctk.CTkFont(weight="bold"))
+        history_label.pack(anchor="w", pady=(10, 0))
+        
+        history_var = ctk.BooleanVar(value=is_history_mode())
+        history_checkbox = ctk.CTkCheckBox(
+            settings_frame, text="Send earlier rounds of the interview as context", variable=history_var
+        )
+        history_checkbox.pack(anchor="w", pady=(5, 0))
+        
+        fan_out_var = ctk.BooleanVar(value=is_feedback_fan_out())
+        fan_out_checkbox = ctk.CTkCheckBox(
+            settings_frame, text="Request feedback sections in parallel", variable=fan_out_var
+        )
+        fan_out_checkbox.pack(anchor="w", pady=(5, 0))
+        
+        budget_entry = ctk.CTkEntry(settings_frame, width=120, placeholder_text="Token budget")
+        budget_entry.pack(anchor="w", pady=(5, 0))
+        budget_entry.insert(0, str(settings_cache.get_setting("context_token_budget", DEFAULT_TOKEN_BUDGET)))
+        
+        history_status_label = ctk.CTkLabel(settings_frame, text="", text_color="green")
+        history_status_label.pack(pady=(5, 0))
+        
+        def save_history_settings():
+            try:
+                token_budget = int(budget_entry.get().strip())
+                if token_budget < 500:
+                    history_status_label.configure(text="Token budget must be at least 500", text_color="red")
+                    return
+                settings_cache.update_setting("conversation_history", history_var.get())
+                settings_cache.update_setting("feedback_fan_out", fan_out_var.get())
+                settings_cache.update_setting("context_token_budget", token_budget)
+                history_status_label.configure(text="Conversation settings saved!", text_color="green")
+            except ValueError:
+                history_status_label.configure(text="Token budget must be a whole number", text_color="red")
+            except Exception as e:
+                history_status_label.configure(text=f"Error saving settings: {str(e)}", text_color="red")
+        
+        save_history_button = ctk.CTkButton(settings_frame, text="Save Conversation Settings", command=save_history_settings)
+        save_history_button.pack(pady=(5, 10))
+        
+        # Completion cache settings
+        cache_label = ctk.CTkLabel(settings_frame, text="Response Cache:", font=ctk.CTkFont(weight="bold"))
+        cache_label.pack(anchor="w", pady=(10, 0))
+        
+        cache_var = ctk.BooleanVar(value=is_cache_enabled())
+        
+        def describe_cache():
+            cache = get_completion_cache()
+            if cache is None:
+                return "Cache unavailable"
+            stats = cache.get_stats()
+            return (f"{stats['stored_entries']} stored, hit rate {stats['hit_rate']:.0%}, "
+                    f"{stats['bytes_saved'] / 1024:.1f} KB saved this session")
+        
+        def change_cache():
+            settings_cache.update_setting("completion_cache", cache_var.get())
+        
+        cache_checkbox = ctk.CTkCheckBox(
+            settings_frame, text="Reuse stored feedback for identical answers",
+            variable=cache_var, command=change_cache
+        )
+        cache_checkbox.pack(anchor="w", pady=(5, 0))
+        
+        cache_status_label = ctk.CTkLabel(settings_frame, text=describe_cache(), text_color="gray")
+        cache_status_label.pack(pady=(5, 0))
+        
+        def clear_cache():
+            cache = get_completion_cache()
+            if cache is not None:
+                cache.clear()
+            cache_status_label.configure(text=describe_cache())
+        
+        clear_cache_button = ctk.CTkButton(settings_frame, text="Clear Cache", command=clear_cache)
+        clear_cache_button.pack(pady=(5, 10))
+        
+        # Token usage and latency of API calls
+        usage_label = ctk.CTkLabel(settings_frame, text="Usage & Latency:", font=ctk.CTkFont(weight="bold"))
+        usage_label.pack(anchor="w", pady=(10, 0))
+        
+        def describe_usage():
+            summary = interview_engine.call_metrics.get_summary()
+            lines = [
+                f"{summary['calls']} calls ({summary['cached']} cached, {summary['failed']} failed)",
+                f"{summary['prompt_tokens']} prompt + {summary['completion_tokens']} completion tokens, "
+                f"about ${summary['cost']:.4f}",
+                f"{summary['cached_tokens']} prompt tokens served from the provider's prompt cache "
+                f"({summary['cached_share']:.0%})",
+            ]
+            if interview_session is not None:
+                session_usage = interview_engine.call_metrics.get_session_usage(interview_session.session_id)
+                lines.append(f"This interview: {session_usage['prompt_tokens'] + session_usage['completion_tokens']} "
+                             f"tokens, about ${session_usage['cost']:.4f}")
+            for call_type, timings in sorted(summary["by_call_type"].items()):
+                parts = [f"{'first token' if name == 'ttft' else name} p50 {timing['p50']:.2f}s / p95 {timing['p95']:.2f}s"
+                         for name, timing in sorted(timings.items())]
+                lines.append(f"{call_type.capitalize()}: " + ", ".join(parts))
+            return "\n".join(lines)
+        
+        usage_status_label = ctk.CTkLabel(settings_frame, text=describe_usage(), text_color="gray", justify="left")
+        usage_status_label.pack(anchor="w", pady=(5, 0))
+        
+        metrics_log_var = ctk.BooleanVar(value=interview_engine.is_metrics_logging())
+        
+        def change_metrics_log():
+            settings_cache.update_setting("call_metrics_log", metrics_log_var.get())
+        
+        metrics_log_checkbox = ctk.CTkCheckBox(
+            settings_frame, text="Log every call to call_metrics.jsonl",
+            variable=metrics_log_var, command=change_metrics_log
+        )
+        metrics_log_checkbox.pack(anchor="w", pady=(5, 0))
+        
+        usage_buttons = ctk.CTkFrame(settings_frame, fg_color="transparent")
+        usage_buttons.pack(pady=(5, 10))
+        
+        def refresh_usage():
+            usage_status_label.configure(text=describe_usage())
+        
+        def export_metrics():
+            try:
+                path = os.path.join(current_dir, "call_metrics.prom")
+                interview_engine.call_metrics.export_prometheus(path)
+                usage_status_label.configure(text=describe_usage() + f"\nExported to {path}")
+            except Exception as e:
+                usage_status_label.configure(text=f"Error exporting metrics: {str(e)}")
+        
+        refresh_usage_button = ctk.CTkButton(usage_buttons, text="Refresh", width=100, command=refresh_usage)
+        refresh_usage_button.pack(side="left", padx=(0, 5))
+        
+        export_metrics_button = ctk.CTkButton(usage_buttons, text="Export Metrics", width=120, command=export_metrics)
+        export_metrics_button.pack(side="left", padx=(5, 0))
+        
         # Appearance mode
         appearance_label = ctk.CTkLabel(settings_frame, text="Appearance:", font=ctk.CTkFont(weight="bold"))
         appearance_label.pack(anchor="w", pady=(10, 0))
         
-        appearance_var = ctk.StringVar(value=app_settings.get_appearance_mode())
+        appearance_var = ctk.StringVar(value=settings_cache.get_appearance_mode())
         modes = ["dark", "light", "system"]
         
         def change_appearance():
             try:
                 mode = appearance_var.get()
-                app_settings.update_appearance_mode(mode)
+                settings_cache.update_appearance_mode(mode)
                 ctk.set_appearance_mode(mode)
             except Exception as e:
                 print(f"Error changing appearance: {str(e)}")
@@ -1112,24 +1321,30 @@ def open_settings():
 def main():
     """Main application setup with global error handling"""
     try:
-        global root, result, careerDropdown
+        global root, result, careerDropdown, transcript_view
         
         # Main application setup
         root = ctk.CTk()
-        root.geometry(app_settings.get_window_size())
+        root.geometry(settings_cache.get_window_size())
         root.title("AI Interview Bot")
         
         # Set appearance mode from settings
-        ctk.set_appearance_mode(app_settings.get_appearance_mode())
+        ctk.set_appearance_mode(settings_cache.get_appearance_mode())
         
         # Add menu bar
         menu_frame = ctk.CTkFrame(root, height=30)
         menu_frame.pack(fill="x")
         
         # Show active API indicator
-        api_type = app_settings.get_api_type()
+        api_type = settings_cache.get_api_type()
+        active_profile = model_profiles.get_active_profile()
         if api_type == "openai":
-            api_status = f"Using OpenAI API ({app_settings.get_model()})"
+            api_status = f"Using OpenAI API ({settings_cache.get_model()})"
+        elif api_type == "local":
+            if active_profile:
+                api_status = f"Using local model {active_profile.model or active_profile.name} ({active_profile.base_url})"
+            else:
+                api_status = "Using local model server (no profile selected)"
         else:
             api_status = "Using GPT-4o Mini API"
             
@@ -1172,32 +1387,45 @@ def main():
         
         result = ctk.CTkTextbox(root, font=ctk.CTkFont(size=15))
         result.pack(pady=10, fill='both', padx=100, ipady=100)
+        transcript_view = TranscriptView(result)
+        
+        # Start applying updates posted by worker threads
+        register_ui_handlers()
+        ui_bus.start(root.after)
         
         # Display current API information in the result textbox
-        api_type = app_settings.get_api_type()
+        api_type = settings_cache.get_api_type()
         if api_type == "openai":
-            api_key = app_settings.get_api_key()
-            model = app_settings.get_model()
+            api_key = settings_cache.get_api_key()
+            model = settings_cache.get_model()
             if api_key:
-                result.insert("end", f"Currently using OpenAI API with model: {model}\n")
-                result.insert("end", f"API key ending in: {api_key[-4:] if len(api_key) > 4 else '****'}\n\n")
+                transcript_view.append(f"Currently using OpenAI API with model: {model}\n")
+                transcript_view.append(f"API key ending in: {api_key[-4:] if len(api_key) > 4 else '****'}\n\n")
+            else:
+                transcript_view.append("OpenAI API key is not set. Please go to Settings to configure your API key.\n\n")
+        elif api_type == "local":
+            if active_profile:
+                transcript_view.append(f"Currently using local model profile '{active_profile.name}'"
+                                       f" with model: {active_profile.model or 'server default'}\n")
+                transcript_view.append(f"Server: {active_profile.base_url}\n\n")
             else:
-                result.insert("end", "OpenAI API key is not set. Please go to Settings to configure your API key.\n\n")
+                transcript_view.append("No local model profile is selected. Please go to Settings to add one.\n\n")
         else:
-            api_key = app_settings.get_mini4o_api_key()
+            api_key = settings_cache.get_mini4o_api_key()
             if api_key:
-                result.insert("end", "Currently using GPT-4o Mini API\n")
-                result.insert("end", f"API key ending in: {api_key[-4:] if len(api_key) > 4 else '****'}\n\n")
+                transcript_view.append("Currently using GPT-4o Mini API\n")
+                transcript_view.append(f"API key ending in: {api_key[-4:] if len(api_key) > 4 else '****'}\n\n")
             else:
-                result.insert("end", "GPT-4o Mini API key is not set. Please go to Settings to configure your API key.\n\n")
+                transcript_view.append("GPT-4o Mini API key is not set. Please go to Settings to configure your API key.\n\n")
         
         # Add instructions for voice input - only for response box now
-        result.insert("end", "You can use the microphone button (🎤) at the bottom to dictate your responses.\n")
-        result.insert("end", "Click the microphone once to start recording and again to stop.\n")
-        result.insert("end", "The microphone button will turn red while recording, and you'll see a blinking indicator.\n\n")
+        transcript_view.append("You can use the microphone button (🎤) at the bottom to dictate your responses.\n")
+        transcript_view.append("Click the microphone once to start recording and again to stop.\n")
+        transcript_view.append("The microphone button will turn red while recording, and a blinking indicator next to it shows your input level.\n\n")
         
-        # Check if API key is set
-        if not app_settings.get_api_key() and not app_settings.get_mini4o_api_key():
+        # Check if API key is set (a local model server needs only an active profile)
+        uses_local_profile = api_type == "local" and active_profile is not None
+        if not settings_cache.get_api_key() and not settings_cache.get_mini4o_api_key() and not uses_local_profile:
             # Open settings on first run if no API key
             root.after(100, open_settings)
         
@@ -1205,7 +1433,16 @@ def main():
         def on_closing():
             try:
                 window_size = f"{root.winfo_width()}x{root.winfo_height()}"
-                app_settings.update_window_size(window_size)
+                settings_cache.update_window_size(window_size)
+                settings_cache.flush()
+                print(f"UI bus stats: {ui_bus.get_stats()}")
+                print(f"Engine stats: {interview_engine.get_engine_stats()}")
+                interview_engine.close()
+                cancel_pending_completions()
+                if completion_executor:
+                    completion_executor.shutdown(wait=False, cancel_futures=True)
+                if priority_executor:
+                    priority_executor.shutdown(wait=False, cancel_futures=True)
                 root.destroy()
             except Exception as e:
                 print(f"Error on closing: {str(e)}")
@@ -1213,6 +1450,19 @@ def main():
         
         root.protocol("WM_DELETE_WINDOW", on_closing)
         
+        # Mark first paint once the window is mapped and its pending redraw has been
+        # flushed (an after(0) callback would run before Tk's idle redraw); the API
+        # client is built in the background after that
+        def on_first_paint(event):
+            # Child widgets' <Map> events reach the root binding too
+            if event.widget is not root or "first_paint" in startup_marks:
+                return
+            root.update_idletasks()
+            mark_startup("first_paint")
+            initialize_client_in_background()
+        
+        mark_startup("window_built")
+        root.bind("<Map>", on_first_paint, add="+")
         root.mainloop()
     except Exception as e:
         print(f"Fatal error in main function: {str(e)}\n{traceback.format_exc()}")
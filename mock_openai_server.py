@@ -0,0 +1,139 @@
+"""Minimal OpenAI-compatible stand-in server for trying the app without a real model.
+
+Run it and add a local model profile with the base URL http://127.0.0.1:8765/v1:
+
+    python mock_openai_server.py [port]
+
+It serves /v1/models and /v1/chat/completions (plain and streamed) with canned replies.
+
+For testing failure handling, faults can be queued on a server made by create_server():
+each request takes the next one and is delayed and/or answered with an error status and
+Retry-After header instead of the normal reply.
+
+    server = create_server(0)  # Ephemeral port: server.server_address[1]
+    server.add_fault(status=429, retry_after=1)
+    server.add_fault(delay=2.0)  # A slow but otherwise normal reply
+"""
+import json
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8765
+MODELS = ["mock-small", "mock-large"]
+REPLY = (
+    "1. Rating: 7/10\n"
+    "2. Feedback: A clear answer. Add a concrete example from your own experience.\n"
+    "3. Follow-up Question: Can you describe a time you applied this in practice?"
+)
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address):
+        super().__init__(address, MockHandler)
+        self.faults = deque()
+        self.fault_lock = threading.Lock()
+        self.requests = 0
+
+    def add_fault(self, status=None, retry_after=None, delay=0.0, count=1):
+        """Queue a fault for the next count requests: an error status (with Retry-After) and/or a delay"""
+        with self.fault_lock:
+            for _ in range(count):
+                self.faults.append({"status": status, "retry_after": retry_after, "delay": delay})
+
+    def clear_faults(self):
+        with self.fault_lock:
+            self.faults.clear()
+
+    def next_fault(self):
+        with self.fault_lock:
+            self.requests += 1
+            return self.faults.popleft() if self.faults else None
+
+class MockHandler(BaseHTTPRequestHandler):
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def apply_fault(self):
+        """Delay and/or fail this request if a fault is queued; returns True if an error was sent"""
+        fault = self.server.next_fault()
+        if not fault:
+            return False
+        if fault["delay"]:
+            time.sleep(fault["delay"])
+        if not fault["status"]:
+            return False
+        headers = {"Retry-After": str(fault["retry_after"])} if fault["retry_after"] is not None else None
+        self.send_json(fault["status"], {"error": {"message": f"Injected error {fault['status']}"}}, headers)
+        return True
+
+    def do_GET(self):
+        if self.apply_fault():
+            return
+        if self.path.rstrip("/") == "/v1/models":
+            self.send_json(200, {"object": "list", "data": [{"id": name, "object": "model"} for name in MODELS]})
+        else:
+            self.send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self.send_json(404, {"error": {"message": "Not found"}})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.apply_fault():
+            return
+        model = request.get("model", MODELS[0])
+        reply = REPLY[:request["max_tokens"] * 4] if request.get("max_tokens") else REPLY
+
+        if not request.get("stream"):
+            self.send_json(200, {
+                "id": "mock", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for index in range(0, len(reply), 8):
+            chunk = {
+                "id": "mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": {"content": reply[index:index + 8]}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        print(f"mock server: {format % args}")
+
+def create_server(port=DEFAULT_PORT):
+    """A mock server bound to 127.0.0.1 (port 0 picks a free port); call serve_forever() to run it"""
+    return MockServer(("127.0.0.1", port))
+
+def run(port=DEFAULT_PORT):
+    server = create_server(port)
+    print(f"Mock OpenAI-compatible server listening on http://127.0.0.1:{server.server_address[1]}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT)
@@ -0,0 +1,139 @@
+"""Profiles for OpenAI-compatible servers such as a local llama.cpp or vLLM instance.
+
+A profile holds a base URL, an optional API key, the model to use and the models and
+capabilities found by the last probe. Profiles are stored through settings_cache under
+"model_profiles" and the one used by the "local" API type is named by "active_profile".
+"""
+import time
+
+import settings_cache
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+LOCAL_API_KEY = "not-needed"  # Local servers usually ignore the key, but the SDK requires one
+PROBE_TIMEOUT = 5.0
+
+def chat_completions_url(base_url):
+    return base_url.rstrip("/") + "/chat/completions"
+
+class ModelProfile:
+    """Connection settings for one OpenAI-compatible server"""
+
+    def __init__(self, name, base_url, api_key="", model="", models=None, capabilities=None):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.models = list(models or [])  # Model ids reported by the server's /models endpoint
+        self.capabilities = dict(capabilities or {})  # Result of the last probe
+
+    def effective_api_key(self):
+        return self.api_key or LOCAL_API_KEY
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "base_url": self.base_url,
+            "api_key": self.api_key,
+            "model": self.model,
+            "models": self.models,
+            "capabilities": self.capabilities,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data.get("name", ""), data.get("base_url", ""), data.get("api_key", ""),
+            data.get("model", ""), data.get("models"), data.get("capabilities")
+        )
+
+def load_profiles():
+    """All saved profiles, keyed by name"""
+    profiles = {}
+    for data in settings_cache.get_setting("model_profiles", []) or []:
+        try:
+            profile = ModelProfile.from_dict(data)
+            if profile.name and profile.base_url:
+                profiles[profile.name] = profile
+        except Exception as e:
+            print(f"Skipping invalid model profile: {str(e)}")
+    return profiles
+
+def save_profile(profile):
+    """Add or replace a profile"""
+    profiles = load_profiles()
+    profiles[profile.name] = profile
+    settings_cache.update_setting("model_profiles", [p.to_dict() for p in profiles.values()])
+
+def delete_profile(name):
+    profiles = load_profiles()
+    if profiles.pop(name, None) is not None:
+        settings_cache.update_setting("model_profiles", [p.to_dict() for p in profiles.values()])
+    if settings_cache.get_setting("active_profile", "") == name:
+        settings_cache.update_setting("active_profile", "")
+
+def get_active_profile():
+    """The profile used by the "local" API type, or None"""
+    return load_profiles().get(settings_cache.get_setting("active_profile", ""))
+
+def set_active_profile(name):
+    settings_cache.update_setting("active_profile", name)
+
+def probe_profile(profile, session=None, timeout=PROBE_TIMEOUT):
+    """Check what a server supports: reachability, model list, chat and streaming
+
+    Returns a capabilities dict; the profile's models and capabilities are updated too.
+    """
+    if session is None:
+        import requests
+        session = requests.Session()
+
+    capabilities = {"reachable": False, "chat": False, "streaming": False, "error": "", "probed_at": time.time()}
+    headers = {"Authorization": f"Bearer {profile.effective_api_key()}", "Content-Type": "application/json"}
+    try:
+        # Model list; servers that host a single model may not implement it
+        started = time.perf_counter()
+        response = session.get(f"{profile.base_url}/models", headers=headers, timeout=timeout)
+        capabilities["reachable"] = True
+        capabilities["latency"] = round(time.perf_counter() - started, 3)
+        if response.status_code == 200:
+            models = [item.get("id") for item in response.json().get("data", []) if item.get("id")]
+            profile.models = models
+            if models and profile.model not in models:
+                profile.model = models[0]
+
+        # A one-token completion shows whether chat works with the selected model
+        data = {"model": profile.model, "messages": [{"role": "user", "content": "Hi"}], "max_tokens": 1}
+        response = session.post(chat_completions_url(profile.base_url), json=data, headers=headers, timeout=timeout)
+        capabilities["chat"] = response.status_code == 200
+        if not capabilities["chat"]:
+            capabilities["error"] = f"Chat request failed with status code {response.status_code}"
+        else:
+            data["stream"] = True
+            response = session.post(chat_completions_url(profile.base_url), json=data, headers=headers,
+                                    timeout=timeout, stream=True)
+            try:
+                capabilities["streaming"] = (
+                    response.status_code == 200
+                    and "text/event-stream" in response.headers.get("Content-Type", "")
+                )
+            finally:
+                response.close()
+    except Exception as e:
+        capabilities["error"] = str(e)
+
+    profile.capabilities = capabilities
+    return capabilities
+
+def describe_capabilities(capabilities):
+    """One-line summary of a probe result for the settings window"""
+    if not capabilities:
+        return "Not probed yet"
+    if not capabilities.get("reachable"):
+        return f"Unreachable: {capabilities.get('error', '')}"
+    parts = ["chat" if capabilities.get("chat") else "no chat"]
+    parts.append("streaming" if capabilities.get("streaming") else "no streaming")
+    if capabilities.get("latency") is not None:
+        parts.append(f"{capabilities['latency'] * 1000:.0f} ms")
+    if capabilities.get("error"):
+        parts.append(capabilities["error"])
+    return ", ".join(parts)
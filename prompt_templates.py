@@ -0,0 +1,144 @@
+"""Versioned prompt templates, loaded from files and compiled once at startup.
+
+Each template file in prompts/ (and in the optional directory named by the
+prompt_template_dir setting) looks like this:
+
+    # name: feedback
+    # version: 2
+    Static instructions, identical for every request...
+    ---
+    Variable part: $career, $question, $answer
+
+The part above the --- line may only use constants known at compile time (such as the
+feedback format instructions), so it renders to exactly the same text for every
+request. Everything that changes per request goes below the line and ends up last.
+Providers cache prompt prefixes, so identical leading instructions can be served from
+their cache at a lower price. The cached token counts they report appear in
+call_metrics.
+
+Several versions of a template can be loaded at once. The newest one is used unless
+the prompt_versions setting pins a name to a specific version.
+"""
+import glob
+import os
+import re
+import string
+import threading
+
+import settings_cache
+from structured_feedback import FEEDBACK_FORMAT_INSTRUCTIONS
+
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+SEPARATOR = "---"
+
+class PromptTemplate:
+    """A compiled template: fixed prefix text plus a string.Template for the variable part"""
+
+    def __init__(self, name, version, static_text, variable_text, constants=None, path=None):
+        self.name = name
+        self.version = version
+        self.path = path
+        static = string.Template(static_text)
+        missing = [field for field in placeholders(static_text) if field not in (constants or {})]
+        if missing:
+            raise ValueError(f"Template '{name}' v{version} uses {', '.join(missing)} before the '{SEPARATOR}' line; "
+                             "only constants may appear in the static part")
+        self.prefix = static.substitute(constants or {})
+        self.variable = string.Template(variable_text)
+        self.fields = placeholders(variable_text)
+
+    def render(self, **values):
+        """Prefix followed by the variable part filled in with values"""
+        missing = [field for field in self.fields if field not in values]
+        if missing:
+            raise KeyError(f"Template '{self.name}' needs {', '.join(missing)}")
+        return self.prefix + self.variable.substitute(values)
+
+def placeholders(text):
+    """Names of the $placeholders in a template text, in order of appearance"""
+    names = []
+    for match in string.Template.pattern.finditer(text):
+        name = match.group("named") or match.group("braced")
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def parse_template_file(path, constants=None):
+    """Read one template file into a PromptTemplate"""
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+
+    metadata = {}
+    while lines and lines[0].startswith("#"):
+        key, _, value = lines.pop(0).lstrip("#").partition(":")
+        metadata[key.strip().lower()] = value.strip()
+    if SEPARATOR not in lines:
+        raise ValueError(f"{path} has no '{SEPARATOR}' line between the static and variable parts")
+    split = lines.index(SEPARATOR)
+
+    name = metadata.get("name") or re.sub(r"\.v\d+$", "", os.path.splitext(os.path.basename(path))[0])
+    return PromptTemplate(
+        name, int(metadata.get("version", 1)),
+        "\n".join(lines[:split]) + "\n", "\n".join(lines[split + 1:]),
+        constants, path
+    )
+
+class PromptRegistry:
+    """All loaded template versions by name"""
+
+    def __init__(self, constants=None):
+        self.constants = dict(constants or {})
+        self.templates = {}  # name -> {version: PromptTemplate}
+
+    def load_directory(self, directory):
+        """Load every *.txt template in a directory; broken files are reported and skipped"""
+        loaded = 0
+        for path in sorted(glob.glob(os.path.join(directory, "*.txt"))):
+            try:
+                template = parse_template_file(path, self.constants)
+            except Exception as e:
+                print(f"Error loading prompt template {path}: {str(e)}")
+                continue
+            self.templates.setdefault(template.name, {})[template.version] = template
+            loaded += 1
+        return loaded
+
+    def get(self, name, version=None):
+        """The pinned or newest version of a template"""
+        versions = self.templates.get(name)
+        if not versions:
+            raise KeyError(f"No prompt template named '{name}'")
+        if version is None:
+            version = (settings_cache.get_setting("prompt_versions", {}) or {}).get(name)
+        if version is not None and int(version) in versions:
+            return versions[int(version)]
+        return versions[max(versions)]
+
+    def render(self, name, **values):
+        return self.get(name).render(**values)
+
+    def describe(self):
+        """Loaded versions per template name"""
+        return {name: sorted(versions) for name, versions in self.templates.items()}
+
+registry = None
+registry_lock = threading.Lock()
+
+def get_registry():
+    """Return the prompt registry, loading and compiling the templates on first use"""
+    global registry
+
+    with registry_lock:
+        if registry is None:
+            new_registry = PromptRegistry({"feedback_format": FEEDBACK_FORMAT_INSTRUCTIONS})
+            new_registry.load_directory(PROMPTS_DIR)
+            extra_dir = settings_cache.get_setting("prompt_template_dir", "")
+            if extra_dir and os.path.isdir(extra_dir):
+                new_registry.load_directory(extra_dir)
+            print(f"Prompt templates loaded: {new_registry.describe()}")
+            registry = new_registry
+        return registry
+
+def render_prompt(name, **values):
+    """Render the current version of a template"""
+    return get_registry().render(name, **values)
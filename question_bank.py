@@ -0,0 +1,167 @@
+"""Persistent bank of generated interview questions, keyed by job title and model.
+
+Questions are generated in bulk and stored in SQLite so that roles the user practises
+often can start instantly, and without a network connection. Draws are random but do
+not repeat a question until every stored question for the role has been served.
+Old questions expire after a TTL and the least recently used roles are evicted once
+the bank holds too many.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from prompt_templates import render_prompt
+
+DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "question_bank.db")
+QUESTION_TTL = 30 * 24 * 3600  # Seconds before a stored question expires
+MAX_ROLES = 200  # Least recently used roles beyond this are evicted
+MAX_QUESTIONS_PER_ROLE = 50
+
+def normalize_job_title(title):
+    """Normalize a job title so that 'Senior  Data-Engineer ' and 'senior data engineer' match"""
+    title = re.sub(r"[^\w\s]", " ", title.lower())
+    return " ".join(title.split())
+
+def build_question_list_prompt(career, count):
+    """Prompt asking for several distinct interview questions in one request"""
+    return render_prompt("question_list", career=career, count=count)
+
+def parse_question_list(text):
+    """Split a bulk completion into individual questions, dropping numbering and bullets"""
+    questions = []
+    for line in text.splitlines():
+        line = re.sub(r"^\s*(?:\d+[.)]|[-*•])\s*", "", line).strip()
+        if len(line) > 10 and line not in questions:
+            questions.append(line)
+    return questions
+
+class QuestionBank:
+    """SQLite-backed question cache with random non-repeating draws and TTL/LRU eviction"""
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY,
+                role TEXT NOT NULL,
+                model TEXT NOT NULL,
+                question TEXT NOT NULL,
+                created REAL NOT NULL,
+                served_count INTEGER NOT NULL DEFAULT 0,
+                UNIQUE (role, model, question)
+            );
+            CREATE TABLE IF NOT EXISTS roles (
+                role TEXT NOT NULL,
+                model TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (role, model)
+            );
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+        self.connection.commit()
+
+    def _bump(self, name, amount=1):
+        self.connection.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def _touch(self, role, model):
+        self.connection.execute(
+            "INSERT INTO roles (role, model, last_used) VALUES (?, ?, ?) "
+            "ON CONFLICT (role, model) DO UPDATE SET last_used = excluded.last_used",
+            (role, model, time.time()),
+        )
+
+    def draw(self, career, model):
+        """Return a random stored question for this role, or None on a miss
+
+        Only questions with the lowest serve count are considered, so nothing repeats
+        until the whole set for the role has been used."""
+        role = normalize_job_title(career)
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT id, question FROM questions WHERE role = ? AND model = ? AND created > ? "
+                "AND served_count = (SELECT MIN(served_count) FROM questions WHERE role = ? AND model = ? AND created > ?) "
+                "ORDER BY RANDOM() LIMIT 1",
+                (role, model, time.time() - QUESTION_TTL, role, model, time.time() - QUESTION_TTL),
+            ).fetchone()
+            if row is None:
+                self._bump("misses")
+                self.connection.commit()
+                return None
+
+            self.connection.execute("UPDATE questions SET served_count = served_count + 1 WHERE id = ?", (row[0],))
+            self._touch(role, model)
+            self._bump("hits")
+            self.connection.commit()
+            return row[1]
+
+    def add_questions(self, career, model, questions):
+        """Store freshly generated questions for this role and evict what no longer fits"""
+        role = normalize_job_title(career)
+        now = time.time()
+        with self.lock:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO questions (role, model, question, created) VALUES (?, ?, ?, ?)",
+                [(role, model, question, now) for question in questions],
+            )
+            added = self.connection.total_changes - before
+            self._touch(role, model)
+            self._bump("questions_added", added)
+            self._evict(role, model)
+            self.connection.commit()
+            return added
+
+    def unserved_count(self, career, model):
+        """Number of live questions for this role that have not been served yet"""
+        role = normalize_job_title(career)
+        with self.lock:
+            return self.connection.execute(
+                "SELECT COUNT(*) FROM questions WHERE role = ? AND model = ? AND created > ? AND served_count = 0",
+                (role, model, time.time() - QUESTION_TTL),
+            ).fetchone()[0]
+
+    def _evict(self, role, model):
+        # Expired questions go first
+        self.connection.execute("DELETE FROM questions WHERE created <= ?", (time.time() - QUESTION_TTL,))
+
+        # Cap each role, dropping the most served (then oldest) questions
+        self.connection.execute(
+            "DELETE FROM questions WHERE id IN (SELECT id FROM questions WHERE role = ? AND model = ? "
+            "ORDER BY served_count ASC, created DESC LIMIT -1 OFFSET ?)",
+            (role, model, MAX_QUESTIONS_PER_ROLE),
+        )
+
+        # Evict least recently used roles
+        stale_roles = self.connection.execute(
+            "SELECT role, model FROM roles ORDER BY last_used DESC LIMIT -1 OFFSET ?", (MAX_ROLES,)
+        ).fetchall()
+        for stale_role, stale_model in stale_roles:
+            self.connection.execute("DELETE FROM questions WHERE role = ? AND model = ?", (stale_role, stale_model))
+            self.connection.execute("DELETE FROM roles WHERE role = ? AND model = ?", (stale_role, stale_model))
+        if stale_roles:
+            self._bump("roles_evicted", len(stale_roles))
+
+    def stats(self):
+        """Hit/miss counters and size of the bank"""
+        with self.lock:
+            stats = dict(self.connection.execute("SELECT name, value FROM counters").fetchall())
+            stats["questions"] = self.connection.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+            stats["roles"] = self.connection.execute("SELECT COUNT(*) FROM roles").fetchone()[0]
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        stats["hit_rate"] = stats.get("hits", 0) / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
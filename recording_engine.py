@@ -0,0 +1,273 @@
+"""Single configurable engine behind the microphone button.
+
+All recording modes share the same microphone setup, ambient-noise calibration and
+thread lifecycle. Capture runs on one thread and feeds a bounded queue of audio chunks
+to a pool of recognition workers; results are re-ordered by sequence number before
+they are reported. Ambient noise is calibrated once per input device and reused, so
+only the first click of the mic button pays the calibration delay.
+
+The engine knows nothing about Tk: progress is reported through callbacks that run on
+the engine's threads, and the caller is responsible for marshalling them to the UI.
+"""
+import array
+import math
+import queue
+import sys
+import threading
+import time
+
+import speech_recognition as sr
+
+CALIBRATION_DURATION = 0.5  # Seconds of ambient noise sampled on first use of a device
+RECOGNITION_WORKERS = 3
+RECOGNITION_QUEUE_SIZE = 8  # Captured chunks waiting for a recognition worker
+LEVEL_INTERVAL = 0.1  # Seconds between input level reports
+LEVEL_FULL_SCALE = 4.0  # RMS this many times the energy threshold shows as a full meter
+
+def rms_level(raw_data, sample_width):
+    """Root mean square amplitude of a buffer of 16-bit PCM audio"""
+    if sample_width != 2 or len(raw_data) < 2:
+        return 0.0
+    samples = array.array("h", raw_data[:len(raw_data) - len(raw_data) % 2])
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+
+class RecordingMode:
+    """Listening parameters for one recording style"""
+
+    def __init__(self, name, energy_floor, pause_threshold, timeout, phrase_time_limit,
+                 max_duration=None, echo_chunks=False, summarize=False):
+        self.name = name
+        self.energy_floor = energy_floor  # Lower bound for the calibrated energy threshold
+        self.pause_threshold = pause_threshold
+        self.timeout = timeout
+        self.phrase_time_limit = phrase_time_limit
+        self.max_duration = max_duration  # Seconds, or None to record until stopped
+        self.echo_chunks = echo_chunks  # Report each recognized chunk as a status message
+        self.summarize = summarize  # Report the full transcript as a status message at the end
+
+RECORDING_MODES = {
+    # Short phrases, transcript shown in the response entry as it grows
+    "chunked": RecordingMode("chunked", 150, 0.8, 5, 10, max_duration=180),
+    # Long answers with natural pauses, full transcript echoed at the end
+    "long-form": RecordingMode("long-form", 100, 0.8, 5, 10, max_duration=180, summarize=True),
+    # Very short phrases for near real-time display, until stopped
+    "continuous": RecordingMode("continuous", 300, 0.3, 3, 3, echo_chunks=True),
+}
+
+class RecordingEngine:
+    """Records from the microphone and transcribes in the background
+
+    get_backends returns the speech backend chain to use. on_text receives the full
+    transcript of the current recording (including a partial hypothesis for the phrase
+    being spoken, if the backend streams), on_status receives short messages for the
+    transcript area, on_level receives the input level (0.0 to 1.0) about ten times a
+    second while speech is captured and on_finished receives the final text when the
+    recording ends.
+    """
+
+    def __init__(self, get_backends, on_text=None, on_status=None, on_finished=None, on_level=None,
+                 device_index=None):
+        self.get_backends = get_backends
+        self.on_text = on_text or (lambda text: None)
+        self.on_status = on_status or (lambda message: None)
+        self.on_finished = on_finished or (lambda text: None)
+        self.on_level = on_level or (lambda level: None)
+        self.device_index = device_index
+        self.recognizer = sr.Recognizer()
+        self.calibrations = {}  # Device index -> calibrated energy threshold
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.last_level_time = 0.0
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, mode_name="chunked"):
+        """Start recording in the background; returns False if a recording is already running"""
+        with self.lock:
+            if self.is_running():
+                return False
+            mode = RECORDING_MODES.get(mode_name, RECORDING_MODES["chunked"])
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.run, args=(mode,), name="recording", daemon=True)
+            self.thread.start()
+            return True
+
+    def stop(self):
+        """Ask the recording to stop; chunks already captured are still transcribed"""
+        self.stop_event.set()
+
+    def recalibrate(self):
+        """Forget the stored ambient-noise levels so the next recording measures them again"""
+        self.calibrations.clear()
+
+    def calibrate(self, source):
+        threshold = self.calibrations.get(self.device_index)
+        if threshold is None:
+            self.recognizer.adjust_for_ambient_noise(source, duration=CALIBRATION_DURATION)
+            threshold = self.recognizer.energy_threshold
+            self.calibrations[self.device_index] = threshold
+            print(f"Ambient noise calibrated (energy threshold {threshold:.0f})")
+        return threshold
+
+    def report_level(self, raw_data, sample_width):
+        now = time.time()
+        if now - self.last_level_time < LEVEL_INTERVAL:
+            return
+        self.last_level_time = now
+        full_scale = max(self.recognizer.energy_threshold, 1) * LEVEL_FULL_SCALE
+        self.on_level(min(1.0, rms_level(raw_data, sample_width) / full_scale))
+
+    def run(self, mode):
+        results_lock = threading.Lock()
+        pending_results = {}  # Sequence number -> recognized text (or None) waiting for earlier chunks
+        next_sequence = [0]
+        recognized_parts = []
+        audio_queue = queue.Queue(maxsize=RECOGNITION_QUEUE_SIZE)
+
+        def current_text(partial=""):
+            with results_lock:
+                return " ".join(recognized_parts + ([partial] if partial else []))
+
+        def publish_in_order(sequence, text):
+            # Release every result that is now contiguous with what has been reported
+            released = []
+            with results_lock:
+                pending_results[sequence] = text
+                while next_sequence[0] in pending_results:
+                    part = pending_results.pop(next_sequence[0])
+                    next_sequence[0] += 1
+                    if part:
+                        recognized_parts.append(part)
+                        released.append(part)
+            if released:
+                self.on_text(current_text())
+                if mode.echo_chunks:
+                    for part in released:
+                        self.on_status(f"Recognized: {part}")
+
+        def recognition_worker():
+            while True:
+                item = audio_queue.get()
+                if item is None:
+                    break
+                sequence, audio = item
+                text = None
+                try:
+                    text = self.get_backends().transcribe(audio)
+                except sr.UnknownValueError:
+                    # No recognizable speech in this chunk
+                    pass
+                except Exception as e:
+                    print(f"Recognition error: {repr(e)}")
+                    self.on_status(f"Recognition error: {e}")
+                finally:
+                    # Always publish, even empty results, so later chunks are not held back
+                    publish_in_order(sequence, text)
+
+        def capture_phrase(source, stream=None):
+            # Capture one phrase buffer by buffer, reporting the input level as it goes.
+            # With a streaming backend each buffer is also fed to it for partial results;
+            # the buffers are kept either way so the phrase survives a failing stream.
+            # Returns the phrase audio and the stream's error, if it failed.
+            frames = []
+            stream_error = None
+            for chunk in self.recognizer.listen(source, timeout=mode.timeout,
+                                                phrase_time_limit=mode.phrase_time_limit, stream=True):
+                raw_data = chunk.get_raw_data()
+                self.report_level(raw_data, source.SAMPLE_WIDTH)
+                frames.append(raw_data)
+                if stream is None or stream_error is not None:
+                    continue
+                try:
+                    partial = stream.accept(raw_data)
+                except Exception as e:
+                    stream_error = e
+                    continue
+                if partial:
+                    self.on_text(current_text(partial))
+            self.on_level(0.0)
+            return b"".join(frames), stream_error
+
+        workers = [
+            threading.Thread(target=recognition_worker, name=f"recognition-{i}", daemon=True)
+            for i in range(RECOGNITION_WORKERS)
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            with sr.Microphone(device_index=self.device_index) as source:
+                threshold = self.calibrate(source)
+                self.recognizer.energy_threshold = max(threshold, mode.energy_floor)
+                self.recognizer.dynamic_energy_threshold = True
+                self.recognizer.pause_threshold = mode.pause_threshold
+
+                start_time = time.time()
+                sequence = 0
+                while not self.stop_event.is_set():
+                    if mode.max_duration and time.time() - start_time >= mode.max_duration:
+                        break
+                    try:
+                        backends = self.get_backends()
+                        streaming_backend = backends.streaming_backend()
+                        if streaming_backend is not None:
+                            # Local streaming backend: transcribe inline with live partial results
+                            stream = None
+                            error = None
+                            try:
+                                stream = streaming_backend.create_stream(source.SAMPLE_RATE)
+                            except Exception as e:
+                                error = e
+                            raw_data, stream_error = capture_phrase(source, stream)
+                            error = error or stream_error
+                            if error is None:
+                                try:
+                                    text = stream.finish()
+                                except Exception as e:
+                                    error = e
+                            if error is None:
+                                publish_in_order(sequence, text)
+                            else:
+                                # Hand the buffered phrase to the workers so the chain falls
+                                # back to the next backend instead of losing it
+                                backends.mark_failed(streaming_backend, error)
+                                audio = sr.AudioData(raw_data, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                                audio_queue.put((sequence, audio))
+                        else:
+                            # Capture the next phrase; transcription happens on the workers
+                            raw_data, _ = capture_phrase(source)
+                            audio = sr.AudioData(raw_data, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                            audio_queue.put((sequence, audio))
+                        sequence += 1
+                    except sr.WaitTimeoutError:
+                        # Silence; keep listening if still recording
+                        continue
+                    except Exception as e:
+                        print(f"Listening error: {repr(e)}")
+                        self.on_status(f"Recording error: {e}")
+                        break
+        except Exception as e:
+            print(f"Recording error details: {repr(e)}")
+            self.on_status(f"Recording error: {e}")
+
+        self.on_level(0.0)
+
+        # Let the workers drain the queue, then stop them
+        for _ in workers:
+            audio_queue.put(None)
+        for worker in workers:
+            worker.join()
+
+        full_text = current_text()
+        print("Recording complete, final text:", full_text)
+        if not full_text:
+            self.on_status("No speech was recognized.")
+        elif mode.summarize:
+            self.on_status("Full Recording Processed:\n" + full_text)
+        else:
+            self.on_status("Recording complete.")
+        self.on_finished(full_text)
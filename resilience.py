@@ -0,0 +1,324 @@
+"""Timeouts, retries, circuit breaking and request hedging for completion calls.
+
+Each API backend gets a BackendGuard. A call goes through the guard as a send(timeout)
+function that performs one attempt, so the same policy works for the OpenAI client, the
+direct requests path and a local mock server alike:
+
+- every attempt gets separate connect and read timeouts,
+- retryable failures (429, 5xx, connection errors, timeouts) are retried with
+  exponential backoff and full jitter, waiting at least as long as Retry-After asks,
+- a circuit breaker stops sending to a backend after repeated failures and lets a
+  single trial request through once the reset timeout has passed,
+- a non-streaming attempt that is slower than the recent latency percentile of its call
+  type on that backend gets a hedged second request, and whichever finishes first wins.
+  Latencies are tracked per call type, so a long call is never judged against short
+  ones, and the answer of the losing request is handed to an on_discard callback so
+  its token usage can still be accounted for.
+
+Streaming calls are only retried while no tokens have been delivered yet.
+"""
+import queue
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError", "APITimeoutError", "ConnectionError", "ConnectTimeout",
+    "ReadTimeout", "Timeout", "TimeoutError", "ChunkedEncodingError", "RemoteDisconnected",
+}
+MAX_RETRY_AFTER = 60.0  # Never wait longer than this for a Retry-After header
+LATENCY_WINDOW = 100
+MIN_HEDGE_SAMPLES = 20  # Latencies needed before the percentile is trusted for hedging
+
+class ResiliencePolicy:
+    """Tunable settings for a BackendGuard"""
+
+    def __init__(self, connect_timeout=5.0, read_timeout=60.0, max_attempts=3, base_delay=0.5,
+                 max_delay=8.0, failure_threshold=5, reset_timeout=30.0, hedging=True,
+                 hedge_percentile=0.95):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hedging = hedging
+        self.hedge_percentile = hedge_percentile
+
+class RetryableError(Exception):
+    """An attempt failed in a way that is worth retrying (raised by send functions)"""
+
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class CircuitOpenError(Exception):
+    """The backend's circuit breaker is open, so the call was not attempted"""
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def classify_error(error):
+    """Return (retryable, retry_after) for an exception raised by an attempt"""
+    if isinstance(error, RetryableError):
+        return True, error.retry_after
+
+    # OpenAI SDK status errors carry the HTTP status and response headers
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        return status_code in RETRY_STATUSES, parse_retry_after(headers.get("retry-after"))
+
+    if isinstance(error, (ConnectionError, TimeoutError)) or type(error).__name__ in RETRYABLE_ERROR_NAMES:
+        return True, None
+    return False, None
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures -> half-open trial after a cool-down"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = "half-open"
+                self.trial_in_flight = False
+            if self.state == "half-open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state = "closed"
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def release(self):
+        """End a half-open trial that neither proved nor disproved the backend's health"""
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"Circuit breaker opened after {self.failures} failures")
+                self.state = "open"
+                self.opened_at = time.time()
+                self.trial_in_flight = False
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, fraction):
+        with self.lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def count(self):
+        with self.lock:
+            return len(self.samples)
+
+class BackendGuard:
+    """Applies a ResiliencePolicy to every call made to one backend"""
+
+    def __init__(self, name, policy=None):
+        self.name = name
+        self.policy = policy or ResiliencePolicy()
+        self.breaker = CircuitBreaker(self.policy.failure_threshold, self.policy.reset_timeout)
+        self.latencies = {}  # call_type -> LatencyTracker
+        self.latencies_lock = threading.Lock()
+        self.stats = {"calls": 0, "attempts": 0, "retries": 0, "hedges": 0, "hedge_wins": 0,
+                      "hedge_discards": 0, "failures": 0, "rejected": 0}
+        self.stats_lock = threading.Lock()
+
+    def update_policy(self, policy):
+        """Switch to new settings, keeping the breaker state and latency history"""
+        self.policy = policy
+        self.breaker.failure_threshold = policy.failure_threshold
+        self.breaker.reset_timeout = policy.reset_timeout
+
+    def bump(self, name, amount=1):
+        with self.stats_lock:
+            self.stats[name] += amount
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """Exponential backoff with full jitter, never shorter than Retry-After"""
+        delay = random.uniform(0, min(self.policy.max_delay, self.policy.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, MAX_RETRY_AFTER))
+        return delay
+
+    def get_latency(self, call_type=None):
+        with self.latencies_lock:
+            if call_type not in self.latencies:
+                self.latencies[call_type] = LatencyTracker()
+            return self.latencies[call_type]
+
+    def hedge_delay(self, call_type=None):
+        latency = self.get_latency(call_type)
+        if not self.policy.hedging or latency.count() < MIN_HEDGE_SAMPLES:
+            return None
+        return latency.percentile(self.policy.hedge_percentile)
+
+    def attempt(self, send, streaming, call_type=None, on_discard=None):
+        timeout = (self.policy.connect_timeout, self.policy.read_timeout)
+        hedge_after = None if streaming else self.hedge_delay(call_type)
+        if hedge_after is None:
+            return send(timeout)
+
+        # Hedged attempt: start a second identical request if the first is unusually slow.
+        # Each request gets its own thread rather than a shared pool, so requests never
+        # queue behind other calls and time spent queued cannot trigger extra hedges.
+        results = queue.Queue()
+        settled_lock = threading.Lock()
+        settled = []  # Set once a winner has been returned
+
+        def discard(result):
+            self.bump("hedge_discards")
+            if on_discard is not None:
+                try:
+                    on_discard(result)
+                except Exception as e:
+                    print(f"{self.name}: error handling a discarded hedged result: {str(e)}")
+
+        def run(index):
+            try:
+                outcome = (index, send(timeout), None)
+            except Exception as e:
+                outcome = (index, None, e)
+            with settled_lock:
+                if not settled:
+                    results.put(outcome)
+                    return
+            # Finished after the other request won: its answer was still produced (and billed)
+            if outcome[2] is None:
+                discard(outcome[1])
+
+        def start(index):
+            threading.Thread(target=run, args=(index,), name=f"{self.name}-attempt", daemon=True).start()
+
+        start(0)
+        started = 1
+        try:
+            outcome = results.get(timeout=hedge_after)
+        except queue.Empty:
+            print(f"{self.name}: no response after {hedge_after:.2f}s, sending hedged request")
+            self.bump("hedges")
+            start(1)
+            started = 2
+            outcome = results.get()
+
+        first_error = None
+        for finished in range(started):
+            if finished:
+                outcome = results.get()
+            index, result, error = outcome
+            if error is None:
+                if index != 0:
+                    self.bump("hedge_wins")
+                with settled_lock:
+                    settled.append(index)
+                # The other request may have finished too before the call was settled
+                while True:
+                    try:
+                        _, late_result, late_error = results.get_nowait()
+                    except queue.Empty:
+                        break
+                    if late_error is None:
+                        discard(late_result)
+                return result
+            first_error = first_error or error
+        raise first_error
+
+    def call(self, send, streaming=False, call_type=None, on_discard=None):
+        """Run send(timeout) under the policy; timeout is a (connect, read) tuple in seconds
+
+        call_type selects the latency window used for hedging. on_discard(result) receives
+        the result of a hedged request that finished after the other one had won."""
+        self.bump("calls")
+        last_error = None
+        for attempt in range(self.policy.max_attempts):
+            if not self.breaker.allow():
+                self.bump("rejected")
+                raise CircuitOpenError(f"{self.name} is temporarily unavailable after repeated failures")
+
+            self.bump("attempts")
+            started = time.perf_counter()
+            try:
+                result = self.attempt(send, streaming, call_type, on_discard)
+            except Exception as e:
+                retryable, retry_after = classify_error(e)
+                # Streamed tokens cannot be taken back, so a failed stream is never retried
+                if getattr(e, "partial_output", False):
+                    retryable = False
+                if not retryable:
+                    # Not a sign of an unhealthy backend; leave the breaker as it was
+                    self.breaker.release()
+                    raise
+                self.breaker.record_failure()
+                self.bump("failures")
+                last_error = e
+                if attempt + 1 >= self.policy.max_attempts:
+                    break
+                delay = self.backoff_delay(attempt, retry_after)
+                print(f"{self.name}: attempt {attempt + 1} failed ({e}); retrying in {delay:.1f}s")
+                self.bump("retries")
+                time.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            if not streaming:
+                # Streamed calls take as long as the answer is, so only these feed the hedging percentile
+                self.get_latency(call_type).record(time.perf_counter() - started)
+            return result
+        raise last_error
+
+    def get_stats(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats["circuit"] = self.breaker.state
+        with self.latencies_lock:
+            latencies = dict(self.latencies)
+        stats["latency"] = {
+            call_type or "default": {"p50": latency.percentile(0.5), "p95": latency.percentile(0.95)}
+            for call_type, latency in latencies.items()
+        }
+        return stats
@@ -0,0 +1,164 @@
+"""In-memory cache in front of app_settings with debounced write-behind persistence.
+
+Settings are loaded once, reads are served from memory and updates that do not change
+a value are skipped. Real changes are written out on a background timer so the UI
+thread never waits on disk I/O. Settings that app_settings does not know about are kept
+in a sidecar JSON file that is replaced atomically (temp file + rename).
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+
+import app_settings
+
+FLUSH_DELAY = 0.5  # Seconds to wait for more changes before writing
+EXTRA_SETTINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "extra_settings.json")
+
+# Settings owned by app_settings: name -> (getter, updater)
+BACKED_SETTINGS = {
+    "api_type": (app_settings.get_api_type, app_settings.update_api_type),
+    "api_key": (app_settings.get_api_key, app_settings.update_api_key),
+    "mini4o_api_key": (app_settings.get_mini4o_api_key, app_settings.update_mini4o_api_key),
+    "model": (app_settings.get_model, app_settings.update_model),
+    "appearance_mode": (app_settings.get_appearance_mode, app_settings.update_appearance_mode),
+    "window_size": (app_settings.get_window_size, app_settings.update_window_size),
+}
+
+_values = None
+_dirty = set()
+_lock = threading.RLock()
+_flush_timer = None
+stats = {"reads": 0, "writes_skipped": 0, "writes_queued": 0, "flushes": 0}
+
+def load_extra_settings():
+    """Read the sidecar settings file, returning an empty dict if it is missing or corrupt"""
+    try:
+        with open(EXTRA_SETTINGS_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Error reading {EXTRA_SETTINGS_FILE}: {str(e)}")
+        return {}
+
+def write_extra_settings(data):
+    """Atomically replace the sidecar settings file with data"""
+    directory = os.path.dirname(EXTRA_SETTINGS_FILE)
+    fd, temp_path = tempfile.mkstemp(prefix=".extra_settings.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, EXTRA_SETTINGS_FILE)
+    except Exception:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def _ensure_loaded():
+    global _values
+
+    if _values is None:
+        values = load_extra_settings()
+        for name, (getter, _) in BACKED_SETTINGS.items():
+            values[name] = getter()
+        _values = values
+    return _values
+
+def get_setting(name, default=None):
+    """Return a setting from memory, loading everything from disk on first use"""
+    with _lock:
+        stats["reads"] += 1
+        return _ensure_loaded().get(name, default)
+
+def update_setting(name, value):
+    """Change a setting in memory and schedule it to be written; no-op writes are skipped"""
+    global _flush_timer
+
+    with _lock:
+        values = _ensure_loaded()
+        if name in values and values[name] == value:
+            stats["writes_skipped"] += 1
+            return False
+
+        values[name] = value
+        _dirty.add(name)
+        stats["writes_queued"] += 1
+
+        # Debounce: restart the timer so bursts of changes become one write
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+        _flush_timer = threading.Timer(FLUSH_DELAY, flush)
+        _flush_timer.daemon = True
+        _flush_timer.start()
+        return True
+
+def flush():
+    """Write all pending changes to disk now"""
+    global _flush_timer
+
+    with _lock:
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+        if not _dirty:
+            return
+        dirty = set(_dirty)
+        _dirty.clear()
+        values = dict(_values)
+
+    try:
+        for name in dirty & BACKED_SETTINGS.keys():
+            BACKED_SETTINGS[name][1](values[name])
+        if dirty - BACKED_SETTINGS.keys():
+            write_extra_settings({name: value for name, value in values.items() if name not in BACKED_SETTINGS})
+        stats["flushes"] += 1
+    except Exception as e:
+        print(f"Error writing settings: {str(e)}")
+        # Keep the changes queued so the next flush retries them
+        with _lock:
+            _dirty.update(dirty)
+
+atexit.register(flush)
+
+def get_api_type():
+    return get_setting("api_type")
+
+def update_api_type(api_type):
+    return update_setting("api_type", api_type)
+
+def get_api_key():
+    return get_setting("api_key")
+
+def update_api_key(api_key):
+    return update_setting("api_key", api_key)
+
+def get_mini4o_api_key():
+    return get_setting("mini4o_api_key")
+
+def update_mini4o_api_key(api_key):
+    return update_setting("mini4o_api_key", api_key)
+
+def get_model():
+    return get_setting("model")
+
+def update_model(model):
+    return update_setting("model", model)
+
+def get_appearance_mode():
+    return get_setting("appearance_mode")
+
+def update_appearance_mode(mode):
+    return update_setting("appearance_mode", mode)
+
+def get_window_size():
+    return get_setting("window_size")
+
+def update_window_size(window_size):
+    return update_setting("window_size", window_size)
@@ -0,0 +1,181 @@
+"""Pluggable speech recognition backends with a fallback chain.
+
+Google's web recognizer costs a network round trip per phrase. The offline backends
+(Vosk, Whisper, PocketSphinx) run on the CPU and Vosk can also stream partial
+hypotheses while the user is still speaking. BackendChain tries the preferred backend
+first and falls back to the next available one when a backend fails, keeping failed
+backends out of rotation for a cool-down period.
+
+To stay a drop-in replacement for Recognizer.recognize_google(), the chain raises
+sr.UnknownValueError when no speech was recognized and sr.RequestError when every
+backend failed.
+"""
+import importlib.util
+import json
+import os
+import time
+
+import speech_recognition as sr
+
+LANGUAGE = "en-US"
+BACKEND_NAMES = ["google", "vosk", "whisper", "sphinx"]
+DEFAULT_VOSK_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "vosk")
+FAILURE_COOLDOWN = 60  # Seconds a failed backend is skipped before it is tried again
+VOSK_SAMPLE_RATE = 16000
+VOSK_FEED_BYTES = 8000  # About a quarter second of 16 kHz 16-bit audio
+
+def module_available(name):
+    return importlib.util.find_spec(name) is not None
+
+class SpeechBackend:
+    """Base class for recognizer backends"""
+    name = ""
+    offline = False
+
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+
+    def is_available(self):
+        return True
+
+    def transcribe(self, audio, on_partial=None):
+        """Return the text in an AudioData chunk ("" if there was no speech)"""
+        raise NotImplementedError
+
+    def create_stream(self, sample_rate):
+        """Return an incremental recognizer for raw 16-bit audio, or None if not supported"""
+        return None
+
+class GoogleBackend(SpeechBackend):
+    name = "google"
+
+    def transcribe(self, audio, on_partial=None):
+        return self.recognizer.recognize_google(audio, language=LANGUAGE)
+
+class SphinxBackend(SpeechBackend):
+    name = "sphinx"
+    offline = True
+
+    def is_available(self):
+        return module_available("pocketsphinx")
+
+    def transcribe(self, audio, on_partial=None):
+        return self.recognizer.recognize_sphinx(audio, language=LANGUAGE)
+
+class WhisperBackend(SpeechBackend):
+    name = "whisper"
+    offline = True
+    model = "base.en"
+
+    def is_available(self):
+        return module_available("whisper")
+
+    def transcribe(self, audio, on_partial=None):
+        return self.recognizer.recognize_whisper(audio, model=self.model, language="english")
+
+class VoskStream:
+    """Incremental Vosk recognizer that returns the best hypothesis after every buffer"""
+
+    def __init__(self, kaldi_recognizer):
+        self.kaldi_recognizer = kaldi_recognizer
+        self.segments = []
+
+    def accept(self, raw_data):
+        if self.kaldi_recognizer.AcceptWaveform(raw_data):
+            segment = json.loads(self.kaldi_recognizer.Result()).get("text", "")
+            if segment:
+                self.segments.append(segment)
+            return " ".join(self.segments)
+        partial = json.loads(self.kaldi_recognizer.PartialResult()).get("partial", "")
+        return " ".join(self.segments + [partial]).strip()
+
+    def finish(self):
+        segment = json.loads(self.kaldi_recognizer.FinalResult()).get("text", "")
+        if segment:
+            self.segments.append(segment)
+        return " ".join(self.segments)
+
+class VoskBackend(SpeechBackend):
+    name = "vosk"
+    offline = True
+
+    def __init__(self, recognizer, model_path=DEFAULT_VOSK_MODEL_PATH):
+        super().__init__(recognizer)
+        self.model_path = model_path
+        self.model = None
+
+    def is_available(self):
+        return module_available("vosk") and os.path.isdir(self.model_path)
+
+    def load_model(self):
+        if self.model is None:
+            import vosk
+            vosk.SetLogLevel(-1)
+            self.model = vosk.Model(self.model_path)
+        return self.model
+
+    def create_stream(self, sample_rate):
+        import vosk
+        return VoskStream(vosk.KaldiRecognizer(self.load_model(), sample_rate))
+
+    def transcribe(self, audio, on_partial=None):
+        stream = self.create_stream(VOSK_SAMPLE_RATE)
+        raw_data = audio.get_raw_data(convert_rate=VOSK_SAMPLE_RATE, convert_width=2)
+        for offset in range(0, len(raw_data), VOSK_FEED_BYTES):
+            partial = stream.accept(raw_data[offset:offset + VOSK_FEED_BYTES])
+            if partial and on_partial:
+                on_partial(partial)
+        return stream.finish()
+
+class BackendChain:
+    """Tries backends in order of preference, falling back when one fails"""
+
+    def __init__(self, backends):
+        self.backends = backends
+        self.failed_until = {}
+
+    def active_backends(self):
+        now = time.time()
+        return [
+            backend for backend in self.backends
+            if backend.is_available() and self.failed_until.get(backend.name, 0) <= now
+        ]
+
+    def mark_failed(self, backend, error):
+        print(f"Speech backend '{backend.name}' failed, falling back: {repr(error)}")
+        self.failed_until[backend.name] = time.time() + FAILURE_COOLDOWN
+
+    def streaming_backend(self):
+        """The preferred backend if it can stream partial results while the user speaks"""
+        active = self.active_backends()
+        if active and type(active[0]).create_stream is not SpeechBackend.create_stream:
+            return active[0]
+        return None
+
+    def transcribe(self, audio, on_partial=None):
+        errors = []
+        for backend in self.active_backends():
+            try:
+                text = backend.transcribe(audio, on_partial)
+            except sr.UnknownValueError:
+                # The backend worked but heard nothing intelligible
+                raise
+            except Exception as e:
+                self.mark_failed(backend, e)
+                errors.append(f"{backend.name}: {e}")
+                continue
+            if not text or not text.strip():
+                raise sr.UnknownValueError()
+            return text.strip()
+        raise sr.RequestError("No speech backend available" + (" (" + "; ".join(errors) + ")" if errors else ""))
+
+def build_backend_chain(recognizer, preferred="google", vosk_model_path=None):
+    """Create the fallback chain with the preferred backend first and the others after it"""
+    backends = {
+        "google": GoogleBackend(recognizer),
+        "vosk": VoskBackend(recognizer, vosk_model_path or DEFAULT_VOSK_MODEL_PATH),
+        "whisper": WhisperBackend(recognizer),
+        "sphinx": SphinxBackend(recognizer),
+    }
+    order = [preferred] + [name for name in BACKEND_NAMES if name != preferred]
+    return BackendChain([backends[name] for name in order if name in backends])
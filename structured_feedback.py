@@ -0,0 +1,212 @@
+"""Structured interview feedback: JSON schema, incremental stream parsing and formatting.
+
+The feedback call asks for a JSON object with typed fields instead of numbered free-form
+sections, so the follow-up question no longer has to be scraped out with a regex.
+FeedbackStreamParser reads the streamed JSON and reports each top-level field as soon as
+its value is complete. follow_up comes second in the schema so that the next question
+can be shown while the rest of the evaluation is still streaming.
+
+In fan-out mode the same fields are split into FEEDBACK_PARTS that are requested
+concurrently, each with its own smaller schema.
+"""
+import json
+import re
+
+FIELD_ORDER = ["rating", "follow_up", "summary", "strengths", "improvements"]
+FALLBACK_FOLLOW_UP = "Tell me more about your previous response."
+
+FEEDBACK_SCHEMA = {
+    "name": "interview_feedback",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "rating": {"type": "integer", "description": "Overall rating of the response from 1 to 10"},
+            "follow_up": {"type": "string", "description": "Targeted follow-up question probing deeper into the topic"},
+            "summary": {"type": "string", "description": "Quick summary of how well the response addresses the question"},
+            "strengths": {"type": "array", "items": {"type": "string"}},
+            "improvements": {
+                "type": "array", "items": {"type": "string"},
+                "description": "Specific improvements with concrete examples of what would make the answer stronger",
+            },
+        },
+        "required": FIELD_ORDER,
+        "additionalProperties": False,
+    },
+}
+
+FIELD_INSTRUCTIONS = {
+    "rating": "integer from 1 to 10 for the response overall",
+    "follow_up": "a targeted follow-up question that probes deeper and challenges the candidate to show deeper understanding",
+    "summary": "a quick summary of the response's strengths and weaknesses and how well it addresses the question",
+    "strengths": "list of short strings",
+    "improvements": "list of specific improvements, with concrete examples of what would make the answer stronger and any missing key elements or perspectives",
+}
+
+# Fan-out mode: fields requested together, follow-up first so the next round can start early
+FEEDBACK_PARTS = {
+    "follow_up": ["follow_up"],
+    "summary": ["rating", "summary", "strengths"],
+    "improvements": ["improvements"],
+}
+
+def format_instructions(fields):
+    """Prompt text describing the JSON object to reply with"""
+    lines = "".join(f'    - "{name}": {FIELD_INSTRUCTIONS[name]}\n' for name in fields)
+    return f"Reply with a single JSON object with exactly these fields, in this order:\n{lines}    "
+
+FEEDBACK_FORMAT_INSTRUCTIONS = format_instructions(FIELD_ORDER)
+
+def build_part_schema(part):
+    """JSON schema for one fan-out part, a subset of FEEDBACK_SCHEMA"""
+    fields = FEEDBACK_PARTS[part]
+    properties = FEEDBACK_SCHEMA["schema"]["properties"]
+    return {
+        "name": f"interview_feedback_{part}",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {name: properties[name] for name in fields},
+            "required": fields,
+            "additionalProperties": False,
+        },
+    }
+
+# Models that accept response_format with a JSON schema; older chat models only know JSON mode
+JSON_SCHEMA_MODEL_PREFIXES = ("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4")
+JSON_MODE_MODEL_PREFIXES = ("gpt-4-turbo", "gpt-3.5-turbo", "gpt-4-1106", "gpt-4-0125")
+
+def response_format_for_model(model, json_schema):
+    """The strictest response_format the model supports, or None to rely on the prompt alone"""
+    if model.startswith(JSON_SCHEMA_MODEL_PREFIXES):
+        return {"type": "json_schema", "json_schema": json_schema}
+    if model.startswith(JSON_MODE_MODEL_PREFIXES):
+        return {"type": "json_object"}
+    return None
+
+class FeedbackStreamParser:
+    """Incrementally parses a streamed JSON object, reporting each top-level field when complete"""
+
+    def __init__(self, on_field):
+        self.on_field = on_field
+        self.buffer = ""
+        self.position = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.key = None
+        self.key_start = None
+        self.value_start = None
+        self.fields = {}
+
+    def feed(self, text):
+        self.buffer += text
+        while self.position < len(self.buffer):
+            char = self.buffer[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.value_start is None:
+                        # End of a top-level key
+                        self.key = json.loads(self.buffer[self.key_start:self.position + 1])
+            elif char == '"':
+                self.in_string = True
+                if self.depth == 1 and self.value_start is None:
+                    self.key_start = self.position
+            elif char == ":" and self.depth == 1 and self.value_start is None:
+                self.value_start = self.position + 1
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                if self.depth == 1 and char == "}":
+                    self.finish_value()
+                self.depth -= 1
+            elif char == "," and self.depth == 1:
+                self.finish_value()
+            self.position += 1
+
+    def finish_value(self):
+        if self.key is None or self.value_start is None:
+            return
+        try:
+            value = json.loads(self.buffer[self.value_start:self.position])
+        except ValueError:
+            value = None
+        if value is not None:
+            self.fields[self.key] = value
+            self.on_field(self.key, value)
+        self.key = None
+        self.value_start = None
+
+def parse_feedback(text):
+    """Feedback fields from a finished completion, accepting JSON or the old numbered text format"""
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if match:
+        try:
+            data = json.loads(match.group(0))
+            if isinstance(data, dict):
+                return data
+        except ValueError:
+            pass
+
+    # Plain text (e.g. a server without JSON support): fall back to the numbered sections
+    feedback = {"summary": text.strip()}
+    follow_up = re.search(r'3\. Follow-up Question:(.*?)(?=\n\n|\n[1-4]\.|\Z)', text, re.DOTALL)
+    if follow_up:
+        feedback["follow_up"] = follow_up.group(1).strip()
+    rating = re.search(r"\b(10|[1-9])\s*/\s*10\b", text)
+    if rating:
+        feedback["rating"] = int(rating.group(1))
+    return feedback
+
+def parse_streamed_feedback(text, streamed_fields):
+    """Feedback from a finished stream, keeping the fields FeedbackStreamParser already completed
+
+    A reply cut short (e.g. by the token cap) is not valid JSON, and parse_feedback would
+    turn it into a raw-text summary; the fields parsed while streaming are used instead."""
+    feedback = parse_feedback(text)
+    if not streamed_fields:
+        return feedback
+    if feedback.get("summary") == text.strip():
+        return dict(streamed_fields)
+    return {**streamed_fields, **feedback}
+
+def parse_feedback_part(part, text):
+    """Fields of one fan-out part; a plain-text answer becomes the part's main field"""
+    fields = FEEDBACK_PARTS[part]
+    feedback = parse_feedback(text)
+    if any(name in feedback for name in fields if name != "summary") or part == "summary":
+        return {name: feedback[name] for name in fields if name in feedback}
+    plain = text.strip()
+    if part == "follow_up":
+        return {"follow_up": plain}
+    return {"improvements": [plain]}
+
+def get_follow_up(feedback):
+    follow_up = feedback.get("follow_up")
+    if isinstance(follow_up, str) and follow_up.strip():
+        return follow_up.strip()
+    return FALLBACK_FOLLOW_UP
+
+def format_field(name, value):
+    """Transcript text for one feedback field"""
+    if name == "rating":
+        return f"Rating: {value}/10\n"
+    if name == "follow_up":
+        return f"\nFollow-up Question: {value}\n"
+    if name == "summary":
+        return f"\n{value}\n"
+    if name in ("strengths", "improvements"):
+        items = value if isinstance(value, list) else [value]
+        title = "Strengths" if name == "strengths" else "How to Improve"
+        return f"\n{title}:\n" + "".join(f"- {item}\n" for item in items)
+    return f"\n{name}: {value}\n"
+
+def format_feedback(feedback):
+    """Readable text for a whole feedback object, in display order"""
+    names = [name for name in FIELD_ORDER if name != "follow_up"] + ["follow_up"]
+    return "".join(format_field(name, feedback[name]) for name in names if name in feedback)
@@ -0,0 +1,85 @@
+"""End to end: a local model profile pointing at the mock server, through get_completion and probe_profile"""
+import importlib.util
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from mock_openai_server import MODELS, REPLY, create_server
+
+# app_settings lives next to the repository, as main.py expects
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+MISSING = [name for name in ("openai", "httpx", "requests", "app_settings") if importlib.util.find_spec(name) is None]
+
+@unittest.skipIf(MISSING, f"needs {', '.join(MISSING)}")
+class MockServerEndToEndTest(unittest.TestCase):
+    def setUp(self):
+        import interview_engine
+        import model_profiles
+        import settings_cache
+
+        self.server = create_server(0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        # Keep the test's settings in memory and a temporary file, away from the user's
+        settings_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(settings_dir.cleanup)
+        for name, value in (("_values", {"api_type": "local", "auto_backend_routing": False,
+                                         "completion_cache": False, "call_metrics_log": False}),
+                            ("_dirty", set()), ("BACKED_SETTINGS", {}),
+                            ("EXTRA_SETTINGS_FILE", os.path.join(settings_dir.name, "extra_settings.json"))):
+            patcher = mock.patch.object(settings_cache, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(interview_engine.backend_guards.pop, "local", None)
+
+        self.profile = model_profiles.ModelProfile(
+            "mock", f"http://127.0.0.1:{self.server.server_address[1]}/v1", model=MODELS[0]
+        )
+        model_profiles.save_profile(self.profile)
+        model_profiles.set_active_profile("mock")
+
+    def test_probe_profile(self):
+        import model_profiles
+
+        capabilities = model_profiles.probe_profile(self.profile)
+
+        self.assertTrue(capabilities["reachable"])
+        self.assertTrue(capabilities["chat"])
+        self.assertTrue(capabilities["streaming"])
+        self.assertEqual(capabilities["error"], "")
+        self.assertEqual(self.profile.models, MODELS)
+
+    def test_completion(self):
+        from interview_engine import get_completion
+
+        text = get_completion("Evaluate this answer.", call_type="feedback", use_cache=False)
+
+        self.assertEqual(text, REPLY)
+        self.assertEqual(self.server.requests, 1)
+
+    def test_streamed_completion(self):
+        from interview_engine import get_completion
+
+        deltas = []
+        text = get_completion("Evaluate this answer.", on_delta=deltas.append, call_type="feedback", use_cache=False)
+
+        self.assertEqual(text, REPLY)
+        self.assertGreater(len(deltas), 1)
+        self.assertEqual("".join(deltas), REPLY)
+
+    def test_completion_retries_injected_error(self):
+        from interview_engine import get_completion
+
+        self.server.add_fault(status=503, retry_after=0)
+        text = get_completion("Evaluate this answer.", call_type="feedback", use_cache=False)
+
+        self.assertEqual(text, REPLY)
+        self.assertEqual(self.server.requests, 2)
+
+if __name__ == "__main__":
+    unittest.main()
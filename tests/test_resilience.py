@@ -0,0 +1,111 @@
+"""BackendGuard retries, circuit breaking and hedging against the mock server"""
+import json
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from mock_openai_server import create_server
+from resilience import (RETRY_STATUSES, BackendGuard, CircuitOpenError, ResiliencePolicy, RetryableError,
+                        parse_retry_after)
+
+def make_send(url):
+    """A send(timeout) function doing one non-streamed completion request with urllib"""
+    def send(timeout):
+        body = json.dumps({"model": "mock-small", "messages": [{"role": "user", "content": "Hi"}]}).encode("utf-8")
+        request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout[1]) as response:
+                return json.loads(response.read())["choices"][0]["message"]["content"]
+        except urllib.error.HTTPError as e:
+            if e.code in RETRY_STATUSES:
+                raise RetryableError(f"HTTP {e.code}", e.code, parse_retry_after(e.headers.get("Retry-After")))
+            raise
+    return send
+
+class ResilienceTest(unittest.TestCase):
+    def setUp(self):
+        self.server = create_server(0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.send = make_send(f"http://127.0.0.1:{self.server.server_address[1]}/v1/chat/completions")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_retry_waits_for_retry_after(self):
+        guard = BackendGuard("mock", ResiliencePolicy(max_attempts=3, base_delay=0.01, hedging=False))
+        self.server.add_fault(status=429, retry_after=1)
+
+        started = time.perf_counter()
+        reply = guard.call(self.send)
+
+        self.assertTrue(reply)
+        self.assertGreaterEqual(time.perf_counter() - started, 1.0)
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(guard.get_stats()["retries"], 1)
+
+    def test_retries_give_up_after_max_attempts(self):
+        guard = BackendGuard("mock", ResiliencePolicy(max_attempts=2, base_delay=0.01, hedging=False))
+        self.server.add_fault(status=503, count=2)
+
+        with self.assertRaises(RetryableError) as raised:
+            guard.call(self.send)
+        self.assertEqual(raised.exception.status_code, 503)
+        self.assertEqual(self.server.requests, 2)
+
+    def test_breaker_opens_and_resets(self):
+        policy = ResiliencePolicy(max_attempts=1, failure_threshold=2, reset_timeout=0.3, hedging=False)
+        guard = BackendGuard("mock", policy)
+        self.server.add_fault(status=500, count=2)
+
+        for _ in range(2):
+            with self.assertRaises(RetryableError):
+                guard.call(self.send)
+        self.assertEqual(guard.breaker.state, "open")
+
+        # While open, calls are rejected without reaching the server
+        with self.assertRaises(CircuitOpenError):
+            guard.call(self.send)
+        self.assertEqual(self.server.requests, 2)
+
+        # After the reset timeout a trial request goes through and closes the breaker again
+        time.sleep(0.35)
+        self.assertTrue(guard.call(self.send))
+        self.assertEqual(guard.breaker.state, "closed")
+        self.assertEqual(self.server.requests, 3)
+
+    def test_hedged_request_wins(self):
+        guard = BackendGuard("mock", ResiliencePolicy(hedging=True, hedge_percentile=0.95))
+        for _ in range(20):
+            guard.get_latency("question").record(0.05)
+        self.server.add_fault(delay=1.0)  # Only the first request is slow
+        discarded = threading.Event()
+
+        started = time.perf_counter()
+        reply = guard.call(self.send, call_type="question", on_discard=lambda result: discarded.set())
+
+        self.assertTrue(reply)
+        self.assertLess(time.perf_counter() - started, 0.8)
+        stats = guard.get_stats()
+        self.assertEqual(stats["hedges"], 1)
+        self.assertEqual(stats["hedge_wins"], 1)
+
+        # The slow request still finishes, and its answer is handed over for accounting
+        self.assertTrue(discarded.wait(3))
+        self.assertEqual(guard.get_stats()["hedge_discards"], 1)
+
+    def test_hedging_uses_the_call_types_own_latencies(self):
+        guard = BackendGuard("mock", ResiliencePolicy(hedging=True, hedge_percentile=0.95))
+        for _ in range(20):
+            guard.get_latency("question").record(0.05)
+        self.server.add_fault(delay=0.5)
+
+        # Short question calls say nothing about how long a bank fill takes
+        self.assertTrue(guard.call(self.send, call_type="question_list"))
+        self.assertEqual(guard.get_stats()["hedges"], 0)
+        self.assertEqual(self.server.requests, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""Streamed feedback parsing, including replies cut short by the token cap"""
+import json
+import unittest
+
+from structured_feedback import FeedbackStreamParser, parse_feedback, parse_streamed_feedback
+
+FEEDBACK = {
+    "rating": 7,
+    "follow_up": "How would you test that?",
+    "summary": "Clear, but light on detail.",
+    "strengths": ["Structured", "Concise"],
+    "improvements": ["Give a concrete example", "Mention trade-offs"],
+}
+
+def stream(text, size=7):
+    """Feed text to a parser in small chunks, as a streamed reply arrives"""
+    seen = []
+    parser = FeedbackStreamParser(lambda name, value: seen.append(name))
+    for index in range(0, len(text), size):
+        parser.feed(text[index:index + size])
+    return parser, seen
+
+class FeedbackStreamParserTest(unittest.TestCase):
+    def test_fields_reported_in_order(self):
+        parser, seen = stream(json.dumps(FEEDBACK))
+
+        self.assertEqual(seen, list(FEEDBACK))
+        self.assertEqual(parser.fields, FEEDBACK)
+
+    def test_truncated_reply_keeps_completed_fields(self):
+        text = json.dumps(FEEDBACK)
+        text = text[:text.index("Mention")]  # Cut off inside the last list
+        parser, seen = stream(text)
+
+        self.assertEqual(seen, ["rating", "follow_up", "summary", "strengths"])
+        self.assertEqual(parse_feedback(text), {"summary": text})
+        feedback = parse_streamed_feedback(text, parser.fields)
+        self.assertEqual(feedback, {name: FEEDBACK[name] for name in seen})
+
+    def test_complete_reply_wins_over_streamed_fields(self):
+        text = json.dumps(FEEDBACK)
+        parser, _ = stream(text)
+
+        self.assertEqual(parse_streamed_feedback(text, parser.fields), FEEDBACK)
+
+    def test_plain_text_reply(self):
+        text = "1. Rating: 6/10\n2. Feedback: Fine.\n3. Follow-up Question: Why?"
+        parser, seen = stream(text)
+
+        self.assertEqual(seen, [])
+        feedback = parse_streamed_feedback(text, parser.fields)
+        self.assertEqual(feedback["rating"], 6)
+        self.assertEqual(feedback["follow_up"], "Why?")
+
+if __name__ == "__main__":
+    unittest.main()
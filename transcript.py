@@ -0,0 +1,110 @@
+"""Transcript model with a bounded view in the result textbox.
+
+The text of every interview round is kept here rather than in the widget. Only the
+most recent rounds are rendered; older rounds are stored zlib-compressed and are
+rendered again, one at a time, when the user scrolls back to the top. This keeps Tk
+text operations and memory use flat in long sessions.
+"""
+import zlib
+
+MAX_RENDERED_ROUNDS = 6
+
+def compress_text(text):
+    return zlib.compress(text.encode("utf-8"))
+
+def decompress_text(data):
+    return zlib.decompress(data).decode("utf-8")
+
+class TranscriptView:
+    """Owns the contents of a CTkTextbox, rendering only the latest rounds"""
+
+    def __init__(self, textbox, max_rendered_rounds=MAX_RENDERED_ROUNDS):
+        self.textbox = textbox
+        self.max_rendered_rounds = max_rendered_rounds
+        self.rounds = [[]]  # Text segments per round; rounds out of view are compressed bytes
+        self.first_rendered = 0  # Index of the oldest round currently in the widget
+
+        # Load older rounds lazily when the user scrolls back to the top
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Prior>", "<Up>"):
+            self.textbox.bind(sequence, self.on_scroll, add="+")
+        # Dragging the scrollbar binds no event on the textbox, but every view change goes
+        # through the text widget's yscrollcommand (CTkTextbox wraps a tk.Text)
+        self.text_widget = getattr(textbox, "_textbox", textbox)
+        self.scroll_command = str(self.text_widget.cget("yscrollcommand"))
+        self.text_widget.configure(yscrollcommand=self.on_yview)
+
+    def round_text(self, index):
+        segments = self.rounds[index]
+        if isinstance(segments, bytes):
+            return decompress_text(segments)
+        return "".join(segments)
+
+    def header_text(self):
+        if self.first_rendered == 0:
+            return ""
+        return f"[{self.first_rendered} earlier round(s) hidden - scroll up to load]\n\n"
+
+    def append(self, text):
+        """Add text to the current round and to the end of the widget"""
+        self.rounds[-1].append(text)
+        self.textbox.insert("end", text)
+
+    def clear(self):
+        """Forget the whole transcript, e.g. when a new interview starts"""
+        self.rounds = [[]]
+        self.first_rendered = 0
+        self.textbox.delete("0.0", "end")
+
+    def start_round(self):
+        """Begin a new round, dropping the oldest rendered rounds from the widget if needed"""
+        # Store the finished round as a single string instead of many small segments
+        self.rounds[-1] = [self.round_text(len(self.rounds) - 1)]
+        self.rounds.append([])
+
+        if len(self.rounds) - self.first_rendered > self.max_rendered_rounds:
+            while len(self.rounds) - self.first_rendered > self.max_rendered_rounds:
+                self.rounds[self.first_rendered] = compress_text(self.round_text(self.first_rendered))
+                self.first_rendered += 1
+            self.render()
+            self.textbox.see("end")
+
+    def render(self):
+        self.textbox.delete("0.0", "end")
+        self.textbox.insert("end", self.header_text())
+        for index in range(self.first_rendered, len(self.rounds)):
+            self.textbox.insert("end", self.round_text(index))
+
+    def load_earlier_round(self):
+        """Render one more round above the ones in view, keeping the scroll position"""
+        if self.first_rendered == 0:
+            return
+        self.first_rendered -= 1
+        self.rounds[self.first_rendered] = [self.round_text(self.first_rendered)]
+
+        loaded_lines = self.header_text().count("\n") + self.round_text(self.first_rendered).count("\n")
+        self.render()
+        total_lines = int(self.textbox.index("end-1c").split(".")[0])
+        self.textbox.yview_moveto(loaded_lines / max(total_lines, 1))
+
+    def on_scroll(self, event=None):
+        # Let the scroll happen first, then check whether the top was reached
+        self.textbox.after_idle(self.check_top)
+
+    def on_yview(self, first, last):
+        # Keep the scrollbar in sync, then load more if the view reached the top
+        if self.scroll_command:
+            self.text_widget.tk.call(self.scroll_command, first, last)
+        if self.first_rendered > 0 and float(first) <= 0.0:
+            self.textbox.after_idle(self.check_top)
+
+    def check_top(self):
+        if self.first_rendered > 0 and self.textbox.yview()[0] <= 0.0:
+            self.load_earlier_round()
+
+    def stats(self):
+        archived = [segments for segments in self.rounds[:self.first_rendered] if isinstance(segments, bytes)]
+        return {
+            "rounds": len(self.rounds),
+            "rendered_rounds": len(self.rounds) - self.first_rendered,
+            "archived_bytes": sum(len(data) for data in archived),
+        }
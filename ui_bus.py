@@ -0,0 +1,95 @@
+"""Thread-safe queue of UI updates drained by the Tk main loop on a fixed tick.
+
+Worker threads post typed events instead of scheduling one Tk callback per update.
+On every tick the main loop takes everything that has queued up and coalesces runs of
+adjacent events of the same kind and key before dispatching them: for example several
+entry-text updates collapse into the last one and a run of textbox appends becomes a
+single insert. Queue depth and drain latency are tracked so the effect can be measured.
+"""
+import threading
+import time
+from collections import deque
+
+DEFAULT_TICK_MS = 33  # About 30 drains per second
+
+class UIBus:
+    """Collects events from any thread and dispatches them in batches on the UI thread"""
+
+    def __init__(self, tick_ms=DEFAULT_TICK_MS):
+        self.tick_ms = tick_ms
+        self.events = deque()
+        self.lock = threading.Lock()
+        self.handlers = {}  # kind -> (handler, merge function or None)
+        self.schedule = None
+        self.stats = {
+            "posted": 0,
+            "dispatched": 0,
+            "drains": 0,
+            "max_depth": 0,
+            "max_latency_ms": 0.0,
+            "total_latency_ms": 0.0,
+        }
+
+    def register(self, kind, handler, merge=None):
+        """Handle events of this kind; merge(old, new) combines adjacent payloads with the same key"""
+        self.handlers[kind] = (handler, merge)
+
+    def post(self, kind, payload=None, key=None):
+        """Queue an event from any thread"""
+        with self.lock:
+            self.events.append((kind, key, payload, time.perf_counter()))
+            self.stats["posted"] += 1
+            if len(self.events) > self.stats["max_depth"]:
+                self.stats["max_depth"] = len(self.events)
+
+    def start(self, schedule):
+        """Start draining; schedule(ms, callback) is usually the Tk root's after method"""
+        self.schedule = schedule
+        self.schedule(self.tick_ms, self.tick)
+
+    def tick(self):
+        try:
+            self.drain()
+        finally:
+            self.schedule(self.tick_ms, self.tick)
+
+    def drain(self):
+        """Dispatch everything queued so far, coalescing adjacent events"""
+        with self.lock:
+            if not self.events:
+                return
+            events = list(self.events)
+            self.events.clear()
+
+        # Time the oldest event spent waiting in the queue
+        latency_ms = (time.perf_counter() - events[0][3]) * 1000
+        self.stats["drains"] += 1
+        self.stats["total_latency_ms"] += latency_ms
+        self.stats["max_latency_ms"] = max(self.stats["max_latency_ms"], latency_ms)
+
+        batch = []
+        for kind, key, payload, _ in events:
+            merge = self.handlers.get(kind, (None, None))[1]
+            if merge and batch and batch[-1][0] == kind and batch[-1][1] == key:
+                batch[-1] = (kind, key, merge(batch[-1][2], payload))
+            else:
+                batch.append((kind, key, payload))
+
+        for kind, _, payload in batch:
+            handler = self.handlers.get(kind, (None, None))[0]
+            if handler is None:
+                print(f"No UI handler registered for '{kind}' events")
+                continue
+            try:
+                handler(payload)
+            except Exception as e:
+                print(f"Error handling '{kind}' UI event: {str(e)}")
+        self.stats["dispatched"] += len(batch)
+
+    def get_stats(self):
+        """Counters plus current queue depth and average drain latency"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["depth"] = len(self.events)
+        stats["avg_latency_ms"] = stats["total_latency_ms"] / stats["drains"] if stats["drains"] else 0.0
+        return stats